@@ -0,0 +1,97 @@
+"""
+Compare the legacy per-endpoint DataFrame concat of JSONExtractor with the vectorized merge_endpoints path, both
+from JSON rows and from the typed columns handed over by the parquet backend.
+
+Usage: python -m benchmarks.json_extractor_benchmark [--rows 10000] [--repeat 5]
+"""
+import argparse
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.api_integrator.cryptoquant_connector import CryptoQuantConnector
+from src.pipeline.json_extractor import JSONExtractor
+
+DAY_MS = 24 * 60 * 60 * 1000
+START_TIME = 1104537600000  # 2005-01-01
+
+
+def make_responses(category: str, rows: int, seed: int = 0) -> List[Dict]:
+    """
+    Build synthetic responses of a category, spreading the declared columns over the category's endpoints
+    """
+    rng = np.random.default_rng(seed)
+    endpoints = list(CryptoQuantConnector.ENDPOINTS_PARAMS[category].keys())
+    columns = JSONExtractor.ENDPOINT_COLUMNS[category]
+    start_times = START_TIME + np.arange(rows, dtype=np.int64) * DAY_MS
+    dates = pd.to_datetime(start_times, unit="ms").strftime("%Y-%m-%d %H:%M:%S")
+
+    responses = []
+    for i, endpoint in enumerate(endpoints):
+        endpoint_columns = columns[i::len(endpoints)]
+        values = {column: rng.random(rows) * 1000 for column in endpoint_columns}
+        data = [
+            {"start_time": int(start_times[j]), "date": dates[j],
+             **{column: float(values[column][j]) for column in endpoint_columns}}
+            for j in range(rows)
+        ]
+        responses.append({"endpoint": endpoint, "data": data})
+    return responses
+
+
+def legacy_merge(responses: List[Dict]) -> pd.DataFrame:
+    df_list = []
+    for response in responses:
+        df = pd.DataFrame(response["data"]).drop(columns="start_time").set_index("date")
+        df_list.append(df)
+    return pd.concat(df_list, sort=True, axis=1)
+
+
+def vectorized_merge(extractor: JSONExtractor, responses: List[Dict], category: str) -> pd.DataFrame:
+    return extractor.merge_endpoints([extractor._rows_to_columns(response["data"]) for response in responses],
+                                     category)
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    extractor = JSONExtractor()
+    print(f"{'category':<20}{'legacy (ms)':>14}{'rows (ms)':>12}{'speedup':>10}{'columns (ms)':>15}{'speedup':>10}")
+
+    totals = np.zeros(3)
+    for category in JSONExtractor.ENDPOINT_COLUMNS:
+        responses = make_responses(category, args.rows)
+        columns = [extractor._rows_to_columns(response["data"]) for response in responses]
+
+        timings = np.array([
+            best_of(lambda: legacy_merge(responses), args.repeat),
+            best_of(lambda: vectorized_merge(extractor, responses, category), args.repeat),
+            best_of(lambda: extractor.merge_endpoints(columns, category), args.repeat),
+        ])
+        totals += timings
+        print(format_row(category, timings))
+
+    print(format_row("total", totals))
+
+
+def format_row(name: str, timings: np.ndarray) -> str:
+    legacy, rows, columns = timings * 1000
+    return f"{name:<20}{legacy:>14.1f}{rows:>12.1f}{legacy / rows:>9.1f}x{columns:>15.1f}{legacy / columns:>9.1f}x"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Local stand-in for the Cybotrade API. Every route declared in the ENDPOINTS_PARAMS of the registered providers is
+answered with a recorded payload, or with synthetic rows when no recording exists. Latency, server errors and 429
+responses can be injected to exercise the retry and rate limiting paths offline. Responses carry an ETag and
+conditional requests are answered with 304 Not Modified.
+
+Recorded payloads are raw response files in the format written by the json storage backend
+(long-{symbol}-{category}.json, with the category prefixed as in the raw store).
+
+Usage: python -m benchmarks.mock_api_server [--port 8765] [--latency 0.05] [--error-rate 0.01] [--throttle-rate 0.01]
+"""
+import argparse
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import random
+from typing import Dict, List, Optional, Tuple, Type
+from urllib.parse import urlsplit
+
+import httpx
+import numpy as np
+import orjson
+from fastapi import FastAPI, Request, Response
+from pydantic import BaseModel
+
+from benchmarks.json_extractor_benchmark import make_responses, DAY_MS, START_TIME
+from src.api_integrator.base_connector import BaseConnector
+from src.api_integrator.providers import PROVIDERS
+from src.utils.utils import get_raw_filename
+
+
+class MockAPIConfig(BaseModel):
+    # Seconds added to every response, plus a uniform jitter of up to latency_jitter seconds
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    # Shares of the requests answered with a 500 and with a 429
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    # Retry-After header of the 429 responses, in seconds
+    retry_after: float = 0.0
+    # Daily rows of every synthetic endpoint
+    rows: int = 1000
+    seed: int = 0
+    symbols: List[str] = ["btc", "eth"]
+    payload_dir: Optional[str] = None
+
+
+class MockRoute(BaseModel):
+    provider: str
+    symbol: str
+    category: str
+    endpoint: str
+
+
+class MockAPIStats(BaseModel):
+    requests: int = 0
+    errors: int = 0
+    throttled: int = 0
+    not_modified: int = 0
+    bytes_sent: int = 0
+
+
+class MockAPIServer:
+    """
+    Replay the endpoints of the given providers. The server can run in the process through transport(), which needs
+    no sockets, or on a port through run().
+    """
+
+    def __init__(self, config: Optional[MockAPIConfig] = None,
+                 providers: Optional[Dict[str, Type[BaseConnector]]] = None):
+        self.config = config or MockAPIConfig()
+        self.providers = providers or PROVIDERS
+        self.stats = MockAPIStats()
+        self.random = random.Random(self.config.seed)
+        # Route path -> symbol query parameter and routes by symbol value (None for symbols in the path)
+        self.routes: Dict[str, Tuple[Optional[str], Dict[Optional[str], MockRoute]]] = {}
+        # Rows of each route, sorted by start_time, with their start times for bisecting
+        self._payloads: Dict[Tuple, Tuple[List[int], List[Dict]]] = {}
+        self._loaded = set()
+        # Encoded body and ETag of every requested slice
+        self._encoded: Dict[Tuple, Tuple[bytes, str]] = {}
+
+        for connector in self.providers.values():
+            self._add_routes(connector)
+
+        self.app = FastAPI()
+        self.app.add_api_route("/{path:path}", self.handle, methods=["GET"])
+
+    def transport(self) -> httpx.ASGITransport:
+        """
+        Transport to pass to the connectors, which keep their real URLs
+        """
+        return httpx.ASGITransport(app=self.app)
+
+    def run(self, host: str = "127.0.0.1", port: int = 8765):
+        import uvicorn
+        uvicorn.run(self.app, host=host, port=port, log_level="warning")
+
+    async def handle(self, path: str, request: Request) -> Response:
+        self.stats.requests += 1
+
+        route = self._resolve(request)
+        if route is None:
+            return Response(status_code=404)
+
+        latency = self.config.latency + self.random.uniform(0, self.config.latency_jitter)
+        if latency:
+            await asyncio.sleep(latency)
+
+        draw = self.random.random()
+        if draw < self.config.throttle_rate:
+            self.stats.throttled += 1
+            return Response(status_code=429, headers={"Retry-After": str(self.config.retry_after)})
+        if draw < self.config.throttle_rate + self.config.error_rate:
+            self.stats.errors += 1
+            return Response(status_code=500)
+
+        start_time = int(request.query_params.get("start_time", 0))
+        limit = int(request.query_params.get("limit", 0)) or None
+        body, etag = self._get_body(route, start_time, limit)
+        if request.headers.get("if-none-match") == etag:
+            self.stats.not_modified += 1
+            return Response(status_code=304, headers={"ETag": etag})
+
+        self.stats.bytes_sent += len(body)
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+    def _add_routes(self, connector: Type[BaseConnector]):
+        root = urlsplit(connector.ROOT_URL).path.rstrip("/")
+        for symbol in self.config.symbols:
+            symbol_value = connector.SYMBOL_FORMAT.format(symbol=symbol.upper()) if connector.SYMBOL_PARAM else None
+            for category, endpoints in connector.ENDPOINTS_PARAMS.items():
+                for endpoint, params in endpoints.items():
+                    path = connector.PATH_TEMPLATE.format(symbol=symbol, category=category,
+                                                          endpoint=params.get("path", endpoint))
+                    _, routes = self.routes.setdefault(f"{root}/{path}", (connector.SYMBOL_PARAM, {}))
+                    routes[symbol_value] = MockRoute(provider=connector.PROVIDER, symbol=symbol, category=category,
+                                                     endpoint=endpoint)
+
+    def _resolve(self, request: Request) -> Optional[MockRoute]:
+        symbol_param, routes = self.routes.get(request.url.path, (None, {}))
+        symbol_value = request.query_params.get(symbol_param) if symbol_param else None
+        return routes.get(symbol_value)
+
+    def _get_body(self, route: MockRoute, start_time: int, limit: Optional[int]) -> Tuple[bytes, str]:
+        start_times, rows = self._get_payload(route)
+        first = bisect.bisect_left(start_times, start_time)
+        last = len(rows) if limit is None else min(len(rows), first + limit)
+
+        # Encoding dominates the server time, and repeated refreshes request the same slices
+        key = (route.provider, route.symbol, route.category, route.endpoint, first, last)
+        if key not in self._encoded:
+            body = orjson.dumps({"data": rows[first:last]})
+            self._encoded[key] = (body, f'"{hashlib.sha1(body).hexdigest()}"')
+        return self._encoded[key]
+
+    def _get_payload(self, route: MockRoute) -> Tuple[List[int], List[Dict]]:
+        key = (route.provider, route.symbol, route.category)
+        if key not in self._loaded:
+            responses = self._load_recorded(route) or self._make_responses(route)
+            for response in responses:
+                response["data"].sort(key=self._get_start_time)
+                self._payloads[key + (response["endpoint"],)] = (
+                    [self._get_start_time(row) for row in response["data"]], response["data"]
+                )
+            self._loaded.add(key)
+        return self._payloads.get(key + (route.endpoint,), ([], []))
+
+    def _load_recorded(self, route: MockRoute) -> Optional[List[Dict]]:
+        if not self.config.payload_dir:
+            return None
+        storage_category = f"{self.providers[route.provider].STORAGE_PREFIX}{route.category}"
+        filepath = os.path.join(self.config.payload_dir, get_raw_filename(route.symbol, storage_category))
+        if not os.path.exists(filepath):
+            return None
+        with open(filepath, "r") as f:
+            return json.load(f)
+
+    def _make_responses(self, route: MockRoute) -> List[Dict]:
+        connector = self.providers[route.provider]
+        if route.provider == "cryptoquant":
+            return make_responses(route.category, self.config.rows, self.config.seed)
+
+        rng = np.random.default_rng(self.config.seed)
+        start_times = START_TIME + np.arange(self.config.rows, dtype=np.int64) * DAY_MS
+        responses = []
+        for endpoint in connector.ENDPOINTS_PARAMS[route.category]:
+            values = rng.random((self.config.rows, 4)) * 1000
+            if route.provider == "glassnode":
+                data = [{"t": int(t) // 1000, "v": float(v[0])} for t, v in zip(start_times, values)]
+            else:
+                data = [{"t": int(t), "o": float(v[0]), "h": float(v[1]), "l": float(v[2]), "c": float(v[3])}
+                        for t, v in zip(start_times, values)]
+            responses.append({"endpoint": endpoint, "data": data})
+        return responses
+
+    @staticmethod
+    def _get_start_time(row: Dict) -> int:
+        if "start_time" in row:
+            return int(row["start_time"])
+        return BaseConnector._to_milliseconds(row["t"] if "t" in row else row["time"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=0.0)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--payload-dir")
+    args = parser.parse_args()
+
+    config = MockAPIConfig(latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                           throttle_rate=args.throttle_rate, retry_after=args.retry_after, rows=args.rows,
+                           payload_dir=args.payload_dir)
+    MockAPIServer(config).run(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Measure an end-to-end refresh (fetch -> store -> extract) against the local mock API server: wall time of every
+stage, requests per second, peak RSS and bytes written. Every run starts from an empty data directory.
+
+By default the mock server runs in the process behind an ASGI transport. Pass --server-url to benchmark against a
+server started with python -m benchmarks.mock_api_server instead, which includes the socket overhead.
+With --cache-dir, the runs share a response cache, so every run after the first is served from disk.
+
+Usage: python -m benchmarks.refresh_benchmark [--providers cryptoquant glassnode] [--rows 3000] [--latency 0.02]
+    [--error-rate 0.01] [--throttle-rate 0.01] [--concurrency 8] [--stream] [--repeat 3] [--output results.json]
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import List, Optional
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel
+
+from benchmarks.mock_api_server import MockAPIConfig, MockAPIServer
+from src.api_integrator.fetch_checkpoint import FetchCheckpoint
+from src.api_integrator.providers import PROVIDERS, get_connectors, fetch_providers
+from src.api_integrator.request_scheduler import RequestScheduler
+from src.api_integrator.response_cache import ResponseCache
+from src.api_integrator.watermark_store import WatermarkStore
+from src.pipeline.json_extractor import JSONExtractor
+
+# Module globals holding the data directories, redirected to a temporary directory for every run
+RAW_DATA_DIR_TARGETS = ["src.utils.utils.RAW_DATA_DIR", "src.api_integrator.base_connector.RAW_DATA_DIR",
+                        "src.pipeline.json_extractor.RAW_DATA_DIR"]
+PROCESSED_DATA_DIR_TARGETS = ["src.pipeline.json_extractor.PROCESSED_DATA_DIR"]
+
+
+class RefreshResult(BaseModel):
+    fetch_seconds: float
+    store_seconds: float
+    extract_seconds: float
+    requests: int
+    retries: int
+    failed_categories: int
+    rows: int
+    bytes_written: int
+    peak_rss_mb: float
+
+    @property
+    def total_seconds(self) -> float:
+        return self.fetch_seconds + self.store_seconds + self.extract_seconds
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.fetch_seconds if self.fetch_seconds else 0.0
+
+
+def run_refresh(server: MockAPIServer, providers: List[str], symbols: List[str], concurrency: int, rate: float,
+                stream: bool = False, server_url: Optional[str] = None,
+                cache: Optional[ResponseCache] = None) -> RefreshResult:
+    with tempfile.TemporaryDirectory() as data_dir, ExitStack() as stack:
+        raw_dir = os.path.join(data_dir, "raw")
+        processed_dir = os.path.join(data_dir, "processed")
+        for target in RAW_DATA_DIR_TARGETS:
+            stack.enter_context(patch(target, raw_dir))
+        for target in PROCESSED_DATA_DIR_TARGETS:
+            stack.enter_context(patch(target, processed_dir))
+
+        scheduler = RequestScheduler(rate_limits={PROVIDERS[provider].ROOT_URL: rate for provider in providers},
+                                     default_rate=rate)
+        connectors = get_connectors(providers, transport=None if server_url else server.transport(),
+                                    scheduler=scheduler,
+                                    watermarks=WatermarkStore(os.path.join(raw_dir, "watermarks.json")),
+                                    checkpoint=FetchCheckpoint(os.path.join(raw_dir, "checkpoints")), cache=cache)
+        if server_url:
+            for connector in connectors:
+                connector.ROOT_URL = server_url.rstrip("/") + urlsplit(connector.ROOT_URL).path
+
+        requests_before = server.stats.requests
+        started_at = time.perf_counter()
+        results = fetch_providers(connectors, symbols, max_concurrency=concurrency, resume=False, stream=stream)
+        fetched_at = time.perf_counter()
+
+        rows = 0
+        failed_categories = 0
+        connectors_by_provider = {connector.PROVIDER: connector for connector in connectors}
+        for provider, symbol_results in results.items():
+            for symbol, category_results in symbol_results.items():
+                for category, response in category_results.items():
+                    failed_categories += not response.is_success
+                    rows += sum(result.rows for result in response.endpoint_results or [] if result.is_success)
+                    if not stream and response.data:
+                        connectors_by_provider[provider].save_data(symbol, category, response.data)
+        stored_at = time.perf_counter()
+
+        # Only the CryptoQuant categories have an extraction schema
+        if "cryptoquant" in providers:
+            extractor = JSONExtractor()
+            for symbol in symbols:
+                for category in PROVIDERS["cryptoquant"].ENDPOINTS_PARAMS:
+                    extractor.extract(symbol, category)
+        extracted_at = time.perf_counter()
+
+        retries = sum(stats["retries"] for stats in scheduler.stats().values())
+        return RefreshResult(
+            fetch_seconds=fetched_at - started_at,
+            store_seconds=stored_at - fetched_at,
+            extract_seconds=extracted_at - stored_at,
+            requests=server.stats.requests - requests_before if not server_url else
+            sum(stats["requests"] for stats in scheduler.stats().values()),
+            retries=retries,
+            failed_categories=failed_categories,
+            rows=rows,
+            bytes_written=get_directory_size(data_dir),
+            peak_rss_mb=get_peak_rss_mb(),
+        )
+
+
+def get_directory_size(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, filename))
+               for root, _, filenames in os.walk(directory) for filename in filenames)
+
+
+def get_peak_rss_mb() -> float:
+    # ru_maxrss is the peak of the whole process so far, reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--providers", nargs="+", default=list(PROVIDERS.keys()), choices=list(PROVIDERS.keys()))
+    parser.add_argument("--symbols", nargs="+", default=["btc", "eth"])
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=1000.0, help="Requests per second allowed per provider")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--server-url")
+    parser.add_argument("--cache-dir", help="Share a response cache in this directory between the runs")
+    parser.add_argument("--output", help="Write the results of every run to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Log the retries and failures of the connectors")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("src").setLevel(logging.CRITICAL)
+
+    config = MockAPIConfig(latency=args.latency, error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                           rows=args.rows, symbols=args.symbols)
+    server = MockAPIServer(config)
+    cache = ResponseCache(args.cache_dir) if args.cache_dir else None
+
+    print(f"{'run':<6}{'fetch (s)':>11}{'store (s)':>11}{'extract (s)':>13}{'total (s)':>11}{'req/s':>9}"
+          f"{'retries':>9}{'failed':>8}{'rows':>10}{'written (MB)':>14}{'peak RSS (MB)':>15}")
+
+    results: List[RefreshResult] = []
+    for run in range(args.repeat):
+        result = run_refresh(server, args.providers, args.symbols, args.concurrency, args.rate, args.stream,
+                             args.server_url, cache)
+        results.append(result)
+        print(format_row(str(run + 1), result))
+
+    best = min(results, key=lambda result: result.total_seconds)
+    print(format_row("best", best))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "runs": [result.model_dump() for result in results]}, f, indent=2)
+
+
+def format_row(name: str, result: RefreshResult) -> str:
+    return (f"{name:<6}{result.fetch_seconds:>11.2f}{result.store_seconds:>11.2f}{result.extract_seconds:>13.2f}"
+            f"{result.total_seconds:>11.2f}{result.requests_per_second:>9.1f}{result.retries:>9}"
+            f"{result.failed_categories:>8}{result.rows:>10}{result.bytes_written / 2 ** 20:>14.1f}"
+            f"{result.peak_rss_mb:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
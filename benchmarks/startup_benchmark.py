@@ -0,0 +1,91 @@
+"""
+Measure the cold import time of the entry points with python -X importtime, each in a fresh interpreter, and check
+it against a budget. The heaviest imports are listed, as well as deferred modules that were loaded anyway.
+
+Entry points:
+    api    src.main, imported by the FastAPI worker
+    fetch  src.api_integrator.providers, imported by one-shot fetch jobs
+
+Usage: python -m benchmarks.startup_benchmark [--entry-points api fetch] [--repeat 5] [--top 10]
+Exits with status 1 when the best run of an entry point exceeds its budget.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+from pydantic import BaseModel
+
+ENTRY_POINTS = {"api": "src.main", "fetch": "src.api_integrator.providers"}
+# Seconds of cumulative import time allowed for each entry point
+STARTUP_BUDGETS = {"api": 1.2, "fetch": 0.8}
+# Modules only executed when a dependency that is imported lazily is actually used
+DEFERRED_MODULES = ["pandas.core.frame", "pyarrow._dataset"]
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class StartupResult(BaseModel):
+    entry_point: str
+    module: str
+    seconds: float  # Import time of the process, including the modules imported by the interpreter itself
+    imports: Dict[str, float]  # Cumulative import time of every imported module, in seconds
+    deferred_loaded: List[str]
+
+    def get_top_imports(self, count: int) -> List[tuple]:
+        return sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+def measure_startup(entry_point: str) -> StartupResult:
+    """
+    Import an entry point in a fresh interpreter with -X importtime
+    """
+    module = ENTRY_POINTS[entry_point]
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=PROJECT_DIR,
+                             capture_output=True, text=True, check=True)
+
+    imports = {}
+    seconds = 0.0
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package, indented below the module that imported it
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        imports[name.strip()] = int(cumulative) / 10 ** 6
+        if not name[1:].startswith(" "):
+            seconds += imports[name.strip()]
+
+    return StartupResult(entry_point=entry_point, module=module, seconds=seconds, imports=imports,
+                         deferred_loaded=[name for name in DEFERRED_MODULES if name in imports])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entry-points", nargs="+", default=list(ENTRY_POINTS.keys()),
+                        choices=list(ENTRY_POINTS.keys()))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    exceeded = False
+    for entry_point in args.entry_points:
+        # The first run also warms the bytecode and file system caches, so the best run is compared to the budget
+        best = min((measure_startup(entry_point) for _ in range(args.repeat)), key=lambda result: result.seconds)
+        budget = STARTUP_BUDGETS[entry_point]
+        exceeded = exceeded or best.seconds > budget
+
+        print(f"{entry_point} ({best.module}): {best.seconds:.3f}s, budget {budget:.3f}s"
+              + ("" if best.seconds <= budget else " EXCEEDED"))
+        if best.deferred_loaded:
+            print(f"  deferred modules loaded at import: {', '.join(best.deferred_loaded)}")
+        for name, seconds in best.get_top_imports(args.top):
+            print(f"  {name:<50}{seconds:>8.3f}s")
+
+    sys.exit(1 if exceeded else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ LOG_DIR = BASE_DIR / "logs"
 API_LOG_DIR = LOG_DIR / "api_integrator"
 ETL_LOG_DIR = LOG_DIR / "etl"
 MODEL_LOG_DIR = LOG_DIR / "models"
+PROFILE_LOG_DIR = LOG_DIR / "profiles"
 
 # Models directory
 MODEL_DIR = BASE_DIR / "models"
@@ -26,6 +27,7 @@ DIRECTORIES = [
     API_LOG_DIR,
     ETL_LOG_DIR,
     MODEL_LOG_DIR,
+    PROFILE_LOG_DIR,
     MODEL_DIR,
     REGIME_DETECTION_MODEL_DIR,
     TRADING_MODEL_DIR,
@@ -33,8 +35,10 @@ DIRECTORIES = [
 ]
 
 def create_directories():
+    """
+    Create every project directory. Not run at import, so that importing the configuration touches no files.
+    Writers create the directory they write into when it is missing.
+    """
     for directory in DIRECTORIES:
         directory.mkdir(parents=True, exist_ok=True)
 
-create_directories()
-
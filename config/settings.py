@@ -16,4 +16,53 @@ COINGLASS_API_URL = "https://api.datasource.cybotrade.rs/coinglass"
 
 # Data settings
 DATE_INTERVAL = 7
-DEFAULT_RESPONSE_LIMIT = 10000
\ No newline at end of file
+DEFAULT_RESPONSE_LIMIT = 10000
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "parquet")  # "parquet", "sqlite" or "json"
+
+# Fetch settings
+REQUEST_TIMEOUT = 30
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", 8))
+STREAM_BATCH_SIZE = 1000
+
+# Rate limit settings, in requests per second per API
+API_RATE_LIMITS = {
+    CRYPTOQUANT_API_URL: float(os.getenv("CRYPTOQUANT_RATE_LIMIT", 10)),
+    GLASSNODE_API_URL: float(os.getenv("GLASSNODE_RATE_LIMIT", 10)),
+    COINGLASS_API_URL: float(os.getenv("COINGLASS_RATE_LIMIT", 10)),
+}
+DEFAULT_RATE_LIMIT = 5
+MAX_RETRIES = 5
+RETRY_BACKOFF_BASE = 0.5
+RETRY_BACKOFF_MAX = 30
+
+# Checkpoints of partially fetched categories older than this (in seconds) are discarded
+FETCH_CHECKPOINT_MAX_AGE = 24 * 60 * 60
+
+# Ingestion settings
+INGESTION_ENABLED = os.getenv("INGESTION_ENABLED", "false").lower() == "true"
+INGESTION_SYMBOLS = os.getenv("INGESTION_SYMBOLS", "btc,eth").split(",")
+WINDOW_SECONDS = {"min": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+INGESTION_DELAY = 5 * 60  # Seconds to wait after a window closes, so that the provider has published it
+
+# Data validation settings
+VALIDATION_ENABLED = os.getenv("VALIDATION_ENABLED", "true").lower() == "true"
+# Checks whose errors reject an endpoint batch, the others are only reported
+VALIDATION_REJECT_CHECKS = os.getenv("VALIDATION_REJECT_CHECKS", "schema,duplicates,values").split(",")
+VALIDATION_OUTLIER_THRESHOLD = 10.0  # Standard deviations of the change between consecutive rows
+VALIDATION_OUTLIER_SPAN = 90  # Rows of the exponentially weighted statistics of the changes
+VALIDATION_MIN_HISTORY = 30  # Changes seen before outliers are checked
+
+# HTTP response cache settings
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "false").lower() == "true"
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# Seconds a cached response stays fresh, keyed by category or by window. Categories take precedence.
+HTTP_CACHE_TTLS = {"min": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+HTTP_CACHE_COMPRESSION_LEVEL = 3
+
+# Instrumentation settings
+METRICS_NAMESPACE = "crypto_trading_bot"
+PROFILE_PIPELINE = os.getenv("PROFILE_PIPELINE", "false").lower() == "true"  # cProfile every pipeline run
+
+# Backtest settings
+BACKTEST_FEE_RATE = 0.001  # Fee per unit of position traded
+BACKTEST_PERIODS_PER_YEAR = 365  # Daily bars of a market that trades every day
@@ -14,10 +14,15 @@ setup(
         "fastapi>=0.68.0",
         "uvicorn>=0.15.0",
         "requests==2.32.0",
+        "httpx>=0.24.0",
 
         # Data Processing
         "pandas>=1.3.0",
         "numpy>=1.21.0",
+        "pyarrow>=14.0.0",
+        "ijson>=3.1",
+        "orjson>=3.9.0",
+        "zstandard>=0.21.0",
 
         # Machine Learning
         "scikit-learn>=1.0.0",
@@ -30,7 +35,7 @@ setup(
         "pymongo>=4.0.0",  # MongoDB
 
         # Data providers
-        "cybotrade>=1.5.0"
+        "cybotrade>=1.5.0",
 
         # Environment variables
         "python-dotenv>=0.19.0",
@@ -59,7 +64,8 @@ setup(
     },
     entry_points={
         "console_scripts": [
-            "crypto-trading-ml=app.main:main",
+            "crypto-trading-ml=src.main:main",
+            "ctb=src.cli:main",
         ],
     },
 )
\ No newline at end of file
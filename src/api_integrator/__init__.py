@@ -1 +1,5 @@
-from cybotrade_connector import CybotradeConnector
\ No newline at end of file
+from src.api_integrator.base_connector import BaseConnector
+from src.api_integrator.cryptoquant_connector import CryptoQuantConnector
+from src.api_integrator.glassnode_connector import GlassnodeConnector
+from src.api_integrator.coinglass_connector import CoinglassConnector
+from src.api_integrator.providers import PROVIDERS, get_connectors, fetch_providers
@@ -0,0 +1,488 @@
+import os
+import asyncio
+import httpx
+import requests
+import logging
+import time
+from datetime import datetime
+from typing import List, Dict, Optional, Union
+
+from config.settings import DEFAULT_RESPONSE_LIMIT, REQUEST_TIMEOUT, MAX_CONCURRENT_REQUESTS, STORAGE_BACKEND, \
+    STREAM_BATCH_SIZE, HTTP_CACHE_ENABLED, VALIDATION_ENABLED
+from config.paths import RAW_DATA_DIR
+from src.utils.utils import get_start_time, convert_datetime_to_unix_timestamp, save_responses, raw_data_exists
+from src.models.response_model import ResponseModel, EndpointResult, ValidationIssue
+from src.models.endpoint_series import EndpointSeries
+from src.api_integrator.watermark_store import WatermarkStore
+from src.api_integrator.request_scheduler import RequestScheduler, get_scheduler
+from src.api_integrator.fetch_checkpoint import FetchCheckpoint
+from src.api_integrator.http_transport import HTTPTransport
+from src.api_integrator.response_cache import ResponseCache
+from src.storage.columnar_store import ColumnarStore, ColumnarBatchWriter
+from src.pipeline.data_validator import DataValidator, RejectedDataError, ValidationState, parse_frequency
+from src.utils.stream_decoder import JSONArrayStreamDecoder
+from src.utils.instrumentation import get_metrics, profile_run
+
+logger = logging.getLogger(__name__)
+
+class BaseConnector:
+    """
+    Fetch the endpoints of a data provider declared in ENDPOINTS_PARAMS. Subclasses only declare their catalog and how
+    its URLs are built, the request loop, error handling, checkpoints, watermarks and storage are shared.
+
+    ENDPOINTS_PARAMS maps each category to its endpoints and their query parameters. The reserved "path" parameter
+    replaces the endpoint name in the URL when the provider path is not a valid storage name.
+    """
+
+    PROVIDER = ""
+    ROOT_URL = ""
+    # Path of an endpoint below ROOT_URL
+    PATH_TEMPLATE = "{symbol}/{category}/{endpoint}"
+    # Query parameter carrying the symbol, for providers that do not have it in the path
+    SYMBOL_PARAM: Optional[str] = None
+    SYMBOL_FORMAT = "{symbol}"
+    # Prepended to the categories in the raw store, the watermarks and the checkpoints to keep providers apart
+    STORAGE_PREFIX = ""
+    LIMIT = DEFAULT_RESPONSE_LIMIT
+    HISTORY_DAYS = 10000
+    SYMBOLS = ["btc", "eth"]
+    ENDPOINTS_PARAMS: Dict[str, Dict[str, Dict[str, str]]] = {}
+    # Query parameter holding the interval between two rows of an endpoint, e.g. window=day
+    FREQUENCY_PARAM = "window"
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 watermarks: Optional[WatermarkStore] = None, scheduler: Optional[RequestScheduler] = None,
+                 checkpoint: Optional[FetchCheckpoint] = None, cache: Optional[ResponseCache] = None,
+                 validator: Optional[DataValidator] = None):
+        """
+        :param cache: Response cache of the async fetches, defaults to a ResponseCache if HTTP_CACHE_ENABLED is set
+        :param validator: Validator of the fetched rows, defaults to a DataValidator with its state next to the
+            watermarks if VALIDATION_ENABLED is set
+        """
+        self.api_key = os.getenv("CYBOTRADE_API_KEY")
+        self.headers = {"X-API-Key" : self.api_key }
+        self.transport = transport
+        self.watermarks = watermarks or WatermarkStore()
+        self.scheduler = scheduler or get_scheduler()
+        self.checkpoint = checkpoint or FetchCheckpoint()
+        self.cache = cache or (ResponseCache() if HTTP_CACHE_ENABLED else None)
+        self.validator = validator
+        if validator is None and VALIDATION_ENABLED:
+            state_filepath = os.path.join(os.path.dirname(self.watermarks.filepath), ValidationState.FILENAME)
+            self.validator = DataValidator(ValidationState(state_filepath))
+
+    def fetch_data(self, symbol: str, category: str, incremental: bool = False, resume: bool = True) -> ResponseModel:
+        curr_timestamp = convert_datetime_to_unix_timestamp(datetime.now())
+        logger.info(f"Current timestamp: {curr_timestamp}")
+
+        if category not in self.ENDPOINTS_PARAMS.keys():
+            error_message = "The API call does not fall belong a valid category"
+            logger.error(error_message)
+            return ResponseModel(is_success=False, message=error_message, data=None)
+
+        responses, results = self._load_checkpoint(symbol, category, resume)
+        completed = {response.endpoint for response in responses}
+
+        for endpoint, params in self.ENDPOINTS_PARAMS[category].items():
+            if endpoint in completed:
+                continue
+
+            start_time = self._get_endpoint_start_time(symbol, category, endpoint, incremental)
+            url = self._parse_endpoint_url(symbol, category, endpoint, params, start_time)
+
+            labels = self._get_metric_labels(category, endpoint)
+            try:
+                with get_metrics().span("connector_request", **labels):
+                    api_response = self.scheduler.request_sync("GET", url, headers=self.headers,
+                                                               timeout=REQUEST_TIMEOUT)
+                api_response.raise_for_status()
+                with get_metrics().span("connector_decode", **labels):
+                    data = api_response.json()["data"]
+                self._record_response(labels, len(api_response.content), len(data) if data else 0)
+
+                if not data:
+                    error_msg = "Failed to retrieve data. The data is empty. Please check the endpoint URL."
+                    results.append(self._endpoint_failure(symbol, category, endpoint, error_msg))
+                    continue
+
+                responses.append(EndpointSeries.from_rows(endpoint, self._normalize_rows(endpoint, data)))
+                results.append(EndpointResult(endpoint=endpoint, is_success=True, rows=len(data)))
+
+            except requests.exceptions.HTTPError as http_err:
+                results.append(self._endpoint_failure(symbol, category, endpoint,
+                                                      f"HTTP Error occurred: {http_err}"))
+
+            except requests.exceptions.ConnectionError as conn_err:
+                results.append(self._endpoint_failure(symbol, category, endpoint,
+                                                      f"Connection Error occurred: {conn_err}"))
+
+            except requests.exceptions.Timeout as timeout_err:
+                results.append(self._endpoint_failure(symbol, category, endpoint,
+                                                      f"Connection Timeout: {timeout_err}"))
+
+            except requests.exceptions.JSONDecodeError as json_err:
+                results.append(self._endpoint_failure(symbol, category, endpoint,
+                                                      f"Error while parsing JSON: {json_err}"))
+
+            except requests.exceptions.RequestException as err:
+                results.append(self._endpoint_failure(symbol, category, endpoint, f"Error occurred: {err}"))
+
+        return self._build_response(symbol, category, responses, results)
+
+    def fetch_all(self, symbols: Optional[List[str]] = None, categories: Optional[List[str]] = None,
+                  max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+                  incremental: bool = False, resume: bool = True,
+                  stream: bool = False) -> Dict[str, Dict[str, ResponseModel]]:
+        """
+        Fetch every endpoint of the given symbols and categories concurrently.
+        :param symbols: Symbols to fetch, defaults to all SYMBOLS
+        :param categories: Categories to fetch, defaults to all categories in ENDPOINTS_PARAMS
+        :param max_concurrency: Maximum number of requests in flight at the same time
+        :param incremental: Only request rows from the stored watermark of each endpoint onwards
+        :param resume: Only fetch the endpoints that failed in the previous attempt of a category
+        :param stream: Decode the responses incrementally and write the rows straight into the raw store in batches
+            of STREAM_BATCH_SIZE. The returned responses then carry no rows, only their counts in endpoint_results.
+        :return: ResponseModel per category, keyed by symbol and then category
+        """
+        with profile_run(f"{self.PROVIDER}-fetch"):
+            return asyncio.run(self.fetch_all_async(symbols, categories, max_concurrency, incremental, resume,
+                                                    stream))
+
+    async def fetch_all_async(self, symbols: Optional[List[str]] = None, categories: Optional[List[str]] = None,
+                              max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+                              incremental: bool = False, resume: bool = True,
+                              stream: bool = False) -> Dict[str, Dict[str, ResponseModel]]:
+        async with self.open_transport(max_concurrency, stream) as transport:
+            return await self.fetch_all_with_transport(transport, symbols, categories, incremental, resume, stream)
+
+    def open_transport(self, max_concurrency: int = MAX_CONCURRENT_REQUESTS, stream: bool = False) -> HTTPTransport:
+        """
+        Transport over the scheduler, the underlying transport and the cache of this connector. get_connectors shares
+        them across all connectors, so the transport of any of them can serve all of them.
+        :param max_concurrency: Maximum number of requests in flight at the same time
+        :param stream: Whether the fetches on the transport stream into the raw store
+        :return: Transport to open with async with
+        """
+        if stream and STORAGE_BACKEND != "parquet":
+            raise ValueError("Streaming fetches require the parquet storage backend")
+        return HTTPTransport(max_concurrency, self.scheduler, self.headers, self.transport, self.cache)
+
+    async def fetch_all_with_transport(self, transport: HTTPTransport, symbols: Optional[List[str]] = None,
+                                       categories: Optional[List[str]] = None, incremental: bool = False,
+                                       resume: bool = True, stream: bool = False) -> Dict[str, Dict[str, ResponseModel]]:
+        """
+        Same as fetch_all_async, on a transport opened by the caller with open_transport, so that several connectors
+        can share it
+        """
+        symbols = symbols or self.SYMBOLS
+        categories = categories or list(self.ENDPOINTS_PARAMS.keys())
+
+        # Every endpoint request across all symbols and categories shares the connection pool and semaphore of the
+        # transport, so the concurrency limit applies to the whole refresh rather than to a single category.
+        tasks = {
+            (symbol, category): asyncio.create_task(
+                self.fetch_data_async(transport, symbol, category, incremental, resume, stream)
+            )
+            for symbol in symbols
+            for category in categories
+        }
+        await asyncio.gather(*tasks.values())
+
+        if stream:
+            self.save_stream_state()
+
+        results: Dict[str, Dict[str, ResponseModel]] = {}
+        for (symbol, category), task in tasks.items():
+            results.setdefault(symbol, {})[category] = task.result()
+        return results
+
+    async def fetch_data_async(self, transport: HTTPTransport, symbol: str, category: str,
+                               incremental: bool = False, resume: bool = True, stream: bool = False) -> ResponseModel:
+        if category not in self.ENDPOINTS_PARAMS.keys():
+            error_message = "The API call does not fall belong a valid category"
+            logger.error(error_message)
+            return ResponseModel(is_success=False, message=error_message, data=None)
+
+        # Checkpoint and store IO, decoding and validation run in threads to keep the event loop free for requests
+        responses, results = await asyncio.to_thread(self._load_checkpoint, symbol, category, resume)
+        completed = {response.endpoint for response in responses}
+
+        endpoints = [(endpoint, params) for endpoint, params in self.ENDPOINTS_PARAMS[category].items()
+                     if endpoint not in completed]
+        fetch_endpoint = self._stream_endpoint_async if stream else self._fetch_endpoint_async
+        endpoint_data = await asyncio.gather(
+            *[fetch_endpoint(transport, symbol, category, endpoint, params,
+                             self._get_endpoint_start_time(symbol, category, endpoint, incremental))
+              for endpoint, params in endpoints],
+            return_exceptions=True
+        )
+
+        for (endpoint, _), data in zip(endpoints, endpoint_data):
+            if isinstance(data, BaseException):
+                results.append(self._endpoint_failure(symbol, category, endpoint,
+                                                      self._get_async_error_message(data)))
+                continue
+
+            if not data:
+                error_msg = "Failed to retrieve data. The data is empty. Please check the endpoint URL."
+                results.append(self._endpoint_failure(symbol, category, endpoint, error_msg))
+                continue
+
+            if stream:
+                # The rows are already in the raw store, only the number of rows written is returned
+                responses.append(EndpointSeries.from_rows(endpoint, []))
+                results.append(EndpointResult(endpoint=endpoint, is_success=True, rows=data))
+            else:
+                responses.append(data)
+                results.append(EndpointResult(endpoint=endpoint, is_success=True, rows=len(data)))
+
+        return await asyncio.to_thread(self._build_response, symbol, category, responses, results)
+
+    async def _fetch_endpoint_async(self, transport: HTTPTransport, symbol: str, category: str, endpoint: str,
+                                    params: Dict[str, str],
+                                    start_time: Optional[int] = None) -> Optional[EndpointSeries]:
+        url = self._parse_endpoint_url(symbol, category, endpoint, params, start_time)
+        labels = self._get_metric_labels(category, endpoint)
+
+        async with transport.semaphore:
+            with get_metrics().span("connector_request", **labels):
+                api_response = await transport.get(url)
+            api_response.raise_for_status()
+        return await asyncio.to_thread(self._decode_response, api_response, endpoint, labels)
+
+    def _decode_response(self, api_response: httpx.Response, endpoint: str,
+                         labels: Dict[str, str]) -> Optional[EndpointSeries]:
+        with get_metrics().span("connector_decode", **labels):
+            data = api_response.json()["data"]
+        self._record_response(labels, len(api_response.content), len(data) if data else 0)
+        # The rows are only held until they are converted into columns
+        return EndpointSeries.from_rows(endpoint, self._normalize_rows(endpoint, data)) if data else None
+
+    async def _stream_endpoint_async(self, transport: HTTPTransport, symbol: str, category: str, endpoint: str,
+                                     params: Dict[str, str], start_time: Optional[int] = None) -> int:
+        url = self._parse_endpoint_url(symbol, category, endpoint, params, start_time)
+        storage_category = self._get_storage_category(category)
+        writer = ColumnarBatchWriter(ColumnarStore(RAW_DATA_DIR), symbol, storage_category, endpoint,
+                                     STREAM_BATCH_SIZE)
+        decoder = JSONArrayStreamDecoder("data.item")
+        labels = self._get_metric_labels(category, endpoint)
+        received_bytes = 0
+        decode_time = 0.0
+
+        async with transport.semaphore:
+            with get_metrics().span("connector_request", **labels):
+                api_response = await transport.get(url, stream=True)
+            try:
+                api_response.raise_for_status()
+                async for chunk in api_response.aiter_bytes():
+                    received_bytes += len(chunk)
+                    decoded_at = time.perf_counter()
+                    rows = self._normalize_rows(endpoint, decoder.feed(chunk))
+                    decode_time += time.perf_counter() - decoded_at
+                    await self._write_rows(writer, symbol, category, rows)
+                await self._write_rows(writer, symbol, category, self._normalize_rows(endpoint, decoder.close()))
+            finally:
+                await api_response.aclose()
+
+        await asyncio.to_thread(self._flush_batch, writer, symbol, category)
+        get_metrics().observe("connector_decode_seconds", decode_time, **labels)
+        self._record_response(labels, received_bytes, writer.rows)
+        if writer.latest_start_time is not None:
+            self.watermarks.update(symbol, storage_category, endpoint, writer.latest_start_time)
+        return writer.rows
+
+    async def _write_rows(self, writer: ColumnarBatchWriter, symbol: str, category: str, rows: List[Dict]):
+        for row in rows:
+            if writer.append(row):
+                # Parquet writes are blocking, so they are moved off the event loop
+                await asyncio.to_thread(self._flush_batch, writer, symbol, category)
+
+    def _flush_batch(self, writer: ColumnarBatchWriter, symbol: str, category: str):
+        # Streamed rows skip save_data, so every batch is validated here before it reaches the store
+        series = writer.to_series() if self.validator is not None else None
+        if series is not None and len(series):
+            validation = self.validate_data(symbol, category, [series])
+            # The columns check needs every endpoint of the category, a batch only holds one of them
+            issues = [issue for issue in validation.issues if issue.check != "columns"]
+            rejected = self._record_issues(symbol, category, issues)
+            if rejected:
+                raise RejectedDataError(
+                    f"Invalid data: {'; '.join(message for messages in rejected.values() for message in messages)}")
+
+        writer.flush()
+        if series is not None:
+            self.validator.update(symbol, writer.category, [series])
+
+    def save_stream_state(self):
+        """
+        Persist the watermarks and the validation state advanced by streamed fetches
+        """
+        self.watermarks.save()
+        if self.validator is not None:
+            self.validator.state.save()
+
+    def _normalize_rows(self, endpoint: str, rows: List[Dict]) -> List[Dict]:
+        """
+        Convert the rows of a provider into the stored row format, which carries a start_time in milliseconds.
+        Rows of the Cybotrade API already have it, so they are returned unchanged.
+        """
+        return rows
+
+    def _load_checkpoint(self, symbol: str, category: str, resume: bool):
+        storage_category = self._get_storage_category(category)
+        if not resume:
+            self.checkpoint.clear(symbol, storage_category)
+            return [], []
+
+        responses = self.checkpoint.load(symbol, storage_category)
+        if responses:
+            logger.info(f"Resuming {symbol}/{storage_category} with {len(responses)} endpoints from checkpoint")
+
+        results = [EndpointResult(endpoint=response.endpoint, is_success=True, rows=len(response),
+                                  message="Loaded from checkpoint") for response in responses]
+        return responses, results
+
+    def _build_response(self, symbol: str, category: str, responses: List[EndpointSeries],
+                        results: List[EndpointResult]) -> ResponseModel:
+        storage_category = self._get_storage_category(category)
+        responses, results, issues = self._validate_responses(symbol, category, responses, results)
+        failed = [result for result in results if not result.is_success]
+
+        if not failed:
+            self.checkpoint.clear(symbol, storage_category)
+            return ResponseModel(is_success=True, message=None, data=responses, endpoint_results=results,
+                                 issues=issues)
+
+        # Keep the completed endpoints, so that the next attempt only fetches the failed ones
+        self.checkpoint.save(symbol, storage_category, responses)
+        error_msg = (f"Failed to fetch {len(failed)} of {len(results)} endpoints: "
+                     + ", ".join(result.endpoint for result in failed))
+        return ResponseModel(is_success=False, message=error_msg, data=responses, endpoint_results=results,
+                             issues=issues)
+
+    def validate_data(self, symbol: str, category: str, responses: List[EndpointSeries]) -> ResponseModel:
+        """
+        Validate fetched responses against the schema, the endpoint frequencies and the history, see DataValidator
+        :return: ResponseModel with the responses that passed and the issues found
+        """
+        if self.validator is None:
+            return ResponseModel(is_success=True, message=None, data=responses, issues=[])
+
+        frequencies = {endpoint: parse_frequency(params.get(self.FREQUENCY_PARAM))
+                       for endpoint, params in self.ENDPOINTS_PARAMS[category].items()}
+        return self.validator.validate(symbol, self._get_storage_category(category), responses, frequencies)
+
+    def _validate_responses(self, symbol: str, category: str, responses: List[EndpointSeries],
+                            results: List[EndpointResult]):
+        # Rejected endpoints fail like a failed request, so they are refetched instead of reaching the store
+        validation = self.validate_data(symbol, category, responses)
+        rejected = self._record_issues(symbol, category, validation.issues)
+        results = [self._endpoint_failure(symbol, category, result.endpoint,
+                                          f"Invalid data: {'; '.join(rejected[result.endpoint])}")
+                   if result.endpoint in rejected else result for result in results]
+        return validation.data, results, validation.issues
+
+    def _record_issues(self, symbol: str, category: str,
+                       issues: List[ValidationIssue]) -> Dict[Optional[str], List[str]]:
+        """
+        Count and log validation issues
+        :return: Messages of the errors keyed by endpoint
+        """
+        storage_category = self._get_storage_category(category)
+        rejected: Dict[Optional[str], List[str]] = {}
+        for issue in issues:
+            get_metrics().inc("validation_issues", provider=self.PROVIDER, category=category, check=issue.check,
+                              severity=issue.severity)
+            if issue.severity == "error":
+                rejected.setdefault(issue.endpoint, []).append(issue.message)
+            else:
+                logger.warning(f"{symbol}/{storage_category}/{issue.endpoint or '*'}: {issue.message}")
+        return rejected
+
+    def _endpoint_failure(self, symbol: str, category: str, endpoint: str, error_msg: str) -> EndpointResult:
+        get_metrics().inc("connector_failures", **self._get_metric_labels(category, endpoint))
+        logger.error(f"{symbol}/{self._get_storage_category(category)}/{endpoint}: {error_msg}")
+        return EndpointResult(endpoint=endpoint, is_success=False, message=error_msg)
+
+    @staticmethod
+    def _get_async_error_message(err: BaseException) -> str:
+        if isinstance(err, httpx.HTTPStatusError):
+            return f"HTTP Error occurred: {err}"
+        if isinstance(err, httpx.ConnectError):
+            return f"Connection Error occurred: {err}"
+        if isinstance(err, httpx.TimeoutException):
+            return f"Connection Timeout: {err}"
+        if isinstance(err, RejectedDataError):
+            return str(err)
+        if isinstance(err, (ValueError, KeyError)):
+            return f"Error while parsing JSON: {err}"
+        return f"Error occurred: {err}"
+
+
+    def save_data(self, symbol: str, category: str, responses: List[Union[EndpointSeries, Dict]]) -> bool:
+        """
+        Merge fetched responses into the raw store of the category and advance the endpoint watermarks.
+        Rows that overlap with the stored rows are deduplicated on start_time.
+        :param symbol: Symbol of the responses
+        :param category: Category of the responses
+        :param responses: Series of ResponseModel.data, or responses in the row format
+        :return: True if the responses have been saved
+        """
+        storage_category = self._get_storage_category(category)
+        responses = [EndpointSeries.from_response(response) for response in responses]
+        if not save_responses(responses, symbol, storage_category):
+            return False
+
+        for response in responses:
+            if len(response):
+                self.watermarks.update(symbol, storage_category, response.endpoint, response.latest_start_time)
+        self.watermarks.save()
+        if self.validator is not None:
+            self.validator.update(symbol, storage_category, responses)
+            self.validator.state.save()
+        return True
+
+    def _get_metric_labels(self, category: str, endpoint: str) -> Dict[str, str]:
+        return {"provider": self.PROVIDER, "category": category, "endpoint": endpoint}
+
+    @staticmethod
+    def _record_response(labels: Dict[str, str], size: int, rows: int):
+        metrics = get_metrics()
+        metrics.inc("connector_response_bytes", size, **labels)
+        metrics.inc("connector_rows", rows, **labels)
+
+    def _get_storage_category(self, category: str) -> str:
+        return f"{self.STORAGE_PREFIX}{category}"
+
+    def _get_endpoint_start_time(self, symbol: str, category: str, endpoint: str, incremental: bool) -> int:
+        storage_category = self._get_storage_category(category)
+        # The stored watermark is only valid as long as the raw data it describes still exists
+        if incremental and raw_data_exists(symbol, storage_category):
+            watermark = self.watermarks.get(symbol, storage_category, endpoint)
+            if watermark is not None:
+                return watermark
+        return get_start_time(self.HISTORY_DAYS)
+
+    def _parse_endpoint_url(self, symbol: str, category: str, endpoint: str, params: Dict[str, str],
+                            start_time: Optional[int] = None) -> str:
+        if start_time is None:
+            start_time = get_start_time(self.HISTORY_DAYS)
+
+        params = dict(params)
+        path = self.PATH_TEMPLATE.format(symbol=symbol, category=category, endpoint=params.pop("path", endpoint))
+        url = f"{self.ROOT_URL}/{path}?start_time={start_time}&limit={self.LIMIT}"
+
+        if self.SYMBOL_PARAM:
+            url += f"&{self.SYMBOL_PARAM}={self.SYMBOL_FORMAT.format(symbol=symbol.upper())}"
+
+        for key, value in params.items():
+            url += f"&{key}={value}"
+
+        logger.debug(f"Endpoint URL: {url}")
+        return url
+
+    @staticmethod
+    def _to_milliseconds(timestamp: float) -> int:
+        # Providers return either Unix seconds or milliseconds
+        timestamp = int(timestamp)
+        return timestamp * 1000 if timestamp < 10 ** 11 else timestamp
@@ -0,0 +1,43 @@
+import logging
+from typing import Dict, List
+
+from config.settings import COINGLASS_API_URL
+from src.api_integrator.base_connector import BaseConnector
+
+logger = logging.getLogger(__name__)
+
+class CoinglassConnector(BaseConnector):
+
+    PROVIDER = "coinglass"
+    ROOT_URL = str(COINGLASS_API_URL)
+    PATH_TEMPLATE = "{category}/{endpoint}"
+    SYMBOL_PARAM = "symbol"
+    SYMBOL_FORMAT = "{symbol}USDT"
+    FREQUENCY_PARAM = "interval"
+    STORAGE_PREFIX = "coinglass-"
+    ENDPOINTS_PARAMS = {
+        "futures": {
+            "open-interest": { "path": "openInterest/ohlc-history", "exchange": "Binance", "interval": "1d" },
+            "funding-rate": { "path": "fundingRate/ohlc-history", "exchange": "Binance", "interval": "1d" },
+            "long-short-account-ratio": {
+                "path": "globalLongShortAccountRatio/history", "exchange": "Binance", "interval": "1d"
+            },
+            "liquidation": { "path": "liquidation/v2/history", "exchange": "Binance", "interval": "1d" }
+        }
+    }
+
+    def _normalize_rows(self, endpoint: str, rows: List[Dict]) -> List[Dict]:
+        # Native Coinglass rows hold the time under "t" or "time". Several endpoints share the o/h/l/c field names,
+        # so the fields are prefixed with the endpoint to keep them apart once a category is merged.
+        prefix = endpoint.replace("-", "_")
+        normalized = []
+        for row in rows:
+            if "start_time" in row:
+                normalized.append(row)
+                continue
+
+            timestamp = row["t"] if "t" in row else row["time"]
+            item = {"start_time": self._to_milliseconds(timestamp)}
+            item.update({f"{prefix}_{key}": value for key, value in row.items() if key not in ("t", "time")})
+            normalized.append(item)
+        return normalized
@@ -0,0 +1,82 @@
+import json
+import os
+import logging
+import time
+from typing import Dict, List, Optional
+
+from config.paths import RAW_DATA_DIR
+from config.settings import FETCH_CHECKPOINT_MAX_AGE
+from src.models.endpoint_series import EndpointSeries
+
+logger = logging.getLogger(__name__)
+
+class FetchCheckpoint:
+    """
+    Keep the endpoint responses of a partially fetched category, so that a retry only fetches the failed endpoints.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_age: float = FETCH_CHECKPOINT_MAX_AGE):
+        self.directory = directory or os.path.join(RAW_DATA_DIR, "checkpoints")
+        self.max_age = max_age
+
+    def load(self, symbol: str, category: str) -> List[EndpointSeries]:
+        """
+        Load the completed endpoint responses of a category. An expired checkpoint is deleted.
+        :return: Completed responses, or an empty list if there is no valid checkpoint
+        """
+        checkpoint = self._read(symbol, category)
+        if checkpoint is None:
+            return []
+
+        if self._is_expired(checkpoint):
+            logger.info(f"Discarding expired checkpoint {self._get_filepath(symbol, category)}")
+            self.clear(symbol, category)
+            return []
+
+        # Checkpoints written before the columnar format hold rows
+        return [EndpointSeries.from_dict(response) if "columns" in response else EndpointSeries.from_response(response)
+                for response in checkpoint["responses"]]
+
+    def peek(self, symbol: str, category: str) -> List[str]:
+        """
+        List the completed endpoints of a category without decoding their responses or deleting an expired
+        checkpoint, e.g. to plan a fetch
+        :return: Completed endpoints, or an empty list if there is no valid checkpoint
+        """
+        checkpoint = self._read(symbol, category)
+        if checkpoint is None or self._is_expired(checkpoint):
+            return []
+        return [response["endpoint"] for response in checkpoint["responses"]]
+
+    def save(self, symbol: str, category: str, responses: List[EndpointSeries]):
+        os.makedirs(self.directory, exist_ok=True)
+        filepath = self._get_filepath(symbol, category)
+
+        try:
+            with open(filepath, "w") as f:
+                json.dump({"saved_at": time.time(), "responses": [response.to_dict() for response in responses]}, f)
+        except IOError as e:
+            logger.error(f"Error saving checkpoint to {filepath}: {e}")
+
+    def clear(self, symbol: str, category: str):
+        filepath = self._get_filepath(symbol, category)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+    def _read(self, symbol: str, category: str) -> Optional[Dict]:
+        filepath = self._get_filepath(symbol, category)
+        if not os.path.exists(filepath):
+            return None
+
+        try:
+            with open(filepath, "r") as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logger.error(f"Error loading checkpoint from {filepath}: {e}")
+            return None
+
+    def _is_expired(self, checkpoint: Dict) -> bool:
+        return time.time() - checkpoint["saved_at"] > self.max_age
+
+    def _get_filepath(self, symbol: str, category: str) -> str:
+        return os.path.join(self.directory, f"{symbol}-{category}.json")
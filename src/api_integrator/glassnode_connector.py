@@ -0,0 +1,60 @@
+import logging
+from typing import Dict, List
+
+from config.settings import GLASSNODE_API_URL
+from src.api_integrator.base_connector import BaseConnector
+
+logger = logging.getLogger(__name__)
+
+class GlassnodeConnector(BaseConnector):
+
+    PROVIDER = "glassnode"
+    ROOT_URL = str(GLASSNODE_API_URL)
+    PATH_TEMPLATE = "{category}/{endpoint}"
+    SYMBOL_PARAM = "a"
+    FREQUENCY_PARAM = "i"
+    STORAGE_PREFIX = "glassnode-"
+    ENDPOINTS_PARAMS = {
+        "market": {
+            "price_usd_close": { "i": "24h" },
+            "marketcap_usd": { "i": "24h" },
+            "mvrv_z_score": { "i": "24h" }
+        },
+        "indicators": {
+            "sopr": { "i": "24h" },  # Spent Output Profit Ratio
+            "puell_multiple": { "i": "24h" },
+            "net_unrealized_profit_loss": { "i": "24h" },
+            "reserve_risk": { "i": "24h" }
+        },
+        "addresses": {
+            "active_count": { "i": "24h" },
+            "new_non_zero_count": { "i": "24h" },
+            "sending_count": { "i": "24h" },
+            "receiving_count": { "i": "24h" }
+        },
+        "transactions": {
+            "count": { "i": "24h" },
+            "transfers_volume_sum": { "i": "24h" }
+        },
+        "supply": {
+            "current": { "i": "24h" },
+            "active_more_1y_percent": { "i": "24h" }
+        }
+    }
+
+    def _normalize_rows(self, endpoint: str, rows: List[Dict]) -> List[Dict]:
+        # Native Glassnode rows hold the Unix time in seconds under "t" and the value under "v",
+        # or a dict of values under "o" for metrics with several series
+        normalized = []
+        for row in rows:
+            if "start_time" in row:
+                normalized.append(row)
+                continue
+
+            item = {"start_time": self._to_milliseconds(row["t"])}
+            if isinstance(row.get("o"), dict):
+                item.update({f"{endpoint}_{key}": value for key, value in row["o"].items()})
+            else:
+                item[endpoint] = row.get("v")
+            normalized.append(item)
+        return normalized
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from config.settings import REQUEST_TIMEOUT, MAX_CONCURRENT_REQUESTS
+from src.api_integrator.request_scheduler import RequestScheduler, get_scheduler
+from src.api_integrator.response_cache import ResponseCache, CacheEntry
+
+logger = logging.getLogger(__name__)
+
+class HTTPTransport:
+    """
+    Pooled async HTTP client shared by every connector of a refresh. All requests go through the same connection pool,
+    concurrency limit and request scheduler, so the retry policy and the rate limits apply across providers.
+    With a response cache, fresh cached responses are served from disk without a request.
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENT_REQUESTS, scheduler: Optional[RequestScheduler] = None,
+                 headers: Optional[Dict[str, str]] = None, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 cache: Optional[ResponseCache] = None):
+        self.max_concurrency = max_concurrency
+        self.scheduler = scheduler or get_scheduler()
+        self.headers = headers if headers is not None else {"X-API-Key": os.getenv("CYBOTRADE_API_KEY")}
+        self.transport = transport
+        self.cache = cache
+        self.client: Optional[httpx.AsyncClient] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "HTTPTransport":
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        headers = {key: value for key, value in self.headers.items() if value is not None}
+        self.client = httpx.AsyncClient(headers=headers, timeout=REQUEST_TIMEOUT, limits=limits,
+                                        transport=self.transport)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+        self.semaphore = None
+
+    async def get(self, url: str, stream: bool = False) -> httpx.Response:
+        """
+        Send a GET request through the scheduler. Callers hold the semaphore for as long as they read the body.
+        :param stream: Return the response without reading its body. The caller has to close the response.
+        """
+        if self.client is None:
+            raise RuntimeError("The transport has to be opened with 'async with' before sending requests")
+        if self.cache is None:
+            return await self.scheduler.request(self.client, "GET", url, stream=stream)
+        return await self._get_cached(url)
+
+    async def _get_cached(self, url: str) -> httpx.Response:
+        # Cached bodies are read in full, so streamed requests are buffered as well. The stream decoder reads the
+        # buffered body the same way.
+        cached = await asyncio.to_thread(self.cache.load, url)
+        if cached is not None and cached[0].is_fresh():
+            self.cache.hits += 1
+            return self._build_response(url, *cached)
+
+        headers = cached[0].get_conditional_headers() if cached is not None else {}
+        response = await self.scheduler.request(self.client, "GET", url, headers=headers)
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.revalidated += 1
+            entry = await asyncio.to_thread(self.cache.refresh, url, cached[0], response)
+            return self._build_response(url, entry, cached[1])
+
+        self.cache.misses += 1
+        if response.status_code == 200:
+            await asyncio.to_thread(self.cache.store, url, response)
+        return response
+
+    @staticmethod
+    def _build_response(url: str, entry: CacheEntry, body: bytes) -> httpx.Response:
+        headers = {"content-type": entry.content_type or "application/json"}
+        return httpx.Response(200, headers=headers, content=body, request=httpx.Request("GET", url))
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Type
+
+import httpx
+
+from config.settings import MAX_CONCURRENT_REQUESTS
+from src.models.response_model import ResponseModel
+from src.api_integrator.base_connector import BaseConnector
+from src.api_integrator.cryptoquant_connector import CryptoQuantConnector
+from src.api_integrator.glassnode_connector import GlassnodeConnector
+from src.api_integrator.coinglass_connector import CoinglassConnector
+from src.api_integrator.request_scheduler import RequestScheduler, get_scheduler
+from src.api_integrator.watermark_store import WatermarkStore
+from src.api_integrator.fetch_checkpoint import FetchCheckpoint
+from src.api_integrator.response_cache import ResponseCache
+from src.pipeline.data_validator import DataValidator
+from src.utils.instrumentation import profile_run
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS: Dict[str, Type[BaseConnector]] = {
+    connector.PROVIDER: connector for connector in (CryptoQuantConnector, GlassnodeConnector, CoinglassConnector)
+}
+
+
+def get_connectors(providers: Optional[List[str]] = None, transport: Optional[httpx.AsyncBaseTransport] = None,
+                   scheduler: Optional[RequestScheduler] = None, watermarks: Optional[WatermarkStore] = None,
+                   checkpoint: Optional[FetchCheckpoint] = None, cache: Optional[ResponseCache] = None,
+                   validator: Optional[DataValidator] = None) -> List[BaseConnector]:
+    """
+    Create the connectors of the given providers. They share the scheduler, the watermark store, the checkpoints,
+    the response cache and the validator, so that saving the watermarks of one provider does not overwrite those of
+    another.
+    :param providers: Names of the providers, defaults to all PROVIDERS
+    """
+    providers = providers or list(PROVIDERS.keys())
+    unknown = [provider for provider in providers if provider not in PROVIDERS]
+    if unknown:
+        raise ValueError(f"Unknown providers: {', '.join(unknown)}")
+
+    scheduler = scheduler or get_scheduler()
+    watermarks = watermarks or WatermarkStore()
+    checkpoint = checkpoint or FetchCheckpoint()
+    connectors = [PROVIDERS[provider](transport=transport, watermarks=watermarks, scheduler=scheduler,
+                                      checkpoint=checkpoint, cache=cache, validator=validator)
+                  for provider in providers]
+    # Without an explicit cache or validator, every connector would open its own index of the same cache directory
+    # and its own copy of the same validation state
+    for connector in connectors[1:]:
+        connector.cache = connectors[0].cache
+        connector.validator = connectors[0].validator
+    return connectors
+
+
+def fetch_providers(connectors: List[BaseConnector], symbols: Optional[List[str]] = None,
+                    categories: Optional[Dict[str, List[str]]] = None,
+                    max_concurrency: int = MAX_CONCURRENT_REQUESTS, incremental: bool = False, resume: bool = True,
+                    stream: bool = False) -> Dict[str, Dict[str, Dict[str, ResponseModel]]]:
+    """
+    Fetch the endpoints of several providers concurrently over one pooled transport.
+    :param connectors: Connectors to fetch, see get_connectors
+    :param symbols: Symbols to fetch, defaults to the SYMBOLS of each connector
+    :param categories: Categories to fetch keyed by provider, defaults to all categories of each connector
+    :param max_concurrency: Maximum number of requests in flight at the same time across all providers
+    :return: ResponseModel per category, keyed by provider, symbol and then category
+    """
+    with profile_run("providers-fetch"):
+        return asyncio.run(fetch_providers_async(connectors, symbols, categories, max_concurrency, incremental,
+                                                 resume, stream))
+
+
+async def fetch_providers_async(connectors: List[BaseConnector], symbols: Optional[List[str]] = None,
+                                categories: Optional[Dict[str, List[str]]] = None,
+                                max_concurrency: int = MAX_CONCURRENT_REQUESTS, incremental: bool = False,
+                                resume: bool = True,
+                                stream: bool = False) -> Dict[str, Dict[str, Dict[str, ResponseModel]]]:
+    if not connectors:
+        return {}
+
+    categories = categories or {}
+    async with connectors[0].open_transport(max_concurrency, stream) as transport:
+        results = await asyncio.gather(*[
+            connector.fetch_all_with_transport(transport, symbols, categories.get(connector.PROVIDER), incremental,
+                                               resume, stream)
+            for connector in connectors
+        ])
+
+    return {connector.PROVIDER: result for connector, result in zip(connectors, results)}
@@ -0,0 +1,282 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+
+from config.settings import API_RATE_LIMITS, DEFAULT_RATE_LIMIT, MAX_RETRIES, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX
+from src.utils.instrumentation import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out send times instead of blocking, so that it can be shared by threads and event loops.
+    A negative token balance represents the requests already queued behind the bucket.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token from the bucket
+        :return: Seconds to wait before the request may be sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now > self.updated_at:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+            self.tokens -= 1
+            return (self.updated_at - now) + max(0.0, -self.tokens) / self.rate
+
+    def pause(self, seconds: float):
+        """
+        Stop handing out tokens for the given number of seconds, e.g. when the API responds with Retry-After
+        :param seconds: Seconds to pause
+        """
+        with self._lock:
+            self.tokens = min(self.tokens, 0.0)
+            self.updated_at = max(self.updated_at, time.monotonic() + seconds)
+
+
+class HostStats:
+
+    def __init__(self, max_samples: int = 1000):
+        self.queued = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self.latencies = deque(maxlen=max_samples)
+
+    def to_dict(self) -> Dict:
+        latencies = sorted(self.latencies)
+        return {
+            "queue_depth": self.queued,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else None,
+            "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+            "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else None,
+            "latency_max": latencies[-1] if latencies else None,
+        }
+
+
+class RequestScheduler:
+    """
+    Schedule HTTP requests of every connector against a requests-per-second budget per API. Transient failures are
+    retried with jittered exponential backoff, and 429 responses pause the whole API for the Retry-After period.
+    """
+
+    def __init__(self, rate_limits: Optional[Dict[str, float]] = None, default_rate: float = DEFAULT_RATE_LIMIT,
+                 max_retries: int = MAX_RETRIES, backoff_base: float = RETRY_BACKOFF_BASE,
+                 backoff_max: float = RETRY_BACKOFF_MAX):
+        self.rate_limits = dict(API_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.default_rate = default_rate
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+    def get_host(self, url: str) -> str:
+        """
+        Get the key of the rate limit budget of a URL. The providers share one domain, so the budget is keyed by the
+        longest configured API URL that prefixes the URL, falling back to its scheme and host.
+        """
+        matches = [api_url for api_url in self.rate_limits if url.startswith(api_url.rstrip("/"))]
+        if matches:
+            return max(matches, key=len).rstrip("/")
+
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def get_rate(self, url: str) -> float:
+        """
+        Requests per second allowed to the API of a URL
+        """
+        return self.rate_limits.get(self.get_host(url), self.default_rate)
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {host: stats.to_dict() for host, stats in self._stats.items()}
+
+    def export_metrics(self, metrics: MetricsRegistry):
+        """
+        Collector that copies the host statistics into gauges of a metrics registry
+        """
+        for host, stats in self.stats().items():
+            for name in ("queue_depth", "in_flight", "requests", "retries", "throttled"):
+                metrics.set(f"scheduler_{name}", stats[name], host=host)
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, stream: bool = False,
+                      **kwargs) -> httpx.Response:
+        """
+        Send a request once the budget of its API allows it, retrying transient failures
+        :param stream: Return the response without reading its body. The caller has to close the response.
+        """
+        host = self.get_host(url)
+        bucket, stats = self._get_bucket(host)
+
+        for attempt in range(self.max_retries + 1):
+            stats.queued += 1
+            try:
+                await asyncio.sleep(bucket.reserve())
+            finally:
+                stats.queued -= 1
+
+            stats.in_flight += 1
+            started_at = time.perf_counter()
+            try:
+                if stream:
+                    response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+                else:
+                    response = await client.request(method, url, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException) as err:
+                if attempt == self.max_retries:
+                    stats.failures += 1
+                    raise
+                delay = self._on_error(host, bucket, stats, attempt, err)
+            else:
+                delay = self._on_response(host, bucket, stats, attempt, response.status_code,
+                                          response.headers.get("Retry-After"), time.perf_counter() - started_at)
+                if delay is None:
+                    return response
+                if stream:
+                    await response.aclose()
+            finally:
+                stats.in_flight -= 1
+
+            await asyncio.sleep(delay)
+
+    def request_sync(self, method: str, url: str, session=requests, **kwargs) -> requests.Response:
+        host = self.get_host(url)
+        bucket, stats = self._get_bucket(host)
+
+        for attempt in range(self.max_retries + 1):
+            stats.queued += 1
+            try:
+                time.sleep(bucket.reserve())
+            finally:
+                stats.queued -= 1
+
+            stats.in_flight += 1
+            started_at = time.perf_counter()
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                if attempt == self.max_retries:
+                    stats.failures += 1
+                    raise
+                delay = self._on_error(host, bucket, stats, attempt, err)
+            else:
+                delay = self._on_response(host, bucket, stats, attempt, response.status_code,
+                                          response.headers.get("Retry-After"), time.perf_counter() - started_at)
+                if delay is None:
+                    return response
+            finally:
+                stats.in_flight -= 1
+
+            time.sleep(delay)
+
+    def _get_bucket(self, host: str):
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate_limits.get(host, self.default_rate))
+                self._stats[host] = HostStats()
+            return self._buckets[host], self._stats[host]
+
+    def _on_response(self, host: str, bucket: TokenBucket, stats: HostStats, attempt: int, status_code: int,
+                     retry_after: Optional[str], latency: float) -> Optional[float]:
+        """
+        Record a response and decide whether to retry it
+        :return: Seconds to wait before retrying, or None if the response should be returned
+        """
+        stats.requests += 1
+        stats.latencies.append(latency)
+
+        if status_code not in RETRY_STATUS_CODES:
+            return None
+        if attempt == self.max_retries:
+            stats.failures += 1
+            return None
+
+        delay = self._parse_retry_after(retry_after)
+        if delay is None:
+            delay = self._get_backoff(attempt)
+
+        if status_code == 429:
+            # Throttling applies to every request sent to the API, not just this one
+            stats.throttled += 1
+            bucket.pause(delay)
+
+        stats.retries += 1
+        logger.warning(f"{host} responded with {status_code}, retrying in {delay:.2f}s "
+                       f"(attempt {attempt + 1}/{self.max_retries})")
+        return delay
+
+    def _on_error(self, host: str, bucket: TokenBucket, stats: HostStats, attempt: int, err: Exception) -> float:
+        delay = self._get_backoff(attempt)
+        stats.retries += 1
+        logger.warning(f"Request to {host} failed with {err!r}, retrying in {delay:.2f}s "
+                       f"(attempt {attempt + 1}/{self.max_retries})")
+        return delay
+
+    def _get_backoff(self, attempt: int) -> float:
+        # Full jitter spreads the retries of concurrent requests instead of retrying them in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _parse_retry_after(retry_after: Optional[str]) -> Optional[float]:
+        if retry_after is None:
+            return None
+
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+_default_scheduler: Optional[RequestScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    """
+    Get the request scheduler shared by every connector in the process
+    """
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
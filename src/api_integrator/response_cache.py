@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import re
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import httpx
+import zstandard
+from pydantic import BaseModel
+
+from config.paths import RAW_DATA_DIR
+from config.settings import HTTP_CACHE_MAX_BYTES, HTTP_CACHE_TTLS, HTTP_CACHE_COMPRESSION_LEVEL, WINDOW_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Interval parameters of the providers, e.g. "24h" for Glassnode or "1d" for Coinglass
+INTERVAL_PATTERN = re.compile(r"^(\d+)(m|h|d|w)$")
+INTERVAL_UNIT_SECONDS = {"m": 60, "h": 60 * 60, "d": 24 * 60 * 60, "w": 7 * 24 * 60 * 60}
+WINDOW_PARAMS = ("window", "i", "interval")
+
+
+class CacheEntry(BaseModel):
+    url: str
+    stored_at: float
+    ttl: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_type: Optional[str] = None
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.stored_at < self.ttl
+
+    def get_conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Disk cache of API responses, compressed with zstd and bounded by max_bytes with least recently used eviction.
+
+    Responses are keyed by their normalized URL. The start_time parameter moves with the current time on every run,
+    so it is floored to the window of the endpoint: rows are aligned to their window, so every start_time within
+    the same window selects the same rows. Stale entries that carry an ETag or Last-Modified header are revalidated
+    with a conditional request instead of being downloaded again.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = HTTP_CACHE_MAX_BYTES,
+                 ttls: Optional[Dict[str, float]] = None, level: int = HTTP_CACHE_COMPRESSION_LEVEL):
+        self.directory = directory or os.path.join(RAW_DATA_DIR, "http_cache")
+        self.max_bytes = max_bytes
+        self.ttls = dict(HTTP_CACHE_TTLS if ttls is None else ttls)
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Size of every entry in least recently used order, built from the directory on first use, so that creating
+        # a connector does not walk the whole cache
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        self._get_index()
+        return self._total_bytes
+
+    def load(self, url: str) -> Optional[Tuple[CacheEntry, bytes]]:
+        """
+        Load a cached response, fresh or stale
+        :return: Entry and decompressed body, or None if the URL is not cached
+        """
+        key = self.get_key(url)
+        meta_path, body_path = self._get_filepaths(key)
+
+        try:
+            with open(meta_path, "r") as f:
+                entry = CacheEntry(**json.load(f))
+            with open(body_path, "rb") as f:
+                body = zstandard.ZstdDecompressor().decompress(f.read())
+        except FileNotFoundError:
+            return None
+        except (IOError, ValueError, zstandard.ZstdError) as e:
+            logger.error(f"Discarding unreadable cache entry of {url}: {e}")
+            self._remove(key)
+            return None
+
+        self._touch(key)
+        return entry, body
+
+    def store(self, url: str, response: httpx.Response) -> CacheEntry:
+        key = self.get_key(url)
+        entry = CacheEntry(url=url, stored_at=time.time(), ttl=self.get_ttl(url),
+                           etag=response.headers.get("etag"), last_modified=response.headers.get("last-modified"),
+                           content_type=response.headers.get("content-type"))
+        body = zstandard.ZstdCompressor(level=self.level).compress(response.content)
+        self._write(key, entry, body)
+        return entry
+
+    def refresh(self, url: str, entry: CacheEntry, response: httpx.Response) -> CacheEntry:
+        """
+        Restart the TTL of an entry the server confirmed with a 304 Not Modified
+        """
+        entry = entry.model_copy(update={
+            "stored_at": time.time(),
+            "etag": response.headers.get("etag", entry.etag),
+            "last_modified": response.headers.get("last-modified", entry.last_modified),
+        })
+        meta_path, _ = self._get_filepaths(self.get_key(url))
+        with open(meta_path, "w") as f:
+            json.dump(entry.model_dump(), f)
+        return entry
+
+    def clear(self):
+        index = self._get_index()
+        with self._lock:
+            keys = list(index.keys())
+        for key in keys:
+            self._remove(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "revalidated": self.revalidated,
+                "evictions": self.evictions, "entries": len(self._get_index()), "bytes": self.total_bytes}
+
+    def get_key(self, url: str) -> str:
+        parts = urlsplit(url)
+        params = dict(parse_qsl(parts.query))
+
+        if "start_time" in params:
+            window_ms = (self._get_window_seconds(params) or WINDOW_SECONDS["day"]) * 1000
+            params["start_time"] = str(int(params["start_time"]) // window_ms * window_ms)
+
+        normalized = f"{parts.scheme}://{parts.netloc.lower()}{parts.path}?{urlencode(sorted(params.items()))}"
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def get_ttl(self, url: str) -> float:
+        parts = urlsplit(url)
+        for segment in parts.path.split("/"):
+            if segment in self.ttls:
+                return self.ttls[segment]
+
+        params = dict(parse_qsl(parts.query))
+        window_seconds = self._get_window_seconds(params)
+        for window, seconds in WINDOW_SECONDS.items():
+            if seconds == window_seconds and window in self.ttls:
+                return self.ttls[window]
+        return window_seconds or self.ttls.get("day", WINDOW_SECONDS["day"])
+
+    @staticmethod
+    def _get_window_seconds(params: Dict[str, str]) -> Optional[int]:
+        for name in WINDOW_PARAMS:
+            value = params.get(name)
+            if value is None:
+                continue
+            if value in WINDOW_SECONDS:
+                return WINDOW_SECONDS[value]
+            match = INTERVAL_PATTERN.match(value)
+            if match:
+                return int(match.group(1)) * INTERVAL_UNIT_SECONDS[match.group(2)]
+        return None
+
+    def _write(self, key: str, entry: CacheEntry, body: bytes):
+        meta_path, body_path = self._get_filepaths(key)
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        meta = json.dumps(entry.model_dump())
+
+        with open(body_path, "wb") as f:
+            f.write(body)
+        with open(meta_path, "w") as f:
+            f.write(meta)
+
+        index = self._get_index()
+        with self._lock:
+            self._total_bytes += len(body) + len(meta) - index.pop(key, 0)
+            index[key] = len(body) + len(meta)
+        self._evict()
+
+    def _evict(self):
+        index = self._get_index()
+        while True:
+            with self._lock:
+                if self._total_bytes <= self.max_bytes or len(index) <= 1:
+                    return
+                key = next(iter(index))
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        index = self._get_index()
+        with self._lock:
+            self._total_bytes -= index.pop(key, 0)
+        for filepath in self._get_filepaths(key):
+            try:
+                os.remove(filepath)
+            except FileNotFoundError:
+                pass
+
+    def _touch(self, key: str):
+        index = self._get_index()
+        with self._lock:
+            if key in index:
+                index.move_to_end(key)
+        # The modification time orders the entries when the index is rebuilt by the next process
+        _, body_path = self._get_filepaths(key)
+        try:
+            os.utime(body_path)
+        except FileNotFoundError:
+            # Evicted by another thread or process since it was read, so there is nothing left to order
+            pass
+
+    def _get_index(self) -> "OrderedDict[str, int]":
+        if self._index is None:
+            index = self._load_index()
+            with self._lock:
+                if self._index is None:
+                    self._index = index
+                    self._total_bytes = sum(index.values())
+        return self._index
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, filenames in os.walk(self.directory):
+                for filename in filenames:
+                    if not filename.endswith(".zst"):
+                        continue
+                    key = filename[:-len(".zst")]
+                    meta_path, body_path = self._get_filepaths(key)
+                    if not os.path.exists(meta_path):
+                        continue
+                    body_stat = os.stat(body_path)
+                    entries.append((body_stat.st_mtime, key, body_stat.st_size + os.path.getsize(meta_path)))
+        return OrderedDict((key, size) for _, key, size in sorted(entries))
+
+    def _get_filepaths(self, key: str) -> Tuple[str, str]:
+        # Entries are spread over subdirectories, so that no directory holds every entry
+        prefix = os.path.join(self.directory, key[:2], key)
+        return f"{prefix}.json", f"{prefix}.zst"
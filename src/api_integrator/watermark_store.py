@@ -0,0 +1,58 @@
+import json
+import os
+import logging
+import threading
+from typing import Dict, Optional
+
+from config.paths import RAW_DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+class WatermarkStore:
+    """
+    Persist the latest fetched start_time (high-water mark) of every (symbol, category, endpoint), so that the
+    connector only requests rows newer than what is already stored.
+    """
+
+    FILENAME = "watermarks.json"
+
+    def __init__(self, filepath: Optional[str] = None):
+        self.filepath = filepath or os.path.join(RAW_DATA_DIR, self.FILENAME)
+        self.watermarks: Dict[str, int] = self._load()
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, category: str, endpoint: str) -> Optional[int]:
+        return self.watermarks.get(self._get_key(symbol, category, endpoint))
+
+    def update(self, symbol: str, category: str, endpoint: str, start_time: int):
+        key = self._get_key(symbol, category, endpoint)
+        with self._lock:
+            self.watermarks[key] = max(int(start_time), self.watermarks.get(key, 0))
+
+    def reset(self, symbol: str, category: str, endpoint: str):
+        with self._lock:
+            self.watermarks.pop(self._get_key(symbol, category, endpoint), None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        try:
+            # Connectors may save the data of several categories from different threads
+            with self._lock, open(self.filepath, "w") as f:
+                json.dump(self.watermarks, f, indent=4, sort_keys=True)
+        except IOError as e:
+            logger.error(f"Error saving watermarks to {self.filepath}: {e}")
+
+    def _load(self) -> Dict[str, int]:
+        if not os.path.exists(self.filepath):
+            return {}
+
+        try:
+            with open(self.filepath, "r") as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logger.error(f"Error loading watermarks from {self.filepath}: {e}")
+            return {}
+
+    @staticmethod
+    def _get_key(symbol: str, category: str, endpoint: str) -> str:
+        return f"{symbol}/{category}/{endpoint}"
@@ -0,0 +1,208 @@
+import os
+import time
+import logging
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from config.settings import BACKTEST_FEE_RATE, BACKTEST_PERIODS_PER_YEAR
+from src.models.response_model import ResponseModel
+from src.pipeline.json_extractor import JSONExtractor
+
+logger = logging.getLogger(__name__)
+
+# Signal functions take the close prices and keyword parameters and return one target position per bar
+SignalFunction = Callable[..., np.ndarray]
+
+METRICS = ["total_return", "annual_return", "volatility", "sharpe", "max_drawdown", "turnover", "trades", "fees",
+           "exposure"]
+
+
+class BacktestConfig(BaseModel):
+    fee_rate: float = BACKTEST_FEE_RATE  # Fee paid on every unit of position traded, e.g. 0.001 is 10 bps
+    periods_per_year: int = BACKTEST_PERIODS_PER_YEAR
+    allow_short: bool = True
+
+
+class BacktestResult(BaseModel):
+    total_return: float
+    annual_return: float
+    volatility: float
+    sharpe: float
+    max_drawdown: float  # Largest loss from a peak of the equity, as a negative fraction
+    turnover: float  # Sum of the absolute position changes
+    trades: int
+    fees: float
+    exposure: float  # Fraction of the bars with an open position
+    positions: Any = None  # np.ndarray of the position held over each bar
+    equity: Any = None  # np.ndarray of the equity after each bar, starting from 1
+    drawdown: Any = None  # np.ndarray of the drawdown after each bar
+
+
+def sma_crossover(close: np.ndarray, fast: int, slow: int) -> np.ndarray:
+    """
+    Long when the fast simple moving average is above the slow one, short when it is below
+    """
+    if fast < 1:
+        raise ValueError(f"Expected moving averages of at least 1 bar, got fast={fast}")
+    if fast >= slow:
+        return np.full(len(close), np.nan)
+    return np.sign(_rolling_mean(close, fast) - _rolling_mean(close, slow))
+
+
+def momentum(close: np.ndarray, lookback: int, threshold: float = 0.0) -> np.ndarray:
+    """
+    Long when the return over the lookback is above the threshold, short when it is below minus the threshold
+    """
+    if lookback < 1:
+        raise ValueError(f"Expected a lookback of at least 1 bar, got lookback={lookback}")
+    returns = np.full(len(close), np.nan)
+    returns[lookback:] = close[lookback:] / close[:-lookback] - 1
+    signals = np.where(returns > threshold, 1.0, np.where(returns < -threshold, -1.0, 0.0))
+    signals[np.isnan(returns)] = np.nan
+    return signals
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    cumsum = np.cumsum(np.insert(values, 0, 0.0))
+    result = np.full(len(values), np.nan)
+    result[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return result
+
+
+class VectorizedBacktester:
+    """
+    Backtest target positions against the close prices of market-data. Every computation is a NumPy array
+    operation over the bars, and a batch of signals is evaluated as one 2D array, so that a parameter sweep costs a
+    few array passes per worker instead of a Python loop per bar and configuration.
+
+    The signal of a bar is decided on its close, so the position it sets is held from the next bar on.
+    """
+
+    def __init__(self, close: pd.Series, config: Optional[BacktestConfig] = None):
+        self.config = config or BacktestConfig()
+        # Missing closes carry the last price forward, which gives a zero return over the gap
+        self.close = close.sort_index().ffill().dropna()
+        self.index = self.close.index
+        self.prices = self.close.to_numpy(dtype=np.float64)
+        self.returns = np.zeros(len(self.prices))
+        self.returns[1:] = self.prices[1:] / self.prices[:-1] - 1
+
+    @classmethod
+    def from_market_data(cls, symbol: str, config: Optional[BacktestConfig] = None,
+                         extractor: Optional[JSONExtractor] = None) -> ResponseModel:
+        """
+        Create a backtester over the daily close prices stored for a symbol
+        :return: ResponseModel with the backtester
+        """
+        frame = (extractor or JSONExtractor()).load_frame(symbol, "market-data")
+        if frame is None or "close" not in frame.columns or not frame["close"].notna().any():
+            return ResponseModel(is_success=False, data=None, message=f"No close prices stored for {symbol}")
+        return ResponseModel(is_success=True, message=None, data=cls(frame["close"], config))
+
+    def run(self, signals: Union[np.ndarray, pd.Series]) -> BacktestResult:
+        """
+        Backtest one signal
+        :param signals: Target position of each bar, aligned to the close prices. A Series is aligned on its date
+        index, and missing targets are flat.
+        :return: Metrics with the positions, equity and drawdown of every bar
+        """
+        positions = self._get_positions(self._align(signals)[np.newaxis, :])
+        metrics, equity, drawdown = self._evaluate(positions)
+        result = {name: values[0].item() for name, values in metrics.items()}
+        return BacktestResult(**result, positions=positions[0], equity=equity[0], drawdown=drawdown[0])
+
+    def run_batch(self, signals: np.ndarray) -> pd.DataFrame:
+        """
+        Backtest a batch of signals at once
+        :param signals: Array of shape (configurations, bars)
+        :return: DataFrame of the metrics, one row per configuration
+        """
+        metrics, _, _ = self._evaluate(self._get_positions(np.atleast_2d(signals)))
+        return pd.DataFrame(metrics, columns=METRICS)
+
+    def sweep(self, signal_function: SignalFunction, grid: Dict[str, List], workers: Optional[int] = None,
+              batch_size: int = 256) -> pd.DataFrame:
+        """
+        Backtest every combination of a parameter grid across a process pool. Each worker builds the signals of a
+        batch of combinations and evaluates them together with run_batch.
+        :param signal_function: Module-level function called as signal_function(close, **params), so that workers
+        can import it
+        :param grid: Values of each parameter
+        :param workers: Worker processes, defaults to the number of cores. 1 runs in the current process.
+        :param batch_size: Combinations evaluated per task
+        :return: DataFrame of the parameters and metrics of every combination, sorted by descending Sharpe ratio
+        """
+        names = list(grid.keys())
+        combinations = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+        batches = [combinations[i:i + batch_size] for i in range(0, len(combinations), batch_size)]
+        workers = min(workers or os.cpu_count() or 1, max(len(batches), 1))
+
+        started_at = time.perf_counter()
+        if workers == 1:
+            frames = [_sweep_task(self.close, self.config, signal_function, batch) for batch in batches]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                frames = list(executor.map(_sweep_task, itertools.repeat(self.close), itertools.repeat(self.config),
+                                           itertools.repeat(signal_function), batches))
+
+        logger.info(f"Backtested {len(combinations)} combinations of {signal_function.__name__} on {workers} "
+                    f"workers in {time.perf_counter() - started_at:.3f}s")
+        if not frames:
+            return pd.DataFrame(columns=names + METRICS)
+        result = pd.concat([pd.DataFrame(combinations), pd.concat(frames, ignore_index=True)], axis=1)
+        return result.sort_values("sharpe", ascending=False, kind="stable").reset_index(drop=True)
+
+    def _align(self, signals: Union[np.ndarray, pd.Series]) -> np.ndarray:
+        if isinstance(signals, pd.Series):
+            signals = signals.reindex(self.index)
+        signals = np.asarray(signals, dtype=np.float64)
+        if signals.shape != self.prices.shape:
+            raise ValueError(f"Expected {len(self.prices)} signals aligned to the close prices, got {signals.shape}")
+        return signals
+
+    def _get_positions(self, signals: np.ndarray) -> np.ndarray:
+        if signals.shape[1] != len(self.prices):
+            raise ValueError(f"Expected {len(self.prices)} signals per configuration, got {signals.shape[1]}")
+        lower = -1.0 if self.config.allow_short else 0.0
+        targets = np.clip(np.nan_to_num(signals, nan=0.0), lower, 1.0)
+
+        positions = np.zeros_like(targets)
+        positions[:, 1:] = targets[:, :-1]
+        return positions
+
+    def _evaluate(self, positions: np.ndarray):
+        trades = np.abs(np.diff(positions, axis=1, prepend=0.0))
+        fees = trades * self.config.fee_rate
+        returns = positions * self.returns - fees
+
+        equity = np.cumprod(1 + returns, axis=1)
+        drawdown = equity / np.maximum(np.maximum.accumulate(equity, axis=1), 1.0) - 1
+
+        bars = max(returns.shape[1], 1)
+        periods = self.config.periods_per_year
+        mean, std = returns.mean(axis=1), returns.std(axis=1)
+        final = equity[:, -1] if equity.shape[1] else np.ones(len(equity))
+        metrics = {
+            "total_return": final - 1,
+            "annual_return": np.clip(final, 0.0, None) ** (periods / bars) - 1,
+            "volatility": std * np.sqrt(periods),
+            "sharpe": np.divide(mean, std, out=np.zeros_like(mean), where=std > 0) * np.sqrt(periods),
+            "max_drawdown": drawdown.min(axis=1, initial=0.0),
+            "turnover": trades.sum(axis=1),
+            "trades": np.count_nonzero(trades, axis=1),
+            "fees": fees.sum(axis=1),
+            "exposure": np.count_nonzero(positions, axis=1) / bars,
+        }
+        return metrics, equity, drawdown
+
+
+def _sweep_task(close: pd.Series, config: BacktestConfig, signal_function: SignalFunction,
+                batch: List[Dict]) -> pd.DataFrame:
+    backtester = VectorizedBacktester(close, config)
+    signals = np.stack([signal_function(backtester.prices, **params) for params in batch])
+    return backtester.run_batch(signals)
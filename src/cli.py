@@ -0,0 +1,126 @@
+"""
+Command line interface of the trading bot.
+
+    ctb refresh --symbols btc,eth --categories all --workers 16 --incremental
+    ctb refresh --providers glassnode --categories market,glassnode-supply --dry-run
+
+    ctb migrate
+
+refresh fetches, stores and extracts the selected categories as one pipelined job and prints the time spent in
+each stage. --dry-run only prints the categories and the number of requests the refresh would send.
+
+migrate imports the raw JSON files written by the json storage backend into the store selected by STORAGE_BACKEND.
+"""
+import sys
+import time
+import logging
+import argparse
+from typing import Dict, List, Optional
+
+from config.settings import MAX_CONCURRENT_REQUESTS
+from src.api_integrator.base_connector import BaseConnector
+from src.api_integrator.providers import PROVIDERS, get_connectors
+from src.pipeline.refresh_pipeline import RefreshPipeline, format_plan, format_summary
+from src.utils.utils import migrate_json_responses
+
+
+def parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def select_categories(connectors: List[BaseConnector], names: List[str]) -> Dict[str, List[str]]:
+    """
+    Match category names against the catalogs of the providers. A name is either a category of a provider catalog,
+    e.g. market, or its storage name, e.g. glassnode-market. "all" selects every category.
+    :return: Categories of the catalogs keyed by provider, without the providers that have none selected
+    """
+    if "all" in names:
+        return {connector.PROVIDER: list(connector.ENDPOINTS_PARAMS.keys()) for connector in connectors}
+
+    selected: Dict[str, List[str]] = {}
+    matched = set()
+    for connector in connectors:
+        for category in connector.ENDPOINTS_PARAMS:
+            storage_category = connector._get_storage_category(category)
+            for name in names:
+                if name in (category, storage_category):
+                    selected.setdefault(connector.PROVIDER, []).append(category)
+                    matched.add(name)
+
+    unknown = [name for name in names if name not in matched]
+    if unknown:
+        raise ValueError(f"Unknown categories: {', '.join(unknown)}")
+    return selected
+
+
+def refresh(args: argparse.Namespace) -> int:
+    connectors = get_connectors(args.providers)
+    categories = select_categories(connectors, args.categories)
+    connectors = [connector for connector in connectors if connector.PROVIDER in categories]
+
+    pipeline = RefreshPipeline(connectors, args.workers, args.extract_workers, args.incremental, not args.no_resume,
+                               args.stream, not args.no_extract)
+    plan = pipeline.plan(args.symbols, categories)
+    if args.dry_run:
+        print(format_plan(plan, pipeline.estimate_seconds(plan)))
+        return 0
+
+    started_at = time.perf_counter()
+    timings = pipeline.run(plan)
+    print(format_summary(timings, time.perf_counter() - started_at))
+    return 0 if all(timing.is_success for timing in timings) else 1
+
+
+def migrate(args: argparse.Namespace) -> int:
+    results = migrate_json_responses()
+    for name, is_success in results.items():
+        print(f"{name:<36}{'ok' if is_success else 'failed'}")
+    print(f"{len(results)} categories, {sum(not ok for ok in results.values())} failed")
+    return 0 if all(results.values()) else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="ctb", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log-level", default="WARNING", help="Logging level, e.g. INFO")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = subparsers.add_parser("refresh", help="Fetch, store and extract provider data")
+    refresh_parser.add_argument("--symbols", type=parse_list, default=None,
+                                help="Comma-separated symbols, defaults to the symbols of each provider")
+    refresh_parser.add_argument("--categories", type=parse_list, default=["all"],
+                                help="Comma-separated categories, or all")
+    refresh_parser.add_argument("--providers", type=parse_list, default=None,
+                                help=f"Comma-separated providers among {', '.join(PROVIDERS)}, defaults to all")
+    refresh_parser.add_argument("--workers", type=int, default=MAX_CONCURRENT_REQUESTS,
+                                help="Maximum number of requests in flight across all providers")
+    refresh_parser.add_argument("--extract-workers", type=int, default=None,
+                                help="Extraction processes, defaults to the number of cores, 0 extracts in threads")
+    refresh_parser.add_argument("--incremental", action="store_true",
+                                help="Only fetch the rows after the stored watermarks")
+    refresh_parser.add_argument("--no-resume", action="store_true",
+                                help="Discard the checkpoints of interrupted fetches")
+    refresh_parser.add_argument("--stream", action="store_true",
+                                help="Write the pages to the raw store as they arrive")
+    refresh_parser.add_argument("--no-extract", action="store_true", help="Skip the extraction of processed data")
+    refresh_parser.add_argument("--dry-run", action="store_true",
+                                help="Print the planned requests without sending them")
+    refresh_parser.set_defaults(handler=refresh)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Import the raw JSON files into the configured store")
+    migrate_parser.set_defaults(handler=migrate)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+    try:
+        return args.handler(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
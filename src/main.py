@@ -1,10 +1,46 @@
 import os
 import signal
+import asyncio
 import uvicorn
-from fastapi import FastAPI, Response
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import List, Literal, Optional
+from fastapi import FastAPI, Header, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+from config.settings import INGESTION_ENABLED
+from src.api_integrator.request_scheduler import get_scheduler
+from src.models.endpoint_series import EndpointSeries
+from src.pipeline.json_extractor import JSONExtractor
+from src.services.feature_cache import FeatureCache
+from src.services.ingestion_scheduler import IngestionScheduler, IngestionJobStatus
+from src.services.update_broadcaster import UpdateBroadcaster
+from src.utils.instrumentation import get_metrics
+
+SSE_KEEPALIVE_INTERVAL = 15
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+feature_cache = FeatureCache()
+broadcaster = UpdateBroadcaster()
+
+def on_ingested(symbol: str, category: str, responses: List[EndpointSeries]):
+    # The saved rows may revise the row at the watermark, so the cache is invalidated even without new rows
+    feature_cache.invalidate(symbol, category)
+    if any(len(response) for response in responses):
+        broadcaster.publish(symbol, category, responses)
+
+ingestion_scheduler = IngestionScheduler(on_update=on_ingested)
+get_metrics().add_collector(get_scheduler().export_metrics)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if INGESTION_ENABLED:
+        await ingestion_scheduler.start()
+    yield
+    await ingestion_scheduler.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Cross-Origin Resource Sharing (CORS) prohibits unauthorized websites, endpoints, or servers from accessing the API
 app.add_middleware(
@@ -19,11 +55,99 @@ app.add_middleware(
 async def root():
     return {"Hello": "World"}
 
+# Served from the in-process feature cache. Declared as a sync endpoint, so that a cache miss loading the series
+# from disk runs in the thread pool instead of blocking the event loop.
+@app.get("/features/{symbol}/{category}")
+def get_features(symbol: str, category: str, start: Optional[date] = None, end: Optional[date] = None,
+                 columns: Optional[str] = None, format: Literal["json", "arrow"] = "json",
+                 if_none_match: Optional[str] = Header(default=None)):
+    if category not in JSONExtractor.ENDPOINT_COLUMNS:
+        raise HTTPException(status_code=404, detail=f"Unknown category {category}")
+
+    cached = feature_cache.get_response(symbol, category, columns.split(",") if columns else None, start, end, format)
+    if cached is None:
+        raise HTTPException(status_code=404, detail=f"No data stored for {symbol}/{category}")
+
+    if if_none_match == cached.etag:
+        return Response(status_code=304, headers={"ETag": cached.etag})
+    return Response(content=cached.body, media_type=cached.media_type, headers={"ETag": cached.etag})
+
+# Prometheus scrape endpoint of the connector, storage and extraction metrics of this process
+@app.get("/metrics")
+async def get_metrics_text():
+    return Response(content=get_metrics().render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/ingestion/jobs", response_model=List[IngestionJobStatus])
+async def get_ingestion_jobs():
+    return ingestion_scheduler.get_status()
+
+@app.post("/ingestion/jobs/{symbol}/{category}/run")
+async def run_ingestion_job(symbol: str, category: str):
+    if (symbol, category) not in ingestion_scheduler.jobs:
+        raise HTTPException(status_code=404, detail=f"No ingestion job for {symbol}/{category}")
+    started = ingestion_scheduler.trigger(symbol, category)
+    return {"started": started, "coalesced": not started}
+
+# Server-Sent Events stream of the rows appended by ingestion
+@app.get("/stream/{symbol}/{category}")
+async def stream_features(symbol: str, category: str, columns: Optional[str] = None):
+    if category not in JSONExtractor.ENDPOINT_COLUMNS:
+        raise HTTPException(status_code=404, detail=f"Unknown category {category}")
+
+    subscription = broadcaster.subscribe(symbol, category, columns.split(",") if columns else None)
+
+    async def events():
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), timeout=SSE_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield b"data: " + message + b"\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# WebSocket stream of the rows appended by ingestion
+@app.websocket("/ws/{symbol}/{category}")
+async def websocket_features(websocket: WebSocket, symbol: str, category: str, columns: Optional[str] = None):
+    if category not in JSONExtractor.ENDPOINT_COLUMNS:
+        await websocket.close(code=1008, reason=f"Unknown category {category}")
+        return
+
+    await websocket.accept()
+    subscription = broadcaster.subscribe(symbol, category, columns.split(",") if columns else None)
+    # The client only sends a close frame, which is received concurrently so that a disconnect unsubscribes at once
+    # instead of on the next publish
+    receive = asyncio.create_task(websocket.receive())
+    try:
+        while True:
+            update = asyncio.create_task(subscription.get())
+            done, _ = await asyncio.wait({receive, update}, return_when=asyncio.FIRST_COMPLETED)
+            if update not in done:
+                update.cancel()
+            if receive in done:
+                if receive.result()["type"] == "websocket.disconnect":
+                    break
+                receive = asyncio.create_task(websocket.receive())
+            if update in done:
+                await websocket.send_bytes(update.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receive.cancel()
+        broadcaster.unsubscribe(subscription)
+
 # Call this endpoint if the server cannot shut down gracefully
 @app.get("/shutdown")
 async def shutdown():
     os.kill(os.getpid(), signal.SIGTERM)
     return Response(status_code=200, content="Shutting down the server...")
 
-if __name__ == "__main__":
+def main():
     uvicorn.run(app, host="localhost", port=8000)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pyarrow as pa
+
+
+class EndpointSeries:
+    """
+    Rows of one endpoint held column by column: an int64 array of start times in milliseconds and one array per
+    field. Numeric fields are float64 with NaN for missing values, text fields are object arrays. A daily history
+    costs a few contiguous buffers instead of a dict per row with its own copy of every key, and the arrays are
+    handed to the stores and the extractor without being converted back into rows.
+
+    The date field of the providers duplicates start_time and is not kept.
+    """
+
+    __slots__ = ("endpoint", "start_time", "columns")
+
+    KEY_COLUMN = "start_time"
+    NON_METRIC_COLUMNS = {"start_time", "date"}
+
+    def __init__(self, endpoint: str, start_time: np.ndarray, columns: Optional[Dict[str, np.ndarray]] = None):
+        self.endpoint = endpoint
+        self.start_time = np.asarray(start_time, dtype=np.int64)
+        self.columns = columns or {}
+
+    @classmethod
+    def from_rows(cls, endpoint: str, rows: List[Dict]) -> "EndpointSeries":
+        if not rows:
+            return cls(endpoint, np.empty(0, dtype=np.int64))
+
+        start_time = np.fromiter((row[cls.KEY_COLUMN] for row in rows), dtype=np.int64, count=len(rows))
+        fields = [field for field in cls.get_fields(rows) if field not in cls.NON_METRIC_COLUMNS]
+        return cls(endpoint, start_time, {field: cls._to_array([row.get(field) for row in rows]) for field in fields})
+
+    @staticmethod
+    def get_fields(rows: List[Dict]) -> List[str]:
+        """
+        Fields of the rows in the order they first appear. Rows of the same endpoint do not always carry the same
+        fields, so they are collected from every row.
+        """
+        return list(dict.fromkeys(key for row in rows for key in row))
+
+    @classmethod
+    def from_columns(cls, endpoint: str, columns: Dict[str, List]) -> "EndpointSeries":
+        """
+        Build a series from rows buffered column by column, e.g. by a ColumnarBatchWriter
+        """
+        start_time = np.asarray(columns.get(cls.KEY_COLUMN, []), dtype=np.int64)
+        return cls(endpoint, start_time, {field: cls._to_array(values) for field, values in columns.items()
+                                          if field not in cls.NON_METRIC_COLUMNS})
+
+    @classmethod
+    def from_response(cls, response: Union["EndpointSeries", Dict]) -> "EndpointSeries":
+        """
+        Accept either a series or a response in the row format {"endpoint": ..., "data": [...]}
+        """
+        if isinstance(response, EndpointSeries):
+            return response
+        return cls.from_rows(response["endpoint"], response["data"])
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "EndpointSeries":
+        columns = {name: np.array(values, dtype=np.float64 if kind == "f" else object)
+                   for name, (kind, values) in data["columns"].items()}
+        return cls(data["endpoint"], np.array(data["start_time"], dtype=np.int64), columns)
+
+    def to_dict(self) -> Dict:
+        """
+        JSON-serializable form, which keeps the columnar layout
+        """
+        return {
+            "endpoint": self.endpoint,
+            "start_time": self.start_time.tolist(),
+            "columns": {name: ("f" if values.dtype.kind == "f" else "O", values.tolist())
+                        for name, values in self.columns.items()},
+        }
+
+    def to_rows(self) -> List[Dict]:
+        """
+        Rows in the format of the provider responses. Missing numeric values are left out of the rows.
+        """
+        columns = {name: values.tolist() for name, values in self.columns.items()}
+        rows = []
+        for i, start_time in enumerate(self.start_time.tolist()):
+            row = {self.KEY_COLUMN: start_time}
+            for name, values in columns.items():
+                value = values[i]
+                if value is not None and value == value:
+                    row[name] = value
+            rows.append(row)
+        return rows
+
+    def to_table(self) -> pa.Table:
+        arrays = {self.KEY_COLUMN: pa.array(self.start_time)}
+        for name, values in self.columns.items():
+            arrays[name] = pa.array(values, from_pandas=True)
+        return pa.table(arrays)
+
+    def to_columns(self) -> Dict[str, np.ndarray]:
+        """
+        Numeric columns with the start_time column, in the format of JSONExtractor.merge_endpoints
+        """
+        columns = {self.KEY_COLUMN: self.start_time}
+        columns.update({name: values for name, values in self.columns.items() if values.dtype.kind == "f"})
+        return columns
+
+    @property
+    def latest_start_time(self) -> Optional[int]:
+        return int(self.start_time.max()) if len(self.start_time) else None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes of the buffers. Text columns only count their object pointers.
+        """
+        return self.start_time.nbytes + sum(values.nbytes for values in self.columns.values())
+
+    def __len__(self) -> int:
+        return len(self.start_time)
+
+    def __repr__(self) -> str:
+        return f"EndpointSeries({self.endpoint!r}, rows={len(self)}, columns={list(self.columns)})"
+
+    @staticmethod
+    def _to_array(values: List) -> np.ndarray:
+        try:
+            # Arrow infers the type of the whole column in one pass, None becomes NaN in numeric columns
+            array = pa.array(values, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return np.array(values, dtype=object)
+        if pa.types.is_integer(array.type) or pa.types.is_floating(array.type) or pa.types.is_null(array.type):
+            return array.to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+        return np.array(values, dtype=object)
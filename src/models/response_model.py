@@ -1,7 +1,26 @@
 from pydantic import BaseModel
 from typing import List, Any, Dict, Optional
 
+class EndpointResult(BaseModel):
+    endpoint: str
+    is_success: bool
+    message: Optional[str] = None
+    rows: int = 0
+
+class ValidationIssue(BaseModel):
+    check: str
+    severity: str  # "error" rejects the endpoint batch, "warning" is only reported
+    message: str
+    endpoint: Optional[str] = None  # None for the checks of a whole category
+    count: int = 0
+
 class ResponseModel(BaseModel):
     is_success: bool
     message: Optional[str]
-    data: Optional[Any]
\ No newline at end of file
+    data: Optional[Any]
+    endpoint_results: Optional[List[EndpointResult]] = None
+    issues: Optional[List[ValidationIssue]] = None
+
+    @property
+    def failed_endpoints(self) -> List[str]:
+        return [result.endpoint for result in self.endpoint_results or [] if not result.is_success]
@@ -0,0 +1,311 @@
+import json
+import os
+import re
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config.paths import RAW_DATA_DIR
+from config.settings import WINDOW_SECONDS, VALIDATION_REJECT_CHECKS, VALIDATION_OUTLIER_THRESHOLD, \
+    VALIDATION_OUTLIER_SPAN, VALIDATION_MIN_HISTORY
+from src.models.endpoint_series import EndpointSeries
+from src.models.response_model import ResponseModel, ValidationIssue
+from src.pipeline.json_extractor import JSONExtractor
+
+logger = logging.getLogger(__name__)
+
+FREQUENCY_UNITS = {"m": 60, "h": 60 * 60, "d": 24 * 60 * 60, "w": 7 * 24 * 60 * 60}
+
+
+def parse_frequency(value: Optional[str]) -> Optional[int]:
+    """
+    Seconds between two rows of an endpoint, from a window name (day) or an interval (24h, 1d, 10m)
+    :return: None if the frequency is unknown, e.g. monthly windows that have no fixed length
+    """
+    if value is None:
+        return None
+    if value in WINDOW_SECONDS:
+        return WINDOW_SECONDS[value]
+    match = re.fullmatch(r"(\d+)([mhdw])", value)
+    return int(match.group(1)) * FREQUENCY_UNITS[match.group(2)] if match else None
+
+
+class RejectedDataError(ValueError):
+    """
+    Raised when a streamed batch fails a check of reject_checks, which stops the stream before the batch is stored
+    """
+
+
+class ValidationState:
+    """
+    Persist, for every (symbol, category, endpoint), the latest validated start_time and exponentially weighted
+    statistics of the changes of each column, so that a batch is validated against the history without reading it.
+    """
+
+    FILENAME = "validation_state.json"
+
+    def __init__(self, filepath: Optional[str] = None):
+        self.filepath = filepath or os.path.join(RAW_DATA_DIR, self.FILENAME)
+        self.state: Dict[str, Dict] = self._load()
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, category: str, endpoint: str) -> Dict:
+        """
+        :return: {"start_time": latest start_time, "columns": {column: [last value, mean, mean of squares, count]}}
+        """
+        return self.state.get(self._get_key(symbol, category, endpoint), {"start_time": None, "columns": {}})
+
+    def set(self, symbol: str, category: str, endpoint: str, entry: Dict):
+        with self._lock:
+            self.state[self._get_key(symbol, category, endpoint)] = entry
+
+    def reset(self, symbol: str, category: str, endpoint: str):
+        with self._lock:
+            self.state.pop(self._get_key(symbol, category, endpoint), None)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        try:
+            with self._lock, open(self.filepath, "w") as f:
+                json.dump(self.state, f, sort_keys=True)
+        except IOError as e:
+            logger.error(f"Error saving validation state to {self.filepath}: {e}")
+
+    def _load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.filepath):
+            return {}
+
+        try:
+            with open(self.filepath, "r") as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logger.error(f"Error loading validation state from {self.filepath}: {e}")
+            return {}
+
+    @staticmethod
+    def _get_key(symbol: str, category: str, endpoint: str) -> str:
+        return f"{symbol}/{category}/{endpoint}"
+
+
+class DataValidator:
+    """
+    Validate fetched endpoint series before they are stored. Every check is an array operation over the batch, and
+    continuity and outliers only look at the rows newer than the last validated start_time, with the previous row
+    and the change statistics taken from the ValidationState. An incremental run therefore costs O(new rows) whatever
+    the length of the stored history.
+
+    Checks:
+        schema      the endpoint has no numeric column, or a column of the category schema holds text
+        duplicates  rows share a start_time with different values. Identical duplicates are only a warning.
+        values      infinite values
+        continuity  rows out of order, gaps or spacing that is not a multiple of the endpoint frequency
+        outliers    changes further than VALIDATION_OUTLIER_THRESHOLD standard deviations from the history
+        columns     columns of JSONExtractor.ENDPOINT_COLUMNS that no endpoint of the category provided
+
+    Issues of the checks in reject_checks are errors and reject the batch of their endpoint, the others are warnings.
+    """
+
+    def __init__(self, state: Optional[ValidationState] = None, reject_checks: Optional[List[str]] = None,
+                 outlier_threshold: float = VALIDATION_OUTLIER_THRESHOLD, outlier_span: int = VALIDATION_OUTLIER_SPAN,
+                 min_history: int = VALIDATION_MIN_HISTORY):
+        self.state = state or ValidationState()
+        self.reject_checks = set(VALIDATION_REJECT_CHECKS if reject_checks is None else reject_checks)
+        self.outlier_threshold = outlier_threshold
+        self.alpha = 2 / (outlier_span + 1)
+        self.min_history = min_history
+
+    def validate(self, symbol: str, category: str, responses: List[EndpointSeries],
+                 frequencies: Optional[Dict[str, Optional[int]]] = None) -> ResponseModel:
+        """
+        :param category: Storage category of the responses
+        :param frequencies: Seconds between two rows of each endpoint, continuity is not checked without one
+        :return: ResponseModel with the responses that passed, and the issues found. is_success is False if any
+            endpoint has been rejected.
+        """
+        frequencies = frequencies or {}
+        issues: List[ValidationIssue] = []
+        valid, rejected = [], []
+        for response in responses:
+            state = self.state.get(symbol, category, response.endpoint)
+            endpoint_issues = self._validate_series(response, category, frequencies.get(response.endpoint), state)
+            issues.extend(endpoint_issues)
+            if any(issue.severity == "error" for issue in endpoint_issues):
+                rejected.append(response)
+            else:
+                valid.append(response)
+
+        issues.extend(self._check_columns(responses, category))
+        message = None
+        if issues:
+            message = "; ".join(f"{issue.endpoint or category}: {issue.message}" for issue in issues)
+        return ResponseModel(is_success=not rejected, message=message, data=valid, issues=issues)
+
+    def update(self, symbol: str, category: str, responses: List[EndpointSeries]):
+        """
+        Advance the validation state with the rows of stored responses. Call save on the state to persist it.
+        """
+        for response in responses:
+            state = self.state.get(symbol, category, response.endpoint)
+            new_rows = self._get_new_rows(response, state["start_time"])
+            if not len(new_rows):
+                continue
+
+            columns = dict(state["columns"])
+            for name, values in response.columns.items():
+                if values.dtype.kind == "f":
+                    columns[name] = self._update_stats(columns.get(name), values[new_rows])
+            self.state.set(symbol, category, response.endpoint, {
+                "start_time": int(response.start_time[new_rows[-1]]), "columns": columns
+            })
+
+    def _validate_series(self, series: EndpointSeries, category: str, frequency: Optional[int],
+                         state: Dict) -> List[ValidationIssue]:
+        # Streamed responses carry no rows, their batches have been validated as they were written
+        if not len(series):
+            return []
+
+        endpoint = series.endpoint
+        issues = []
+        numeric = {name: values for name, values in series.columns.items() if values.dtype.kind == "f"}
+        expected = set(JSONExtractor.ENDPOINT_COLUMNS.get(category, []))
+        text = [name for name, values in series.columns.items() if values.dtype.kind != "f" and name in expected]
+        if not numeric:
+            issues.append(self._issue("schema", "no numeric columns", endpoint))
+        if text:
+            issues.append(self._issue("schema", f"non-numeric values in {', '.join(text)}", endpoint, len(text)))
+
+        infinite = sum(int(np.count_nonzero(np.isinf(values))) for values in numeric.values())
+        if infinite:
+            issues.append(self._issue("values", f"{infinite} infinite values", endpoint, infinite))
+
+        issues.extend(self._check_duplicates(series, numeric))
+        new_rows = self._get_new_rows(series, state["start_time"])
+        if frequency and len(new_rows):
+            issues.extend(self._check_continuity(series, new_rows, frequency, state["start_time"]))
+        if len(new_rows):
+            issues.extend(self._check_outliers(endpoint, numeric, new_rows, state["columns"]))
+        return issues
+
+    def _check_duplicates(self, series: EndpointSeries, numeric: Dict[str, np.ndarray]) -> List[ValidationIssue]:
+        order = np.argsort(series.start_time, kind="stable")
+        times = series.start_time[order]
+        duplicated = np.flatnonzero(times[1:] == times[:-1]) + 1
+        if not len(duplicated):
+            return []
+
+        conflicting = np.zeros(len(duplicated), dtype=bool)
+        for values in numeric.values():
+            current, previous = values[order[duplicated]], values[order[duplicated - 1]]
+            conflicting |= ~((current == previous) | (np.isnan(current) & np.isnan(previous)))
+
+        count = int(np.count_nonzero(conflicting))
+        if count:
+            return [self._issue("duplicates", f"{count} duplicated start times with conflicting values",
+                                series.endpoint, count)]
+        return [self._issue("duplicates", f"{len(duplicated)} identical duplicated rows", series.endpoint,
+                            len(duplicated), rejectable=False)]
+
+    def _check_continuity(self, series: EndpointSeries, new_rows: np.ndarray, frequency: int,
+                          last_start_time: Optional[int]) -> List[ValidationIssue]:
+        issues = []
+        unordered = int(np.count_nonzero(np.diff(series.start_time) < 0))
+        if unordered:
+            issues.append(self._issue("continuity", f"{unordered} rows out of order", series.endpoint, unordered))
+
+        step = frequency * 1000
+        times = series.start_time[new_rows]
+        if last_start_time is not None:
+            times = np.concatenate(([last_start_time], times))
+        steps = np.diff(times)
+
+        irregular = int(np.count_nonzero(steps % step))
+        if irregular:
+            issues.append(self._issue("continuity", f"{irregular} rows off the {frequency}s frequency",
+                                      series.endpoint, irregular))
+
+        gaps = np.flatnonzero((steps > step) & (steps % step == 0))
+        if len(gaps):
+            missing = int((steps[gaps] // step - 1).sum())
+            first = datetime.fromtimestamp(times[gaps[0]] / 1000, tz=timezone.utc).strftime("%Y-%m-%d %H:%M")
+            issues.append(self._issue("continuity", f"{missing} missing rows in {len(gaps)} gaps, the first after "
+                                                    f"{first}", series.endpoint, missing))
+        return issues
+
+    def _check_outliers(self, endpoint: str, numeric: Dict[str, np.ndarray], new_rows: np.ndarray,
+                        stats: Dict[str, List[float]]) -> List[ValidationIssue]:
+        outliers = {}
+        for name, values in numeric.items():
+            if name not in stats or stats[name][3] < self.min_history:
+                continue
+            last, mean, mean_square, _ = stats[name]
+            std = np.sqrt(max(mean_square - mean ** 2, 0.0))
+            if not std:
+                continue
+
+            # Each change is compared to the statistics before the batch, which the batch does not skew
+            changes = np.diff(np.concatenate(([last], self._forward_fill(values[new_rows], last))))
+            count = int(np.count_nonzero(np.abs(changes - mean) > self.outlier_threshold * std))
+            if count:
+                outliers[name] = count
+
+        if not outliers:
+            return []
+        columns = ", ".join(f"{name} ({count})" for name, count in outliers.items())
+        return [self._issue("outliers", f"outlying changes in {columns}", endpoint, sum(outliers.values()))]
+
+    def _check_columns(self, responses: List[EndpointSeries], category: str) -> List[ValidationIssue]:
+        responses = [response for response in responses if len(response)]
+        if not responses or category not in JSONExtractor.ENDPOINT_COLUMNS:
+            return []
+
+        provided = {name for response in responses for name in response.columns}
+        missing = [name for name in JSONExtractor.ENDPOINT_COLUMNS[category] if name not in provided]
+        if not missing:
+            return []
+        return [self._issue("columns", f"missing columns {', '.join(missing)}", None, len(missing))]
+
+    def _update_stats(self, stats: Optional[List[float]], values: np.ndarray) -> List[float]:
+        values = values[~np.isnan(values)]
+        last, mean, mean_square, count = stats or [float("nan"), 0.0, 0.0, 0]
+        if not len(values):
+            return [last, mean, mean_square, count]
+
+        changes = np.diff(np.concatenate(([last], values))) if last == last else np.diff(values)
+        changes = changes[np.isfinite(changes)]
+        n = len(changes)
+        if n:
+            # Closed form of n steps of the exponentially weighted recursion m = (1 - a) * m + a * x
+            decay = 1 - self.alpha
+            weights = self.alpha * decay ** np.arange(n - 1, -1, -1)
+            if count == 0:
+                mean, mean_square = float(changes[0]), float(changes[0] ** 2)
+            mean = decay ** n * mean + float(weights @ changes)
+            mean_square = decay ** n * mean_square + float(weights @ changes ** 2)
+        return [float(values[-1]), mean, mean_square, count + n]
+
+    def _issue(self, check: str, message: str, endpoint: Optional[str], count: int = 0,
+               rejectable: bool = True) -> ValidationIssue:
+        severity = "error" if rejectable and check in self.reject_checks else "warning"
+        return ValidationIssue(check=check, severity=severity, message=message, endpoint=endpoint, count=count)
+
+    @staticmethod
+    def _get_new_rows(series: EndpointSeries, last_start_time: Optional[int]) -> np.ndarray:
+        """
+        Positions of the rows after the last validated start_time, in time order and keeping the last of duplicates
+        """
+        order = np.argsort(series.start_time, kind="stable")
+        times = series.start_time[order]
+        keep = np.append(times[1:] != times[:-1], True)
+        if last_start_time is not None:
+            keep &= times > last_start_time
+        return order[keep]
+
+    @staticmethod
+    def _forward_fill(values: np.ndarray, last: float) -> np.ndarray:
+        # A missing value repeats the previous one, so that it neither counts as a change nor hides the next one
+        filled = np.concatenate(([last], values))
+        positions = np.where(np.isnan(filled), 0, np.arange(len(filled)))
+        return filled[np.maximum.accumulate(positions)][1:]
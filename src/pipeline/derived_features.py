@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+import os
+import logging
+import threading
+from typing import Dict, List, Literal, Optional
+
+import numpy as np
+import pyarrow as pa
+from pydantic import BaseModel
+
+from config.paths import PROCESSED_DATA_DIR
+from src.models.response_model import ResponseModel
+from src.pipeline.feature_store import FeatureStore
+from src.pipeline.json_extractor import JSONExtractor
+from src.storage.columnar_store import ColumnarStore
+from src.utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+class DerivedFeature(BaseModel):
+    """
+    Declaration of a feature derived from the columns of a merged frame or a FeatureStore matrix.
+    Columns of a matrix are referenced by their full {symbol}/{category}/{column} name.
+    """
+    name: str
+    kind: Literal["rolling_mean", "rolling_std", "zscore", "pct_change", "ewm_mean", "ratio"]
+    column: str
+    window: Optional[int] = None  # Rolling window, pct_change periods or EWM span
+    denominator: Optional[str] = None  # Denominator column of a ratio
+
+    @property
+    def input_columns(self) -> List[str]:
+        return [self.column] if self.denominator is None else [self.column, self.denominator]
+
+
+def get_default_features(symbol: str) -> List[DerivedFeature]:
+    exchange_flows, market_data = f"{symbol}/exchange-flows", f"{symbol}/market-data"
+    return [
+        DerivedFeature(name=f"{symbol}/netflow_total_zscore_30", kind="zscore",
+                       column=f"{exchange_flows}/netflow_total", window=30),
+        DerivedFeature(name=f"{symbol}/close_return_1", kind="pct_change", column=f"{market_data}/close", window=1),
+        DerivedFeature(name=f"{symbol}/close_ewm_14", kind="ewm_mean", column=f"{market_data}/close", window=14),
+        DerivedFeature(name=f"{symbol}/volume_std_30", kind="rolling_std", column=f"{market_data}/volume", window=30),
+        DerivedFeature(name=f"{symbol}/inflow_volume_ratio", kind="ratio", column=f"{exchange_flows}/inflow_total",
+                       denominator=f"{market_data}/volume"),
+    ]
+
+
+def get_input_categories(features: List[DerivedFeature]) -> List[str]:
+    """
+    Categories of the {symbol}/{category}/{column} input columns of the features
+    """
+    return list(dict.fromkeys(column.split("/")[1] for feature in features for column in feature.input_columns))
+
+
+class DerivedFeatureEngine:
+    """
+    Compute derived features vectorized over the full history once, then update them from new rows only.
+    Between runs the engine persists the last rows of every input column and of every EWM, which is all the state the
+    rolling windows and EWM recursions need.
+    """
+
+    # Extra rows kept in the state, so that a batch may revise the most recent rows that were already processed
+    OVERLAP_ROWS = 7
+
+    def __init__(self, features: List[DerivedFeature], state_path: Optional[str] = None):
+        known_columns = {column for columns in JSONExtractor.ENDPOINT_COLUMNS.values() for column in columns}
+        for feature in features:
+            for column in feature.input_columns:
+                if column.split("/")[-1] not in known_columns:
+                    raise ValueError(f"{feature.name}: {column} is not a column of ENDPOINT_COLUMNS")
+            if feature.kind == "ratio" and feature.denominator is None:
+                raise ValueError(f"{feature.name}: ratio features require a denominator")
+            if feature.kind != "ratio" and not feature.window:
+                raise ValueError(f"{feature.name}: {feature.kind} features require a window")
+
+        self.features = features
+        self.state_path = state_path or os.path.join(PROCESSED_DATA_DIR, "derived_features_state.json")
+        self.inputs: Dict[str, pd.Series] = {}
+        self.ewm: Dict[str, pd.Series] = {}
+
+    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute every feature over the full frame and reset the state to its last rows
+        :param df: Frame with a sorted date index containing the input columns
+        :return: Derived features indexed like df
+        """
+        result = pd.DataFrame({feature.name: self._compute_feature(feature, df) for feature in self.features},
+                              index=df.index)
+        self._update_state(df, result)
+        return result
+
+    def update(self, new_rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute every feature for new rows only, reusing the state of the previous run. The cost is O(window + new
+        rows). New rows may overlap the last OVERLAP_ROWS rows already processed, which are then recomputed. A larger
+        overlap raises a ValueError, since the state no longer holds the rows its windows reach back to.
+        :param new_rows: New rows with a sorted date index containing the input columns
+        :return: Derived features of the new rows
+        """
+        if not self.inputs:
+            self.load_state()
+        if not self.inputs:
+            return self.compute(new_rows)
+
+        first_new = new_rows.index[0]
+        self._check_overlap(first_new)
+        history = pd.DataFrame({column: tail[tail.index < first_new] for column, tail in self.inputs.items()})
+        combined = pd.concat([history, new_rows[list(self.inputs.keys())]]).sort_index()
+
+        result = {}
+        for feature in self.features:
+            if feature.kind == "ewm_mean":
+                result[feature.name] = self._update_ewm(feature, new_rows[feature.column])
+            else:
+                result[feature.name] = self._compute_feature(feature, combined).loc[new_rows.index]
+
+        result = pd.DataFrame(result, index=new_rows.index)
+        self._update_state(combined, result)
+        return result
+
+    def get_update_start(self) -> Optional[pd.Timestamp]:
+        """
+        First date to pass to update() so that the last OVERLAP_ROWS processed rows are recomputed, which picks up
+        revised rows and the columns of categories that arrived later than the others
+        :return: Date, or None if there is no state and the full history has to be computed
+        """
+        if not self.inputs:
+            return None
+        dates = pd.DatetimeIndex([]).append([tail.index for tail in self.inputs.values()]).unique().sort_values()
+        return dates[-min(len(dates), self.OVERLAP_ROWS)]
+
+    def save_state(self):
+        state = {
+            "inputs": {column: self._series_to_dict(tail) for column, tail in self.inputs.items()},
+            "ewm": {name: self._series_to_dict(tail) for name, tail in self.ewm.items()},
+        }
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        try:
+            with open(self.state_path, "w") as f:
+                json.dump(state, f)
+        except IOError as e:
+            logger.error(f"Error saving derived feature state to {self.state_path}: {e}")
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return
+
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            logger.error(f"Error loading derived feature state from {self.state_path}: {e}")
+            return
+
+        self.inputs = {column: self._dict_to_series(tail) for column, tail in state["inputs"].items()}
+        self.ewm = {name: self._dict_to_series(tail) for name, tail in state["ewm"].items()}
+
+    def _compute_feature(self, feature: DerivedFeature, df: pd.DataFrame) -> pd.Series:
+        values = df[feature.column]
+
+        if feature.kind == "rolling_mean":
+            return values.rolling(feature.window).mean()
+        if feature.kind == "rolling_std":
+            return values.rolling(feature.window).std()
+        if feature.kind == "zscore":
+            rolling = values.rolling(feature.window)
+            return (values - rolling.mean()) / rolling.std()
+        if feature.kind == "pct_change":
+            return values / values.shift(feature.window) - 1
+        if feature.kind == "ewm_mean":
+            return values.ewm(span=feature.window, adjust=False).mean()
+        return values / df[feature.denominator].replace(0, np.nan)
+
+    def _update_ewm(self, feature: DerivedFeature, values: pd.Series) -> pd.Series:
+        tail = self.ewm.get(feature.name)
+        seed = None if tail is None else tail[tail.index < values.index[0]]
+
+        if seed is None or seed.empty:
+            if tail is not None and len(tail):
+                raise ValueError(f"{feature.name}: new rows overlap more than the {self.OVERLAP_ROWS} rows kept "
+                                 f"in the state. Run compute() over the full history instead.")
+            return values.ewm(span=feature.window, adjust=False).mean()
+
+        # With adjust=False the EWM is a plain recursion, so seeding it with the last value continues the series
+        seeded = pd.concat([seed.iloc[-1:], values])
+        return seeded.ewm(span=feature.window, adjust=False).mean().iloc[1:]
+
+    def _check_overlap(self, first_new: pd.Timestamp):
+        # A full tail may have dropped older rows, so a window reaching before it would be computed from missing rows.
+        # A shorter tail holds every row seen so far.
+        tail_lengths = self._get_tail_lengths()
+        for feature in self.features:
+            if feature.kind in ("ewm_mean", "ratio"):
+                continue
+            tail = self.inputs.get(feature.column)
+            if tail is None or len(tail) < tail_lengths[feature.column]:
+                continue
+            if (tail.index < first_new).sum() < feature.window:
+                raise ValueError(f"{feature.name}: new rows overlap more than the {self.OVERLAP_ROWS} rows kept "
+                                 f"in the state. Run compute() over the full history instead.")
+
+    def _get_tail_lengths(self) -> Dict[str, int]:
+        tail_lengths: Dict[str, int] = {}
+        for feature in self.features:
+            for column in feature.input_columns:
+                tail_lengths[column] = max(tail_lengths.get(column, 0), (feature.window or 1) + self.OVERLAP_ROWS)
+        return tail_lengths
+
+    def _update_state(self, inputs: pd.DataFrame, result: pd.DataFrame):
+        for column, length in self._get_tail_lengths().items():
+            tail = inputs[column].iloc[-length:]
+            previous = self.inputs.get(column)
+            if previous is not None:
+                tail = pd.concat([previous[previous.index < tail.index[0]], tail]).iloc[-length:]
+            self.inputs[column] = tail
+
+        for feature in self.features:
+            if feature.kind == "ewm_mean":
+                self.ewm[feature.name] = result[feature.name].iloc[-(self.OVERLAP_ROWS + 1):]
+
+    @staticmethod
+    def _series_to_dict(series: pd.Series) -> Dict[str, List]:
+        index = pd.DatetimeIndex(series.index)
+        return {"index": [int(ts.value // 10 ** 6) for ts in index], "values": series.tolist()}
+
+    @staticmethod
+    def _dict_to_series(data: Dict[str, List]) -> pd.Series:
+        index = pd.DatetimeIndex(pd.to_datetime(data["index"], unit="ms"), name="date")
+        return pd.Series(data["values"], index=index, dtype=np.float64)
+
+
+DERIVED_FEATURES_CATEGORY = "derived-features"
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+def update_derived_features(symbol: str, categories: Optional[List[str]] = None,
+                            features: Optional[List[DerivedFeature]] = None,
+                            feature_store: Optional[FeatureStore] = None,
+                            state_dir: Optional[str] = None) -> ResponseModel:
+    """
+    Update the derived features of a symbol after new raw rows have been saved. Only the rows from the persisted
+    state onwards are loaded and computed, and they are upserted into the derived-features dataset of the processed
+    store.
+    :param categories: Storage categories that have been saved, the features are only updated if one is an input
+    :param features: Features to update, defaults to get_default_features
+    :param state_dir: Directory of the engine states, one file per symbol
+    :return: ResponseModel with the features of the updated rows, or no data if none of the inputs changed
+    """
+    features = features or get_default_features(symbol)
+    input_categories = get_input_categories(features)
+    if categories is not None and not set(categories) & set(input_categories):
+        return ResponseModel(is_success=True, message="None of the input categories changed", data=None)
+
+    state_path = os.path.join(state_dir or os.path.join(PROCESSED_DATA_DIR, "derived_features"), f"{symbol}.json")
+    with _locks_lock:
+        lock = _locks.setdefault(state_path, threading.Lock())
+
+    # Updates of the same symbol from several ingestion jobs would interleave their states
+    with lock:
+        engine = DerivedFeatureEngine(features, state_path)
+        engine.load_state()
+        columns = list(dict.fromkeys(column for feature in features for column in feature.input_columns))
+        response = (feature_store or FeatureStore()).get_matrix(
+            [symbol], input_categories, [column.split("/")[-1] for column in columns],
+            start=engine.get_update_start(), use_cache=False)
+        if not response.is_success:
+            return response
+
+        matrix = response.data.reindex(columns=columns)
+        if matrix.empty:
+            return ResponseModel(is_success=True, message=None, data=None)
+
+        try:
+            result = engine.update(matrix)
+            ColumnarStore(PROCESSED_DATA_DIR).write_frame(symbol, DERIVED_FEATURES_CATEGORY, result, overwrite=False)
+        except (ValueError, OSError, pa.ArrowException) as e:
+            logger.error(f"Error updating the derived features of {symbol}: {e}")
+            return ResponseModel(is_success=False, message=f"Failed to update the derived features: {e}", data=None)
+        # The state only advances once the features it describes have been stored
+        engine.save_state()
+
+    logger.info(f"Updated {len(features)} derived features of {symbol} over {len(result)} rows")
+    return ResponseModel(is_success=True, message=None, data=result)
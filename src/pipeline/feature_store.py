@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from config.paths import PROCESSED_DATA_DIR
+from src.models.response_model import ResponseModel
+from src.pipeline.json_extractor import JSONExtractor
+from src.storage.columnar_store import DateLike
+from src.utils.utils import get_raw_data_files
+from src.utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+class FeatureStore:
+    """
+    Build aligned feature matrices across symbols and categories. Matrices are cached in memory and on disk, keyed by
+    the request and by the mtimes and sizes of the raw files they were built from, so that repeated model runs skip
+    re-parsing and re-joining until new data lands. A matrix built from newer raw files replaces the cached one.
+    """
+
+    MEMORY_CACHE_SIZE = 16
+    DTYPES = {"float64": np.float64, "float32": np.float32}
+
+    def __init__(self, cache_dir: Optional[str] = None, extractor: Optional[JSONExtractor] = None):
+        self.cache_dir = str(cache_dir or os.path.join(PROCESSED_DATA_DIR, "feature_cache"))
+        self.extractor = extractor or JSONExtractor()
+        self._memory_cache: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+
+    def get_matrix(self, symbols: List[str], categories: Optional[List[str]] = None,
+                   columns: Optional[List[str]] = None, start: DateLike = None, end: DateLike = None,
+                   dtype: str = "float64", use_cache: bool = True) -> ResponseModel:
+        """
+        Get the feature matrix of the given symbols and categories, outer-joined on date
+        :param symbols: Symbols to include
+        :param categories: Categories to include, defaults to every category in ENDPOINT_COLUMNS
+        :param columns: Columns to include from every category, defaults to all columns
+        :param start: Inclusive start date
+        :param end: Inclusive end date
+        :param dtype: "float64" or "float32"
+        :param use_cache: Look the matrix up in the cache and cache it. Matrices of one-off ranges, e.g. the rows of an
+            incremental update, are better built directly.
+        :return: ResponseModel with a DataFrame whose columns are named {symbol}/{category}/{column}
+        """
+        categories = categories or list(JSONExtractor.ENDPOINT_COLUMNS.keys())
+
+        invalid = [category for category in categories if category not in JSONExtractor.ENDPOINT_COLUMNS]
+        if invalid or dtype not in self.DTYPES:
+            return ResponseModel(is_success=False, data=None,
+                                 message=f"Invalid categories {invalid} or dtype {dtype}. Failed to build features.")
+
+        missing = [f"{symbol}/{category}" for symbol in symbols for category in categories
+                   if not get_raw_data_files(symbol, category)]
+        if missing:
+            return ResponseModel(is_success=False, data=None, message=f"No data stored for {', '.join(missing)}")
+
+        key = self._get_cache_key(symbols, categories, columns, start, end, dtype) if use_cache else None
+        matrix = None if key is None else self._load_cached(key)
+        if matrix is None:
+            matrix = self._build_matrix(symbols, categories, columns, start, end, dtype)
+            if matrix is None:
+                return ResponseModel(is_success=False, data=None,
+                                     message="No data stored for some of the categories. Failed to build features.")
+            if key is not None:
+                self._save_cached(key, matrix)
+
+        return ResponseModel(is_success=True, message=None, data=matrix)
+
+    def clear(self):
+        self._memory_cache.clear()
+        if os.path.isdir(self.cache_dir):
+            for filename in os.listdir(self.cache_dir):
+                os.remove(os.path.join(self.cache_dir, filename))
+
+    def _build_matrix(self, symbols: List[str], categories: List[str], columns: Optional[List[str]],
+                      start: DateLike, end: DateLike, dtype: str) -> Optional[pd.DataFrame]:
+        frames = []
+        for symbol in symbols:
+            for category in categories:
+                df = self.extractor.load_frame(symbol, category)
+                if df is None:
+                    logger.warning(f"No data stored for {symbol}/{category}")
+                    return None
+                if columns is not None:
+                    df = df[[column for column in df.columns if column in columns]]
+                frames.append(df.add_prefix(f"{symbol}/{category}/"))
+
+        matrix = pd.concat(frames, axis=1, join="outer", sort=True)
+        if start is not None or end is not None:
+            matrix = matrix.loc[self._to_timestamp(start):self._to_timestamp(end)]
+        return matrix.astype(self.DTYPES[dtype])
+
+    def _load_cached(self, key: str) -> Optional[pd.DataFrame]:
+        if key in self._memory_cache:
+            self._memory_cache.move_to_end(key)
+            return self._memory_cache[key]
+
+        filepath = os.path.join(self.cache_dir, f"{key}.parquet")
+        if not os.path.exists(filepath):
+            return None
+
+        matrix = pd.read_parquet(filepath)
+        self._remember(key, matrix)
+        return matrix
+
+    def _save_cached(self, key: str, matrix: pd.DataFrame):
+        self._remember(key, matrix)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            matrix.to_parquet(os.path.join(self.cache_dir, f"{key}.parquet"))
+            self._remove_superseded(key)
+        except OSError as e:
+            logger.error(f"Error caching feature matrix {key}: {e}")
+
+    def _remove_superseded(self, key: str):
+        # Matrices of the same request built from older raw files can never be hit again
+        prefix = key.split("-")[0] + "-"
+        for stale_key in [cached for cached in self._memory_cache if cached.startswith(prefix) and cached != key]:
+            del self._memory_cache[stale_key]
+        for filename in os.listdir(self.cache_dir):
+            if filename.startswith(prefix) and filename != f"{key}.parquet":
+                try:
+                    os.remove(os.path.join(self.cache_dir, filename))
+                except FileNotFoundError:
+                    pass
+
+    def _remember(self, key: str, matrix: pd.DataFrame):
+        self._memory_cache[key] = matrix
+        self._memory_cache.move_to_end(key)
+        while len(self._memory_cache) > self.MEMORY_CACHE_SIZE:
+            self._memory_cache.popitem(last=False)
+
+    def _get_cache_key(self, symbols: List[str], categories: List[str], columns: Optional[List[str]],
+                       start: DateLike, end: DateLike, dtype: str) -> str:
+        sources = []
+        for symbol in symbols:
+            for category in categories:
+                for filepath in get_raw_data_files(symbol, category):
+                    stat = os.stat(filepath)
+                    sources.append([filepath, stat.st_mtime_ns, stat.st_size])
+
+        request = {
+            "symbols": symbols, "categories": categories, "columns": columns,
+            "start": None if start is None else str(self._to_timestamp(start)),
+            "end": None if end is None else str(self._to_timestamp(end)),
+            "dtype": dtype
+        }
+        # The request and the sources are hashed separately, so that newer sources supersede the cached matrix
+        return (hashlib.sha256(json.dumps(request).encode()).hexdigest()[:32] + "-"
+                + hashlib.sha256(json.dumps(sources).encode()).hexdigest()[:16])
+
+    @staticmethod
+    def _to_timestamp(value: DateLike) -> Optional[pd.Timestamp]:
+        if value is None:
+            return None
+        if isinstance(value, (int, float)):
+            return pd.Timestamp(int(value), unit="ms")
+        return pd.Timestamp(value)
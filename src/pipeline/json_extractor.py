@@ -1,15 +1,23 @@
-import json
+from __future__ import annotations
+
 import os
 import logging
 from json import JSONDecodeError
 
 import numpy as np
-import pandas as pd
-from datetime import datetime
-from typing import Dict
+import pyarrow as pa
+from typing import Dict, List, Optional, Union
 from src.models.response_model import ResponseModel
-from src.utils.utils import load_json
-from config.paths import RAW_DATA_DIR, PROCESSED_DATA_DIR, ETL_LOG_DIR
+from src.models.endpoint_series import EndpointSeries
+from src.utils.utils import load_responses
+from src.storage.columnar_store import ColumnarStore
+from src.storage.timeseries_db import get_timeseries_db
+from src.utils.instrumentation import get_metrics
+from src.utils.lazy_import import lazy_import
+from config.paths import RAW_DATA_DIR, PROCESSED_DATA_DIR
+from config.settings import STORAGE_BACKEND
+
+pd = lazy_import("pandas")
 
 logger = logging.getLogger(__name__)
 
@@ -48,34 +56,54 @@ class JSONExtractor:
         ]
     }
 
+    # Columns declared as int64. They fall back to float64 when the aligned column has gaps.
+    INTEGER_COLUMNS = {
+        "transactions_count_inflow", "transactions_count_outflow", "addresses_count_inflow", "addresses_count_outflow",
+        "transactions_count_total", "addresses_count_active", "addresses_count_sender", "addresses_count_receiver"
+    }
+
     def __init__(self):
-        self.data = pd.DataFrame()
+        # Merged frame of the last extraction
+        self.data: Optional[pd.DataFrame] = None
+        # Seconds spent in each phase of the last extraction: load, build and write
+        self.timings: Dict[str, float] = {}
 
     def extract(self, symbol: str, category: str) -> ResponseModel:
 
         if category not in self.ENDPOINT_COLUMNS.keys():
             return ResponseModel(is_success=False, message="Not a valid category. Failed to fetch JSON data.", data=None)
 
-        # Read the JSON file
+        metrics = get_metrics()
+        self.timings = {}
+
+        # Read the raw responses
         try:
-            json_filename = os.path.join(RAW_DATA_DIR, f"long-{symbol}-{category}.json")
-            responses = load_json(json_filename)
-            if responses is None:
+            with metrics.span("extractor_load", category=category) as span:
+                endpoint_columns = self._load_endpoint_columns(symbol, category)
+            self.timings["load"] = span.duration
+            if endpoint_columns is None:
                 return ResponseModel(is_success=False, message="Failed to load. The data is empty.", data=None)
-        except (IOError, JSONDecodeError) as err:
+        except (IOError, JSONDecodeError, pa.ArrowException) as err:
             return ResponseModel(is_success=False, message="Failed to load JSON data", data=None)
 
-        # Extract data into Pandas DataFrames and merge into single dataframe
-        df_list = []
-        for response in responses:
-            df = pd.DataFrame(response["data"]).drop(columns="start_time").set_index("date")
-            df_list.append(df)
+        # Merge the endpoints into a single dataframe
+        with metrics.span("extractor_build", category=category) as span:
+            self.data = self.merge_endpoints(endpoint_columns, category)
+        self.timings["build"] = span.duration
+
+        with metrics.span("extractor_write", category=category) as span:
+            response = self._save(symbol, category)
+        self.timings["write"] = span.duration
+        return response
 
-        self.data = pd.concat(df_list, sort=True, axis=1)
+    def _save(self, symbol: str, category: str) -> ResponseModel:
+        if STORAGE_BACKEND == "parquet":
+            return self._save_parquet(symbol, category)
 
         # Save CSV
         try:
             csv_filename = f"long-{symbol}-{category}.csv"
+            os.makedirs(RAW_DATA_DIR, exist_ok=True)
             self.data.to_csv(os.path.join(RAW_DATA_DIR, csv_filename))
             logger.info(f"{csv_filename} has been saved successfully.")
             return ResponseModel(is_success=True, message=None, data=self.data)
@@ -83,33 +111,116 @@ class JSONExtractor:
             logger.error(f"An error occurred while saving CSV file: {e}")
             return ResponseModel(is_success=True, message=f"An error occurred while saving CSV file: {e}", data=None)
 
-if __name__ == "__main__":
-    extractor = JSONExtractor()
-
-    extracted_market_data = extractor.extract("btc", "market-data")
-    if not extracted_market_data.is_success:
-        print("Failed to extract market data")
-
-    extracted_miner_flows = extractor.extract("btc", "miner-flows")
-    if not extracted_miner_flows.is_success:
-        print("Failed to extract miner flows data")
-
-    extracted_exchange_flows = extractor.extract("btc", "exchange-flows")
-    if not extracted_exchange_flows.is_success:
-        print("Failed to extract exchange flows data")
+    def load_frame(self, symbol: str, category: str) -> Optional[pd.DataFrame]:
+        """
+        Load and merge the raw endpoints of a symbol and category without saving the result
+        :return: Merged DataFrame, or None if nothing is stored for the category
+        """
+        endpoint_columns = self._load_endpoint_columns(symbol, category)
+        if endpoint_columns is None:
+            return None
+        return self.merge_endpoints(endpoint_columns, category)
+
+    def merge_series(self, responses: List[Union[EndpointSeries, Dict]], category: str) -> pd.DataFrame:
+        """
+        Merge fetched series, e.g. the ResponseModel.data of a connector, whose arrays are used as they are
+        :param responses: Series, or responses in the row format
+        """
+        return self.merge_endpoints([EndpointSeries.from_response(response).to_columns() for response in responses],
+                                    category)
+
+    def merge_endpoints(self, endpoint_columns: List[Dict[str, np.ndarray]], category: str) -> pd.DataFrame:
+        """
+        Align the columns of every endpoint on the sorted union of their start times. ENDPOINT_COLUMNS declares the
+        column order, and columns in INTEGER_COLUMNS are kept as int64 when they have no gaps.
+        :param endpoint_columns: Columns of each endpoint, including a start_time column in milliseconds. Text
+            columns are skipped.
+        :param category: Category of the endpoints
+        :return: DataFrame with a datetime64 index named date
+        """
+        endpoint_columns = [columns for columns in endpoint_columns if len(columns.get("start_time", ()))]
+        if not endpoint_columns:
+            return pd.DataFrame(index=pd.DatetimeIndex([], dtype="datetime64[ms]", name="date"))
+
+        index = np.unique(np.concatenate([columns["start_time"] for columns in endpoint_columns]))
+
+        merged: Dict[str, np.ndarray] = {}
+        for columns in endpoint_columns:
+            positions = np.searchsorted(index, columns["start_time"])
+            for name, values in columns.items():
+                if name == "start_time" or values.dtype.kind not in "fiub":
+                    continue
+                if name not in merged:
+                    merged[name] = np.full(len(index), np.nan)
+                merged[name][positions] = values
+
+        schema = [name for name in self.ENDPOINT_COLUMNS[category] if name in merged]
+        extra = sorted(merged.keys() - set(schema))
+
+        data = {}
+        for name in schema + extra:
+            column = merged[name]
+            if name in self.INTEGER_COLUMNS and not np.isnan(column).any():
+                column = column.astype(np.int64)
+            data[name] = column
+
+        return pd.DataFrame(data, index=pd.DatetimeIndex(index.astype("datetime64[ms]"), name="date"), copy=False)
+
+    def _load_endpoint_columns(self, symbol: str, category: str) -> Optional[List[Dict[str, np.ndarray]]]:
+        if STORAGE_BACKEND == "parquet":
+            store = ColumnarStore(RAW_DATA_DIR)
+            endpoints = store.list_endpoints(symbol, category)
+            if not endpoints:
+                return None
+
+            # Parquet columns are already typed, so the numeric ones are handed over as NumPy arrays without building
+            # rows. Text fields such as the exchange of an endpoint are not features.
+            tables = [store.read(symbol, category, endpoint) for endpoint in endpoints]
+            return [{name: table[name].to_numpy(zero_copy_only=False) for name in table.column_names
+                     if name == "start_time" or self._is_numeric(table.schema.field(name).type)} for table in tables]
+
+        if STORAGE_BACKEND == "sqlite":
+            # The database pivots the metrics of each endpoint into aligned columns in one query. Endpoints are read
+            # separately, so that a metric of several endpoints is merged like on the Parquet path.
+            database = get_timeseries_db(RAW_DATA_DIR)
+            endpoints = database.list_endpoints(symbol, category)
+            if not endpoints:
+                return None
+            return [database.read_wide(symbol, category, endpoint=endpoint) for endpoint in endpoints]
+
+        responses = load_responses(symbol, category)
+        if responses is None:
+            return None
+        return [self._rows_to_columns(response["data"]) for response in responses]
+
+    @staticmethod
+    def _rows_to_columns(rows: List[Dict]) -> Dict[str, np.ndarray]:
+        # Arrow infers the type of each field in one pass. Nulls and missing fields become NaN in the numeric
+        # columns, and text fields are left out like on the Parquet path.
+        return EndpointSeries.from_rows("", rows).to_columns()
+
+    @staticmethod
+    def _is_numeric(data_type: pa.DataType) -> bool:
+        return pa.types.is_integer(data_type) or pa.types.is_floating(data_type) or pa.types.is_boolean(data_type)
+
+    def _save_parquet(self, symbol: str, category: str) -> ResponseModel:
+        try:
+            ColumnarStore(PROCESSED_DATA_DIR).write_frame(symbol, category, self.data)
+            logger.info(f"{symbol}/{category} has been saved to {PROCESSED_DATA_DIR} successfully.")
+            return ResponseModel(is_success=True, message=None, data=self.data)
+        except Exception as e:
+            logger.error(f"An error occurred while saving Parquet dataset: {e}")
+            return ResponseModel(is_success=True, message=f"An error occurred while saving Parquet dataset: {e}",
+                                 data=None)
 
-    extracted_network_data = extractor.extract("btc", "network-data")
-    if not extracted_network_data.is_success:
-        print("Failed to extract network data")
+if __name__ == "__main__":
+    from src.pipeline.batch_extractor import BatchExtractor
 
-    extracted_flow_indicator = extractor.extract("btc", "flow-indicator")
-    if not extracted_flow_indicator.is_success:
-        print("Failed to extract flow indicator data")
+    batch_extractor = BatchExtractor()
+    extracted = batch_extractor.extract_all(["btc"])
 
-    extracted_market_indicator = extractor.extract("btc", "market-indicator")
-    if not extracted_market_indicator.is_success:
-        print("Failed to extract market indicator data")
+    for category, extracted_data in extracted["btc"].items():
+        if not extracted_data.is_success:
+            print(f"Failed to extract {category} data")
 
-    extracted_network_indicator = extractor.extract("btc", "network-indicator")
-    if not extracted_network_indicator.is_success:
-        print("Failed to extract network indicator data")
\ No newline at end of file
+    print(batch_extractor.format_timings())
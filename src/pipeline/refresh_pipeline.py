@@ -0,0 +1,241 @@
+import asyncio
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from config.settings import MAX_CONCURRENT_REQUESTS
+from src.api_integrator.base_connector import BaseConnector
+from src.api_integrator.http_transport import HTTPTransport
+from src.pipeline.derived_features import update_derived_features
+from src.pipeline.json_extractor import JSONExtractor
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshTask(BaseModel):
+    provider: str
+    symbol: str
+    category: str  # Category of the provider catalog
+    storage_category: str
+    endpoints: List[str]  # Endpoints to request, without those already completed in a checkpoint
+    url: str  # URL of the first endpoint, which selects the rate limit of the API
+    extract: bool  # Whether the category has a schema in JSONExtractor.ENDPOINT_COLUMNS
+
+
+class RefreshPlan(BaseModel):
+    tasks: List[RefreshTask]
+
+    @property
+    def requests(self) -> int:
+        return sum(len(task.endpoints) for task in self.tasks)
+
+    def get_requests_by_provider(self) -> Dict[str, int]:
+        requests: Dict[str, int] = {}
+        for task in self.tasks:
+            requests[task.provider] = requests.get(task.provider, 0) + len(task.endpoints)
+        return requests
+
+
+class RefreshTiming(BaseModel):
+    provider: str
+    symbol: str
+    category: str
+    is_success: bool
+    message: Optional[str] = None
+    requests: int = 0
+    rows: int = 0
+    fetch_time: float = 0.0
+    store_time: float = 0.0
+    extract_time: Optional[float] = None  # None when the category was not extracted
+    extracted: bool = False
+
+
+def _extract_category(symbol: str, category: str) -> Tuple[bool, Optional[str], float]:
+    """
+    Extract one category in a worker process. The processed dataset is saved by the extractor, so only its outcome
+    is sent back.
+    """
+    started_at = time.perf_counter()
+    response = JSONExtractor().extract(symbol, category)
+    return response.is_success and response.data is not None, response.message, time.perf_counter() - started_at
+
+
+class RefreshPipeline:
+    """
+    Refresh the raw and processed data of several providers as one pipelined job. Every symbol/category is fetched
+    over a shared transport, stored as soon as its endpoints complete and then extracted in a process pool, so that
+    storing and extracting the first categories overlaps with fetching the others.
+    """
+
+    def __init__(self, connectors: List[BaseConnector], max_concurrency: int = MAX_CONCURRENT_REQUESTS,
+                 extract_workers: Optional[int] = None, incremental: bool = False, resume: bool = True,
+                 stream: bool = False, extract: bool = True):
+        """
+        :param connectors: Connectors of the providers, see get_connectors
+        :param max_concurrency: Maximum number of requests in flight at the same time across all providers
+        :param extract_workers: Extraction processes, defaults to the number of cores. 0 extracts in threads of the
+            current process instead.
+        :param extract: Extract the processed datasets of the categories known to JSONExtractor
+        """
+        self.connectors = {connector.PROVIDER: connector for connector in connectors}
+        self.max_concurrency = max_concurrency
+        self.extract_workers = os.cpu_count() or 1 if extract_workers is None else extract_workers
+        self.incremental = incremental
+        self.resume = resume
+        self.stream = stream
+        self.extract = extract
+
+    def plan(self, symbols: Optional[List[str]] = None,
+             categories: Optional[Dict[str, List[str]]] = None) -> RefreshPlan:
+        """
+        List the categories to refresh and the endpoints that will be requested, without sending any request
+        :param symbols: Symbols to refresh, defaults to the SYMBOLS of each connector
+        :param categories: Categories to refresh keyed by provider, defaults to every category of each connector
+        """
+        categories = categories or {}
+        tasks = []
+        for provider, connector in self.connectors.items():
+            for symbol in symbols or connector.SYMBOLS:
+                for category in categories.get(provider) or list(connector.ENDPOINTS_PARAMS.keys()):
+                    if category not in connector.ENDPOINTS_PARAMS:
+                        raise ValueError(f"Unknown category {category} of {provider}")
+                    tasks.append(self._plan_task(connector, symbol, category))
+        return RefreshPlan(tasks=tasks)
+
+    def estimate_seconds(self, plan: RefreshPlan) -> float:
+        """
+        Lower bound of the fetch time set by the rate limits. Every API has its own budget, so they fetch in parallel.
+        """
+        requests_by_host: Dict[str, int] = {}
+        rates: Dict[str, float] = {}
+        for task in plan.tasks:
+            scheduler = self.connectors[task.provider].scheduler
+            host = scheduler.get_host(task.url)
+            requests_by_host[host] = requests_by_host.get(host, 0) + len(task.endpoints)
+            rates[host] = scheduler.get_rate(task.url)
+        return max((requests / rates[host] for host, requests in requests_by_host.items()), default=0.0)
+
+    def run(self, plan: RefreshPlan) -> List[RefreshTiming]:
+        return asyncio.run(self.run_async(plan))
+
+    async def run_async(self, plan: RefreshPlan) -> List[RefreshTiming]:
+        if not plan.tasks:
+            return []
+        transport = self.connectors[plan.tasks[0].provider].open_transport(self.max_concurrency, self.stream)
+
+        # The event loop, the transport and asyncio.to_thread have threads running by now, and forking them could
+        # copy a lock held by one of them into the workers, so the workers are spawned from a fresh interpreter
+        executor = None
+        if self.extract_workers:
+            executor = ProcessPoolExecutor(self.extract_workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            async with transport:
+                timings = await asyncio.gather(*[self._run_task(transport, task, executor) for task in plan.tasks])
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        if self.stream:
+            for connector in self.connectors.values():
+                connector.save_stream_state()
+        if self.extract:
+            await self._update_derived_features(timings)
+        return list(timings)
+
+    @staticmethod
+    async def _update_derived_features(timings: List[RefreshTiming]):
+        # Once per symbol, from the categories that have been stored, rather than once per category
+        categories: Dict[str, List[str]] = {}
+        for timing in timings:
+            if timing.is_success:
+                categories.setdefault(timing.symbol, []).append(timing.category)
+
+        responses = await asyncio.gather(*[asyncio.to_thread(update_derived_features, symbol, symbol_categories)
+                                           for symbol, symbol_categories in categories.items()])
+        for symbol, response in zip(categories, responses):
+            if not response.is_success:
+                logger.warning(f"Derived features of {symbol} have not been updated: {response.message}")
+
+    async def _run_task(self, transport: HTTPTransport, task: RefreshTask,
+                        executor: Optional[Executor]) -> RefreshTiming:
+        connector = self.connectors[task.provider]
+        timing = RefreshTiming(provider=task.provider, symbol=task.symbol, category=task.storage_category,
+                               is_success=False, requests=len(task.endpoints))
+
+        started_at = time.perf_counter()
+        response = await connector.fetch_data_async(transport, task.symbol, task.category, self.incremental,
+                                                    self.resume, self.stream)
+        timing.fetch_time = time.perf_counter() - started_at
+        timing.rows = sum(result.rows for result in response.endpoint_results or [] if result.is_success)
+        timing.is_success, timing.message = response.is_success, response.message
+
+        # The completed endpoints of a partially failed category are stored too, the checkpoint only saves refetching
+        if not self.stream and response.data:
+            stored_at = time.perf_counter()
+            saved = await asyncio.to_thread(connector.save_data, task.symbol, task.category, response.data)
+            timing.store_time = time.perf_counter() - stored_at
+            if not saved:
+                timing.is_success, timing.message = False, "Failed to save the raw data"
+
+        # A partially fetched category would be extracted with the columns of its failed endpoints missing
+        if self.extract and task.extract and timing.is_success:
+            loop = asyncio.get_running_loop()
+            is_success, message, timing.extract_time = await loop.run_in_executor(
+                executor, _extract_category, task.symbol, task.storage_category)
+            timing.extracted = is_success
+            if not is_success:
+                timing.is_success, timing.message = False, message or "Failed to extract"
+
+        logger.info(f"Refreshed {task.symbol}/{task.storage_category}: {timing.rows} rows in "
+                    f"{timing.fetch_time:.2f}s fetch, {timing.store_time:.2f}s store"
+                    + ("" if timing.extract_time is None else f", {timing.extract_time:.2f}s extract"))
+        return timing
+
+    def _plan_task(self, connector: BaseConnector, symbol: str, category: str) -> RefreshTask:
+        storage_category = connector._get_storage_category(category)
+        completed = set()
+        if self.resume:
+            # Planning has no side effects, an expired checkpoint is only discarded by the fetch
+            completed = set(connector.checkpoint.peek(symbol, storage_category))
+
+        endpoints = [endpoint for endpoint in connector.ENDPOINTS_PARAMS[category] if endpoint not in completed]
+        first_endpoint, params = next(iter(connector.ENDPOINTS_PARAMS[category].items()))
+        return RefreshTask(provider=connector.PROVIDER, symbol=symbol, category=category,
+                           storage_category=storage_category, endpoints=endpoints,
+                           url=connector._parse_endpoint_url(symbol, category, first_endpoint, params),
+                           extract=storage_category in JSONExtractor.ENDPOINT_COLUMNS)
+
+
+def format_plan(plan: RefreshPlan, estimated_seconds: float) -> str:
+    lines = [f"{'provider':<14}{'symbol':<8}{'category':<28}{'requests':>9}{'extract':>9}"]
+    for task in plan.tasks:
+        lines.append(f"{task.provider:<14}{task.symbol:<8}{task.storage_category:<28}{len(task.endpoints):>9}"
+                     f"{'yes' if task.extract else 'no':>9}")
+    by_provider = ", ".join(f"{provider} {requests}" for provider, requests in plan.get_requests_by_provider().items())
+    lines.append(f"{len(plan.tasks)} categories, {plan.requests} requests ({by_provider}), "
+                 f"at least {estimated_seconds:.1f}s at the configured rate limits")
+    return "\n".join(lines)
+
+
+def format_summary(timings: List[RefreshTiming], wall_time: float) -> str:
+    lines = [f"{'task':<36}{'rows':>9}{'fetch (s)':>11}{'store (s)':>11}{'extract (s)':>13}  status"]
+    for timing in sorted(timings, key=lambda t: t.fetch_time + t.store_time + (t.extract_time or 0), reverse=True):
+        extract_time = "-" if timing.extract_time is None else f"{timing.extract_time:.2f}"
+        status = "ok" if timing.is_success else f"failed: {timing.message}"
+        lines.append(f"{f'{timing.symbol}/{timing.category}':<36}{timing.rows:>9}{timing.fetch_time:>11.2f}"
+                     f"{timing.store_time:>11.2f}{extract_time:>13}  {status}")
+
+    failed = sum(not timing.is_success for timing in timings)
+    requests = sum(timing.requests for timing in timings)
+    lines.append(f"{len(timings)} categories, {failed} failed, {requests} requests, "
+                 f"{sum(timing.rows for timing in timings)} rows, {sum(t.extracted for t in timings)} extracted "
+                 f"in {wall_time:.2f}s ({requests / wall_time if wall_time else 0:.1f} req/s). "
+                 f"Stage totals: fetch {sum(t.fetch_time for t in timings):.2f}s, "
+                 f"store {sum(t.store_time for t in timings):.2f}s, "
+                 f"extract {sum(t.extract_time or 0 for t in timings):.2f}s")
+    return "\n".join(lines)
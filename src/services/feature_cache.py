@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+import logging
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import orjson
+import pyarrow as pa
+
+from src.pipeline.json_extractor import JSONExtractor
+from src.utils.lazy_import import lazy_import
+from src.utils.utils import get_raw_data_files
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+def serialize_frame(symbol: str, category: str, frame: pd.DataFrame, response_format: str = "json") -> bytes:
+    """
+    Serialize a series indexed by date as columnar JSON, or as an Arrow IPC stream
+    """
+    if response_format == "arrow":
+        table = pa.Table.from_pandas(frame.reset_index(), preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    start_times = frame.index.values.astype("datetime64[ms]").astype(np.int64)
+    return orjson.dumps({
+        "symbol": symbol,
+        "category": category,
+        "start_time": start_times,
+        "columns": {column: np.ascontiguousarray(frame[column].to_numpy()) for column in frame.columns},
+    }, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class CachedFrame:
+
+    def __init__(self, frame: pd.DataFrame, version: str, checked_at: float):
+        self.frame = frame
+        self.version = version
+        self.checked_at = checked_at
+
+
+class CachedResponse:
+
+    def __init__(self, version: str, etag: str, body: bytes, media_type: str):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        self.media_type = media_type
+
+
+class FeatureCache:
+    """
+    Memory-resident cache of the merged series of every symbol and category, together with their serialized
+    responses. The raw files are checked for changes at most every check_interval seconds, and ingestion can
+    invalidate a series explicitly as soon as new data lands.
+    """
+
+    CHECK_INTERVAL = 1.0
+    RESPONSE_CACHE_SIZE = 256
+    READ_ATTEMPTS = 2  # A read that fails during a write is retried once before serving the previous series
+    MEDIA_TYPES = {"json": "application/json", "arrow": "application/vnd.apache.arrow.stream"}
+
+    def __init__(self, extractor: Optional[JSONExtractor] = None, check_interval: float = CHECK_INTERVAL):
+        self.extractor = extractor or JSONExtractor()
+        self.check_interval = check_interval
+        self._frames: Dict[Tuple[str, str], CachedFrame] = {}
+        self._responses: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_frame(self, symbol: str, category: str) -> Optional[CachedFrame]:
+        """
+        Get the cached series of a symbol and category, reloading it if its raw files have changed
+        :return: Cached series, or None if nothing is stored
+        """
+        key = (symbol, category)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is not None and now - entry.checked_at < self.check_interval:
+                return entry
+
+        for attempt in range(self.READ_ATTEMPTS):
+            try:
+                return self._reload(key, entry, now)
+            except (OSError, pa.ArrowException) as e:
+                # Ingestion deletes and rewrites the partitions it upserts, so a read in between can miss files
+                logger.warning(f"Reading {symbol}/{category} failed during a write (attempt {attempt + 1}): {e}")
+        # The series loaded before the write is still consistent until the write completes
+        return entry
+
+    def get_response(self, symbol: str, category: str, columns: Optional[List[str]] = None,
+                     start: Optional[date] = None, end: Optional[date] = None,
+                     response_format: str = "json") -> Optional[CachedResponse]:
+        """
+        Get the serialized series of a symbol and category, filtered by columns and an inclusive date range
+        :param response_format: "json" for columnar JSON or "arrow" for an Arrow IPC stream
+        :return: Cached response, or None if nothing is stored
+        """
+        entry = self.get_frame(symbol, category)
+        if entry is None:
+            return None
+
+        key = (symbol, category, tuple(columns) if columns else None, start, end, response_format)
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is not None and cached.version == entry.version:
+                self._responses.move_to_end(key)
+                return cached
+
+        frame = entry.frame
+        if columns:
+            frame = frame[[column for column in columns if column in frame.columns]]
+        if start is not None or end is not None:
+            frame = frame.loc[pd.Timestamp(start) if start else None:pd.Timestamp(end) if end else None]
+
+        body = serialize_frame(symbol, category, frame, response_format)
+        etag = '"' + hashlib.sha1(repr((entry.version, key)).encode()).hexdigest() + '"'
+        cached = CachedResponse(entry.version, etag, body, self.MEDIA_TYPES[response_format])
+
+        with self._lock:
+            self._responses[key] = cached
+            self._responses.move_to_end(key)
+            while len(self._responses) > self.RESPONSE_CACHE_SIZE:
+                self._responses.popitem(last=False)
+        return cached
+
+    def invalidate(self, symbol: Optional[str] = None, category: Optional[str] = None):
+        """
+        Drop cached series, e.g. once ingestion has saved new rows. Without arguments the whole cache is dropped.
+        """
+        with self._lock:
+            for key in list(self._frames.keys()):
+                if (symbol is None or key[0] == symbol) and (category is None or key[1] == category):
+                    del self._frames[key]
+            for key in list(self._responses.keys()):
+                if (symbol is None or key[0] == symbol) and (category is None or key[1] == category):
+                    del self._responses[key]
+
+    def _reload(self, key: Tuple[str, str], entry: Optional[CachedFrame], now: float) -> Optional[CachedFrame]:
+        symbol, category = key
+        version = self._get_version(symbol, category)
+        if version is None:
+            return None
+        if entry is not None and entry.version == version:
+            entry.checked_at = now
+            return entry
+
+        frame = self.extractor.load_frame(symbol, category)
+        if frame is None:
+            return None
+
+        entry = CachedFrame(frame, version, now)
+        with self._lock:
+            self._frames[key] = entry
+        logger.info(f"Loaded {symbol}/{category} into the feature cache ({len(frame)} rows)")
+        return entry
+
+    @staticmethod
+    def _get_version(symbol: str, category: str) -> Optional[str]:
+        files = get_raw_data_files(symbol, category)
+        if not files:
+            return None
+
+        fingerprint = []
+        for filepath in files:
+            stat = os.stat(filepath)
+            fingerprint.append((filepath, stat.st_mtime_ns, stat.st_size))
+        return hashlib.sha1(repr(fingerprint).encode()).hexdigest()
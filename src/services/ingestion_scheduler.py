@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from config.settings import INGESTION_DELAY, INGESTION_SYMBOLS, WINDOW_SECONDS
+from src.api_integrator.cryptoquant_connector import CryptoQuantConnector
+from src.models.endpoint_series import EndpointSeries
+from src.pipeline.derived_features import update_derived_features
+
+logger = logging.getLogger(__name__)
+
+class IngestionJobStatus(BaseModel):
+    symbol: str
+    category: str
+    interval: float
+    is_running: bool = False
+    runs: int = 0
+    failures: int = 0
+    coalesced: int = 0
+    rows: int = 0
+    next_run: Optional[datetime] = None
+    last_started: Optional[datetime] = None
+    last_finished: Optional[datetime] = None
+    last_latency: Optional[float] = None
+    last_success: Optional[bool] = None
+    last_message: Optional[str] = None
+
+
+class IngestionScheduler:
+    """
+    Run incremental fetches of every symbol and category on the event loop, aligned to the window of the category's
+    endpoints. A trigger that arrives while the same job is still running is coalesced into the running one.
+    """
+
+    def __init__(self, connector: Optional[CryptoQuantConnector] = None, symbols: Optional[List[str]] = None,
+                 categories: Optional[List[str]] = None, intervals: Optional[Dict[str, float]] = None,
+                 delay: float = INGESTION_DELAY, on_update: Optional[Callable[[str, str, List[EndpointSeries]], None]] = None):
+        """
+        :param intervals: Cadence in seconds per category, overriding the cadence derived from the endpoint windows
+        :param delay: Seconds to wait after a window boundary before running
+        :param on_update: Called on the event loop with the symbol, category and the rows after the previous
+            watermarks once the fetched responses have been saved
+        """
+        self.connector = connector or CryptoQuantConnector()
+        self.delay = delay
+        self.on_update = on_update
+
+        symbols = symbols or INGESTION_SYMBOLS
+        categories = categories or list(self.connector.ENDPOINTS_PARAMS.keys())
+        intervals = intervals or {}
+        self.jobs: Dict[Tuple[str, str], IngestionJobStatus] = {
+            (symbol, category): IngestionJobStatus(
+                symbol=symbol, category=category,
+                interval=intervals.get(category, self._get_window_interval(category))
+            )
+            for symbol in symbols
+            for category in categories
+        }
+        self._tasks: List[asyncio.Task] = []
+        self._running: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    async def start(self, run_immediately: bool = True):
+        """
+        Start one scheduling loop per job
+        :param run_immediately: Catch up with an incremental fetch of every job before following the cadence
+        """
+        for key in self.jobs:
+            self._tasks.append(asyncio.create_task(self._schedule(key, run_immediately)))
+        logger.info(f"Ingestion scheduler started with {len(self.jobs)} jobs")
+
+    async def stop(self):
+        tasks = self._tasks + list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks, self._running = [], {}
+
+    def trigger(self, symbol: str, category: str) -> bool:
+        """
+        Run a job now unless it is already running
+        :return: True if a run has been started, False if it has been coalesced into the running one
+        """
+        key = (symbol, category)
+        job = self.jobs[key]
+        if key in self._running:
+            job.coalesced += 1
+            return False
+
+        self._running[key] = asyncio.create_task(self._run(key))
+        return True
+
+    def get_status(self) -> List[IngestionJobStatus]:
+        return list(self.jobs.values())
+
+    async def _schedule(self, key: Tuple[str, str], run_immediately: bool):
+        job = self.jobs[key]
+        if run_immediately:
+            self.trigger(*key)
+
+        while True:
+            next_run = self._get_next_run(job.interval)
+            job.next_run = datetime.fromtimestamp(next_run, tz=timezone.utc)
+            await asyncio.sleep(max(0.0, next_run - time.time()))
+            self.trigger(*key)
+
+    async def _run(self, key: Tuple[str, str]):
+        symbol, category = key
+        job = self.jobs[key]
+        job.is_running = True
+        job.last_started = datetime.now(timezone.utc)
+        started_at = time.perf_counter()
+
+        try:
+            results = await self.connector.fetch_all_async([symbol], [category], incremental=True)
+            response = results[symbol][category]
+
+            # Endpoints that succeeded are saved even if others failed, those are resumed on the next run
+            if response.data:
+                watermarks = self._get_watermarks(symbol, category, response.data)
+                saved = await asyncio.to_thread(self.connector.save_data, symbol, category, response.data)
+                if not saved:
+                    response.is_success, response.message = False, "Failed to save the fetched data"
+                else:
+                    await asyncio.to_thread(self._update_derived_features, symbol, category)
+                    if self.on_update is not None:
+                        self.on_update(symbol, category, self._get_new_rows(response.data, watermarks))
+
+            job.rows = sum(result.rows for result in response.endpoint_results or [])
+            job.last_success, job.last_message = response.is_success, response.message
+        except Exception as e:
+            logger.exception(f"Ingestion of {symbol}/{category} failed")
+            job.last_success, job.last_message = False, f"Error occurred: {e}"
+        finally:
+            job.runs += 1
+            job.failures += 0 if job.last_success else 1
+            job.last_latency = time.perf_counter() - started_at
+            job.last_finished = datetime.now(timezone.utc)
+            job.is_running = False
+            self._running.pop(key, None)
+
+    def _update_derived_features(self, symbol: str, category: str):
+        response = update_derived_features(symbol, [self.connector._get_storage_category(category)])
+        if not response.is_success:
+            logger.warning(f"Derived features of {symbol} have not been updated: {response.message}")
+
+    def _get_watermarks(self, symbol: str, category: str,
+                        responses: List[EndpointSeries]) -> Dict[str, Optional[int]]:
+        storage_category = self.connector._get_storage_category(category)
+        return {response.endpoint: self.connector.watermarks.get(symbol, storage_category, response.endpoint)
+                for response in responses}
+
+    @staticmethod
+    def _get_new_rows(responses: List[EndpointSeries], watermarks: Dict[str, Optional[int]]) -> List[EndpointSeries]:
+        """
+        Rows after the watermarks read before saving. Incremental fetches start at the watermark and resumed
+        checkpoints hold rows that have been saved before, neither of which is an update.
+        """
+        new_responses = []
+        for response in responses:
+            watermark = watermarks.get(response.endpoint)
+            if watermark is None:
+                new_responses.append(response)
+                continue
+            mask = response.start_time > watermark
+            new_responses.append(EndpointSeries(response.endpoint, response.start_time[mask],
+                                                {name: values[mask] for name, values in response.columns.items()}))
+        return new_responses
+
+    def _get_window_interval(self, category: str) -> float:
+        windows = [params.get("window", "day") for params in self.connector.ENDPOINTS_PARAMS[category].values()]
+        return min(WINDOW_SECONDS[window] for window in windows)
+
+    def _get_next_run(self, interval: float) -> float:
+        # Runs are aligned to the window boundaries (e.g. midnight UTC for daily windows), plus the delay
+        now = time.time()
+        next_run = (now - self.delay) // interval * interval + interval + self.delay
+        return next_run
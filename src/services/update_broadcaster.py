@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from src.pipeline.json_extractor import JSONExtractor
+from src.services.feature_cache import serialize_frame
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """
+    Queue of serialized updates for one client. When a slow client falls behind by more than max_queue updates,
+    the oldest updates are dropped instead of blocking the broadcast.
+    """
+
+    def __init__(self, symbol: str, category: str, columns: Optional[List[str]] = None, max_queue: int = 100):
+        self.symbol = symbol
+        self.category = category
+        self.columns: Optional[FrozenSet[str]] = frozenset(columns) if columns else None
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def put(self, message: bytes):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self) -> bytes:
+        return await self.queue.get()
+
+
+class UpdateBroadcaster:
+    """
+    Fan out the rows committed by ingestion to every subscriber of a symbol and category. Subscribers that request the
+    same columns share one serialized message per update.
+    """
+
+    def __init__(self, extractor: Optional[JSONExtractor] = None):
+        self.extractor = extractor or JSONExtractor()
+        self._subscriptions: Dict[Tuple[str, str], Set[Subscription]] = {}
+
+    def subscribe(self, symbol: str, category: str, columns: Optional[List[str]] = None) -> Subscription:
+        subscription = Subscription(symbol, category, columns)
+        self._subscriptions.setdefault((symbol, category), set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get((subscription.symbol, subscription.category))
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+
+    def count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def publish(self, symbol: str, category: str, responses: List[Dict]) -> int:
+        """
+        Broadcast newly committed rows. Must be called from the event loop that serves the subscribers.
+        :param responses: Committed series of ResponseModel.data, or responses in the row format
+        :return: Number of distinct messages serialized
+        """
+        subscriptions = self._subscriptions.get((symbol, category))
+        if not subscriptions:
+            return 0
+
+        frame = self.extractor.merge_series(responses, category)
+        if frame.empty:
+            return 0
+
+        groups: Dict[Optional[FrozenSet[str]], List[Subscription]] = {}
+        for subscription in subscriptions:
+            groups.setdefault(subscription.columns, []).append(subscription)
+
+        for columns, members in groups.items():
+            selected = frame if columns is None else frame[[column for column in frame.columns if column in columns]]
+            message = serialize_frame(symbol, category, selected)
+            for subscription in members:
+                subscription.put(message)
+
+        logger.info(f"Broadcast {len(frame)} rows of {symbol}/{category} to {len(subscriptions)} subscribers")
+        return len(groups)
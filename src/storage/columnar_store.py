@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Union
+
+import pyarrow as pa
+
+from src.models.endpoint_series import EndpointSeries
+from src.storage.series_store import SeriesStore
+from src.utils.instrumentation import get_metrics
+from src.utils.lazy_import import lazy_import
+
+# Loaded on first use, pandas and the dataset API alone take longer to import than the rest of a fetch job
+pd = lazy_import("pandas")
+pc = lazy_import("pyarrow.compute")
+ds = lazy_import("pyarrow.dataset")
+
+DateLike = Union[str, datetime, int, None]
+
+class ColumnarStore(SeriesStore):
+    """
+    Parquet store of time series, with one dataset per symbol/category/endpoint partitioned by year.
+    Every row is keyed by its start_time (UNIX timestamp in milliseconds), which is used for deduplication
+    and for date-range predicate pushdown.
+    """
+
+    KEY_COLUMN = "start_time"
+    PARTITION_COLUMN = "year"
+    WRITE_ERRORS = (OSError, pa.ArrowException)
+
+    def __init__(self, root_dir: Union[str, os.PathLike]):
+        self.root_dir = str(root_dir)
+
+    @property
+    def location(self) -> str:
+        return self.root_dir
+
+    def write(self, symbol: str, category: str, endpoint: Optional[str],
+              rows: Union[List[Dict], pa.Table, EndpointSeries], overwrite: bool = False) -> int:
+        """
+        Upsert rows into a dataset. Existing rows with the same start_time are replaced.
+        :param symbol: Symbol of the rows
+        :param category: Category of the rows
+        :param endpoint: Endpoint of the rows, or None for a processed category dataset
+        :param rows: Rows as a list of dicts, an EndpointSeries or an Arrow table with a start_time column
+        :param overwrite: Replace the whole dataset instead of upserting
+        :return: Number of rows written
+        """
+        metrics = get_metrics()
+        with metrics.span("storage_write", category=category, endpoint=endpoint or ""):
+            written = self._write(symbol, category, endpoint, rows, overwrite)
+        metrics.inc("storage_rows_written", written, category=category, endpoint=endpoint or "")
+        return written
+
+    def _write(self, symbol: str, category: str, endpoint: Optional[str],
+               rows: Union[List[Dict], pa.Table, EndpointSeries], overwrite: bool) -> int:
+        if isinstance(rows, EndpointSeries):
+            table = rows.to_table()
+        else:
+            table = rows if isinstance(rows, pa.Table) else self._to_table(rows)
+        if table.num_rows == 0:
+            return 0
+
+        table = self._normalize(table)
+        path = self._get_path(symbol, category, endpoint)
+
+        if overwrite and os.path.exists(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            # Only the partitions touched by the new rows are read back and rewritten
+            years = pc.unique(table[self.PARTITION_COLUMN])
+            existing = self._dataset(path).to_table(filter=ds.field(self.PARTITION_COLUMN).isin(years))
+            existing = existing.filter(pc.invert(pc.is_in(existing[self.KEY_COLUMN], value_set=table[self.KEY_COLUMN])))
+            if existing.num_rows:
+                table = pa.concat_tables([self._normalize(existing), table], promote_options="default")
+
+        table = table.sort_by(self.KEY_COLUMN)
+        ds.write_dataset(
+            table, path, format="parquet",
+            partitioning=ds.partitioning(pa.schema([(self.PARTITION_COLUMN, pa.int32())]), flavor="hive"),
+            existing_data_behavior="delete_matching",
+            basename_template="part-{i}.parquet"
+        )
+        return table.num_rows
+
+    def read(self, symbol: str, category: str, endpoint: Optional[str], columns: Optional[List[str]] = None,
+             start: DateLike = None, end: DateLike = None) -> Optional[pa.Table]:
+        """
+        Read a dataset, only loading the requested columns and the partitions within the date range
+        :param columns: Columns to load, defaults to all columns
+        :param start: Inclusive start date
+        :param end: Inclusive end date
+        :return: Arrow table sorted by start_time, or None if the dataset does not exist
+        """
+        with get_metrics().span("storage_read", category=category, endpoint=endpoint or ""):
+            return self._read(symbol, category, endpoint, columns, start, end)
+
+    def _read(self, symbol: str, category: str, endpoint: Optional[str], columns: Optional[List[str]],
+              start: DateLike, end: DateLike) -> Optional[pa.Table]:
+        path = self._get_path(symbol, category, endpoint)
+        if not os.path.exists(path):
+            return None
+
+        dataset = self._dataset(path)
+        if columns is not None:
+            columns = [self.KEY_COLUMN] + [column for column in columns
+                                           if column != self.KEY_COLUMN and column in dataset.schema.names]
+
+        table = dataset.to_table(columns=columns, filter=self._get_filter(start, end))
+        if columns is None:
+            table = table.drop_columns([self.PARTITION_COLUMN])
+        return table.sort_by(self.KEY_COLUMN)
+
+    def list_endpoints(self, symbol: str, category: str) -> List[str]:
+        path = os.path.join(self.root_dir, symbol, category)
+        if not os.path.isdir(path):
+            return []
+        return sorted(name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name)))
+
+    def read_responses(self, symbol: str, category: str, columns: Optional[List[str]] = None,
+                       start: DateLike = None, end: DateLike = None) -> Optional[List[Dict]]:
+        """
+        Read every endpoint of a category in the format of ResponseModel.data
+        :return: Responses, or None if nothing is stored for the category
+        """
+        endpoints = self.list_endpoints(symbol, category)
+        if not endpoints:
+            return None
+
+        responses = []
+        for endpoint in endpoints:
+            endpoint_columns = None if columns is None else ["date"] + list(columns)
+            table = self.read(symbol, category, endpoint, endpoint_columns, start, end)
+            responses.append({"endpoint": endpoint, "data": table.to_pylist()})
+        return responses
+
+    def write_frame(self, symbol: str, category: str, df: pd.DataFrame, overwrite: bool = True) -> int:
+        """
+        Replace the processed dataset of a category with a DataFrame indexed by date
+        :param overwrite: Replace the whole dataset, or only upsert the rows of the DataFrame
+        """
+        dates = pd.to_datetime(df.index)
+        frame = df.reset_index()
+        frame.insert(0, self.KEY_COLUMN, (dates - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1))
+        return self.write(symbol, category, None, pa.Table.from_pandas(frame, preserve_index=False), overwrite)
+
+    def read_frame(self, symbol: str, category: str, columns: Optional[List[str]] = None,
+                   start: DateLike = None, end: DateLike = None) -> Optional[pd.DataFrame]:
+        table = self.read(symbol, category, None, None if columns is None else ["date"] + list(columns), start, end)
+        if table is None:
+            return None
+        return table.drop_columns([self.KEY_COLUMN]).to_pandas().set_index("date")
+
+    def _get_path(self, symbol: str, category: str, endpoint: Optional[str]) -> str:
+        if endpoint is None:
+            return os.path.join(self.root_dir, symbol, category)
+        return os.path.join(self.root_dir, symbol, category, endpoint)
+
+    def _dataset(self, path: str) -> ds.Dataset:
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        # Columns added by later upserts only exist in some partitions, so the schema is unified across all of them
+        schema = pa.unify_schemas([fragment.physical_schema for fragment in dataset.get_fragments()]
+                                  + [dataset.partitioning.schema])
+        return ds.dataset(path, format="parquet", partitioning="hive", schema=schema)
+
+    def _get_filter(self, start: DateLike, end: DateLike) -> Optional[ds.Expression]:
+        expression = None
+        if start is not None:
+            start_ms = self._to_timestamp_ms(start)
+            expression = ((ds.field(self.PARTITION_COLUMN) >= self._get_year(start_ms))
+                          & (ds.field(self.KEY_COLUMN) >= start_ms))
+        if end is not None:
+            end_ms = self._to_timestamp_ms(end)
+            end_expression = ((ds.field(self.PARTITION_COLUMN) <= self._get_year(end_ms))
+                              & (ds.field(self.KEY_COLUMN) <= end_ms))
+            expression = end_expression if expression is None else expression & end_expression
+        return expression
+
+    def _to_table(self, rows: List[Dict]) -> pa.Table:
+        return pa.table({column: [row.get(column) for row in rows] for column in EndpointSeries.get_fields(rows)})
+
+    def _normalize(self, table: pa.Table) -> pa.Table:
+        """
+        Cast the metric columns to float64, so that partitions written from integer-only batches share one schema
+        """
+        if self.PARTITION_COLUMN in table.column_names:
+            table = table.drop_columns([self.PARTITION_COLUMN])
+
+        fields = []
+        for field in table.schema:
+            if field.name == self.KEY_COLUMN:
+                fields.append(pa.field(field.name, pa.int64()))
+            elif pa.types.is_integer(field.type) or pa.types.is_null(field.type):
+                fields.append(pa.field(field.name, pa.float64()))
+            else:
+                fields.append(field)
+        table = table.cast(pa.schema(fields))
+
+        years = pc.year(pc.cast(table[self.KEY_COLUMN], pa.timestamp("ms", tz="UTC")))
+        return table.append_column(self.PARTITION_COLUMN, pc.cast(years, pa.int32()))
+
+    @staticmethod
+    def _get_year(timestamp_ms: int) -> int:
+        return datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).year
+
+    @staticmethod
+    def _to_timestamp_ms(value: DateLike) -> int:
+        if isinstance(value, (int, float)):
+            return int(value)
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize("UTC")
+        return int(timestamp.timestamp() * 1000)
+
+
+class ColumnarBatchWriter:
+    """
+    Buffer rows of one endpoint column by column and flush them into a ColumnarStore in fixed-size batches,
+    so that memory stays bounded by the batch size rather than the length of the history.
+    """
+
+    def __init__(self, store: ColumnarStore, symbol: str, category: str, endpoint: str, batch_size: int = 1000):
+        self.store = store
+        self.symbol = symbol
+        self.category = category
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.rows = 0
+        self.latest_start_time: Optional[int] = None
+        self._columns: Dict[str, List] = {}
+        self._buffered = 0
+
+    def append(self, row: Dict) -> bool:
+        """
+        Buffer a row
+        :return: True if the buffer is full and should be flushed
+        """
+        for column in row.keys() - self._columns.keys():
+            self._columns[column] = [None] * self._buffered
+        for column, values in self._columns.items():
+            values.append(row.get(column))
+        self._buffered += 1
+        return self._buffered >= self.batch_size
+
+    def to_series(self) -> EndpointSeries:
+        """
+        Buffered rows as a series, e.g. to validate them before they are flushed
+        """
+        return EndpointSeries.from_columns(self.endpoint, self._columns)
+
+    def flush(self) -> int:
+        """
+        Write the buffered rows into the store
+        :return: Number of rows flushed
+        """
+        if not self._buffered:
+            return 0
+
+        table = pa.table(self._columns)
+        latest = pc.max(table[ColumnarStore.KEY_COLUMN]).as_py()
+        self.store.write(self.symbol, self.category, self.endpoint, table)
+
+        flushed = self._buffered
+        self.rows += flushed
+        self.latest_start_time = latest if self.latest_start_time is None else max(self.latest_start_time, latest)
+        self._columns = {}
+        self._buffered = 0
+        return flushed
@@ -0,0 +1,41 @@
+import logging
+from typing import Dict, List, Tuple, Type, Union
+
+from src.models.endpoint_series import EndpointSeries
+
+logger = logging.getLogger(__name__)
+
+
+class SeriesStore:
+    """
+    Raw store of the endpoint series of a category. Subclasses implement write for one endpoint, and name the errors
+    of their storage in WRITE_ERRORS.
+    """
+
+    # Errors that fail a save instead of propagating
+    WRITE_ERRORS: Tuple[Type[Exception], ...] = (OSError,)
+
+    def write(self, symbol: str, category: str, endpoint: str, rows: Union[List[Dict], EndpointSeries]) -> int:
+        raise NotImplementedError
+
+    @property
+    def location(self) -> str:
+        """
+        Directory or file of the store, for the logs
+        """
+        raise NotImplementedError
+
+    def write_responses(self, symbol: str, category: str, responses: List[Union[EndpointSeries, Dict]]) -> bool:
+        """
+        Upsert the series of ResponseModel.data, or responses in the row format
+        :return: True if every endpoint has been saved
+        """
+        try:
+            for response in responses:
+                series = EndpointSeries.from_response(response)
+                self.write(symbol, category, series.endpoint, series)
+            logger.info(f"{symbol}/{category} saved to {self.location} successfully")
+            return True
+        except self.WRITE_ERRORS as e:
+            logger.error(f"Error saving {symbol}/{category} to {self.location}: {e}")
+            return False
@@ -0,0 +1,284 @@
+import os
+import atexit
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.models.endpoint_series import EndpointSeries
+from src.storage.columnar_store import ColumnarStore, DateLike
+from src.storage.series_store import SeriesStore
+from src.utils.instrumentation import get_metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    series_id INTEGER PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    category TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    UNIQUE (symbol, category, endpoint, metric)
+);
+CREATE TABLE IF NOT EXISTS observations (
+    series_id INTEGER NOT NULL,
+    start_time INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (series_id, start_time)
+) WITHOUT ROWID;
+"""
+
+class TimeSeriesDB(SeriesStore):
+    """
+    SQLite store of time series in long format. Every (symbol, category, endpoint, metric) is a series, and its observations
+    are clustered on (series_id, start_time) in a WITHOUT ROWID table, so that a date-range or as-of query reads
+    only the requested range of the series instead of the whole history.
+    """
+
+    FILENAME = "timeseries.db"
+    KEY_COLUMN = "start_time"
+    # Row fields that are not metrics. The date is derived from start_time when reading.
+    NON_METRIC_COLUMNS = {"start_time", "date"}
+    WRITE_ERRORS = (OSError, sqlite3.Error)
+
+    def __init__(self, root_dir: Union[str, os.PathLike]):
+        self.root_dir = str(root_dir)
+        self.path = os.path.join(self.root_dir, self.FILENAME)
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    @property
+    def location(self) -> str:
+        return self.path
+
+    def write(self, symbol: str, category: str, endpoint: str, rows: Union[List[Dict], EndpointSeries]) -> int:
+        """
+        Upsert the rows of an endpoint. Existing observations with the same start_time are replaced.
+        :param rows: Rows as a list of dicts or an EndpointSeries
+        :return: Number of rows written
+        """
+        series = rows if isinstance(rows, EndpointSeries) else EndpointSeries.from_rows(endpoint, rows)
+        if not len(series):
+            return 0
+
+        metrics = get_metrics()
+        with metrics.span("storage_write", category=category, endpoint=endpoint):
+            # Text fields such as labels are not metrics and are not stored
+            columns = {name: values for name, values in series.to_columns().items()
+                       if name not in self.NON_METRIC_COLUMNS}
+            with self._lock, self._connect() as connection:
+                series_ids = self._get_series_ids(connection, symbol, category, endpoint, list(columns))
+                for name, values in columns.items():
+                    # Missing values are gaps of the series rather than observations
+                    present = ~np.isnan(values)
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO observations (series_id, start_time, value) VALUES (?, ?, ?)",
+                        zip([series_ids[name]] * int(present.sum()), series.start_time[present].tolist(),
+                            values[present].tolist())
+                    )
+        metrics.inc("storage_rows_written", len(series), category=category, endpoint=endpoint)
+        return len(series)
+
+    def read_wide(self, symbol: str, category: str, metrics: Optional[List[str]] = None, start: DateLike = None,
+                  end: DateLike = None, endpoint: Optional[str] = None) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Pivot the series of a category into aligned columns with a single query
+        :param metrics: Metrics to load, defaults to every metric of the category
+        :param start: Inclusive start date
+        :param end: Inclusive end date
+        :param endpoint: Only load the series of an endpoint
+        :return: Columns keyed by metric plus a start_time column in milliseconds, or None if nothing is stored.
+            A metric of several endpoints is keyed by {endpoint}/{metric}.
+        """
+        with get_metrics().span("storage_read", category=category, endpoint=endpoint or ""):
+            series = self._get_series(symbol, category, metrics, endpoint)
+            if not series:
+                return None
+
+            # One conditional aggregate per series turns the long rows of each start_time into a wide row
+            pivots = ", ".join(f"MAX(CASE WHEN series_id = {series_id} THEN value END)" for series_id, _, _ in series)
+            where, params = self._get_range_clause(start, end)
+            query = (f"SELECT start_time, {pivots} FROM observations "
+                     f"WHERE series_id IN ({', '.join(str(series_id) for series_id, _, _ in series)}){where} "
+                     f"GROUP BY start_time ORDER BY start_time")
+
+            with self._lock:
+                rows = self._connect().execute(query, params).fetchall()
+
+        columns = list(zip(*rows)) if rows else [()] * (len(series) + 1)
+        wide = {self.KEY_COLUMN: np.array(columns[0], dtype=np.int64)}
+        for name, values in zip(self._get_column_names(series), columns[1:]):
+            wide[name] = np.array(values, dtype=np.float64)
+        return wide
+
+    def read_series(self, symbol: str, category: str, metric: str, start: DateLike = None,
+                    end: DateLike = None, endpoint: Optional[str] = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Read the range of a single series
+        :param endpoint: Endpoint of the series, required if several endpoints provide the metric
+        :return: Start times in milliseconds and values, or None if the series does not exist
+        """
+        columns = self.read_wide(symbol, category, [metric], start, end, endpoint)
+        if columns is None or metric not in columns:
+            return None
+        return columns[self.KEY_COLUMN], columns[metric]
+
+    def as_of(self, symbol: str, category: str, at: DateLike,
+              metrics: Optional[List[str]] = None) -> Dict[str, Tuple[int, Any]]:
+        """
+        Get the latest observation at or before a date of every series of a category
+        :return: Start time and value keyed by metric, or by {endpoint}/{metric} for a metric of several endpoints.
+            Series without an observation before the date are left out.
+        """
+        series = self._get_series(symbol, category, metrics)
+        if not series:
+            return {}
+
+        # Each series is resolved with one descending seek on the primary key
+        query = ("SELECT start_time, value FROM observations WHERE series_id = ? AND start_time <= ? "
+                 "ORDER BY start_time DESC LIMIT 1")
+        at_ms = ColumnarStore._to_timestamp_ms(at)
+        result = {}
+        with self._lock:
+            connection = self._connect()
+            for (series_id, _, _), name in zip(series, self._get_column_names(series)):
+                row = connection.execute(query, (series_id, at_ms)).fetchone()
+                if row is not None:
+                    result[name] = (row[0], row[1])
+        return result
+
+    def read_responses(self, symbol: str, category: str, columns: Optional[List[str]] = None,
+                       start: DateLike = None, end: DateLike = None) -> Optional[List[Dict]]:
+        """
+        Read every endpoint of a category in the format of ResponseModel.data
+        :return: Responses, or None if nothing is stored for the category
+        """
+        series = self._get_series(symbol, category)
+        if not series:
+            return None
+        if columns is not None:
+            series = self._get_series(symbol, category, columns)
+
+        endpoint_metrics: Dict[str, List[str]] = {}
+        for _, endpoint, metric in series:
+            endpoint_metrics.setdefault(endpoint, []).append(metric)
+
+        responses = []
+        for endpoint, metrics in sorted(endpoint_metrics.items()):
+            wide = self.read_wide(symbol, category, metrics, start, end, endpoint)
+            responses.append({"endpoint": endpoint, "data": self._to_rows(wide)})
+        return responses
+
+    def list_endpoints(self, symbol: str, category: str) -> List[str]:
+        return sorted({endpoint for _, endpoint, _ in self._get_series(symbol, category)})
+
+    def list_metrics(self, symbol: str, category: str) -> List[str]:
+        return [metric for _, _, metric in self._get_series(symbol, category)]
+
+    def get_files(self) -> List[str]:
+        """
+        Files of the database, including the write-ahead log, whose modification times change on every write
+        """
+        return [path for path in (self.path, f"{self.path}-wal") if os.path.exists(path)]
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(self.root_dir, exist_ok=True)
+            # Connections are guarded by the instance lock, so that an instance can be shared by threads
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            # The write-ahead log lets readers such as the API query while ingestion writes
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def _get_series(self, symbol: str, category: str, metrics: Optional[Iterable[str]] = None,
+                    endpoint: Optional[str] = None) -> List[Tuple[int, str, str]]:
+        query = "SELECT series_id, endpoint, metric FROM series WHERE symbol = ? AND category = ? ORDER BY series_id"
+        with self._lock:
+            # Reads of a database that does not exist yet find nothing instead of creating it
+            if self._connection is None and not os.path.exists(self.path):
+                return []
+            series = self._connect().execute(query, (symbol, category)).fetchall()
+        if endpoint is not None:
+            series = [row for row in series if row[1] == endpoint]
+        if metrics is None:
+            return series
+
+        order = {metric: i for i, metric in enumerate(metrics)}
+        return sorted((row for row in series if row[2] in order), key=lambda row: order[row[2]])
+
+    @staticmethod
+    def _get_series_ids(connection: sqlite3.Connection, symbol: str, category: str, endpoint: str,
+                        metrics: List[str]) -> Dict[str, int]:
+        connection.executemany("INSERT OR IGNORE INTO series (symbol, category, endpoint, metric) VALUES (?, ?, ?, ?)",
+                               ((symbol, category, endpoint, metric) for metric in metrics))
+        rows = connection.execute("SELECT metric, series_id FROM series WHERE symbol = ? AND category = ? "
+                                  "AND endpoint = ?", (symbol, category, endpoint)).fetchall()
+        return {metric: series_id for metric, series_id in rows}
+
+    @staticmethod
+    def _get_column_names(series: List[Tuple[int, str, str]]) -> List[str]:
+        # Endpoints of a category may provide the same metric, whose columns are then told apart by their endpoint
+        counts = Counter(metric for _, _, metric in series)
+        return [metric if counts[metric] == 1 else f"{endpoint}/{metric}" for _, endpoint, metric in series]
+
+    @staticmethod
+    def _get_range_clause(start: DateLike, end: DateLike) -> Tuple[str, List[int]]:
+        clause, params = "", []
+        if start is not None:
+            clause += " AND start_time >= ?"
+            params.append(ColumnarStore._to_timestamp_ms(start))
+        if end is not None:
+            clause += " AND start_time <= ?"
+            params.append(ColumnarStore._to_timestamp_ms(end))
+        return clause, params
+
+    def _to_rows(self, wide: Dict[str, np.ndarray]) -> List[Dict]:
+        start_times = wide[self.KEY_COLUMN].tolist()
+        metrics = {name: values.tolist() for name, values in wide.items() if name != self.KEY_COLUMN}
+        rows = []
+        for i, start_time in enumerate(start_times):
+            row = {self.KEY_COLUMN: start_time, "date": self._format_date(start_time)}
+            for name, values in metrics.items():
+                # Gaps of the pivot are NaN, they are left out like fields missing from a response row
+                if values[i] == values[i]:
+                    row[name] = values[i]
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def _format_date(start_time: int) -> str:
+        return datetime.fromtimestamp(start_time / 1000, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+_databases: Dict[Tuple[int, str], TimeSeriesDB] = {}
+_databases_lock = threading.Lock()
+
+
+def get_timeseries_db(root_dir: Union[str, os.PathLike]) -> TimeSeriesDB:
+    """
+    Get the database of a directory shared by the process, so that its connection is opened once. Processes forked
+    from this one open their own connection, since a SQLite connection must not be used across a fork.
+    """
+    key = (os.getpid(), os.path.abspath(root_dir))
+    with _databases_lock:
+        if key not in _databases:
+            _databases[key] = TimeSeriesDB(root_dir)
+        return _databases[key]
+
+
+@atexit.register
+def close_databases():
+    with _databases_lock:
+        for database in _databases.values():
+            database.close()
+        _databases.clear()
@@ -0,0 +1,230 @@
+import cProfile
+import io
+import os
+import logging
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from config.paths import PROFILE_LOG_DIR
+from config.settings import METRICS_NAMESPACE, PROFILE_PIPELINE
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the histogram buckets of every span
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_DESCRIPTIONS = {
+    "connector_request_seconds": "Latency of endpoint requests, including retries and cache lookups",
+    "connector_decode_seconds": "Time spent decoding endpoint responses",
+    "connector_response_bytes": "Bytes of endpoint response bodies",
+    "connector_rows": "Rows received from endpoints",
+    "connector_failures": "Endpoints that failed to fetch",
+    "validation_issues": "Issues found by the validation of fetched rows, by check and severity",
+    "storage_write_seconds": "Time spent upserting rows into the columnar store",
+    "storage_read_seconds": "Time spent reading datasets from the columnar store",
+    "storage_rows_written": "Rows written into the columnar store",
+    "extractor_load_seconds": "Time spent loading raw endpoint columns for extraction",
+    "extractor_build_seconds": "Time spent merging endpoint columns into a DataFrame",
+    "extractor_write_seconds": "Time spent saving extracted DataFrames",
+    "scheduler_queue_depth": "Requests waiting for the rate limit of an API",
+    "scheduler_in_flight": "Requests in flight to an API",
+    "scheduler_requests": "Requests sent to an API",
+    "scheduler_retries": "Requests to an API that were retried",
+    "scheduler_throttled": "Responses of an API with status 429",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Span:
+    def __init__(self, name: str, labels: Dict[str, str]):
+        self.name = name
+        self.labels = labels
+        self.started_at = time.perf_counter()
+        self.duration: Optional[float] = None
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms rendered in the Prometheus text exposition format. Spans time a block of code
+    into a histogram named after the span and are passed to the span listeners, e.g. to forward them to a tracer.
+    """
+
+    def __init__(self, namespace: str = METRICS_NAMESPACE):
+        self.namespace = namespace
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._listeners: List[Callable[[Span], None]] = []
+        self._collectors: List[Callable[["MetricsRegistry"], None]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = self._get_label_key(labels)
+        with self._lock:
+            counter = self._counters.setdefault(name, {})
+            counter[key] = counter.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[self._get_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._get_label_key(labels)
+        with self._lock:
+            histograms = self._histograms.setdefault(name, {})
+            if key not in histograms:
+                histograms[key] = Histogram()
+            histograms[key].observe(value)
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[Span]:
+        """
+        Time a block into the {name}_seconds histogram. The duration is set on the span when the block exits.
+        """
+        span = Span(name, {key: str(value) for key, value in labels.items()})
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - span.started_at
+            self.observe(f"{name}_seconds", span.duration, **span.labels)
+            for listener in list(self._listeners):
+                try:
+                    listener(span)
+                except Exception as e:
+                    logger.error(f"Span listener failed on {name}: {e}")
+
+    def add_span_listener(self, listener: Callable[[Span], None]):
+        self._listeners.append(listener)
+
+    def remove_span_listener(self, listener: Callable[[Span], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def add_collector(self, collector: Callable[["MetricsRegistry"], None]):
+        """
+        Register a function that updates gauges right before the metrics are rendered
+        """
+        self._collectors.append(collector)
+
+    def get_counter(self, name: str, **labels) -> float:
+        return self._counters.get(name, {}).get(self._get_label_key(labels), 0.0)
+
+    def get_histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(self._get_label_key(labels))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        for collector in list(self._collectors):
+            try:
+                collector(self)
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+
+        lines = []
+        with self._lock:
+            for name, values in sorted(self._counters.items()):
+                self._render_header(lines, name, f"{name}_total", "counter")
+                for key, value in values.items():
+                    lines.append(f"{self.namespace}_{name}_total{self._format_labels(key)} {value}")
+
+            for name, values in sorted(self._gauges.items()):
+                self._render_header(lines, name, name, "gauge")
+                for key, value in values.items():
+                    lines.append(f"{self.namespace}_{name}{self._format_labels(key)} {value}")
+
+            for name, values in sorted(self._histograms.items()):
+                self._render_header(lines, name, name, "histogram")
+                for key, histogram in values.items():
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        labels = self._format_labels(key + (("le", str(bound)),))
+                        lines.append(f"{self.namespace}_{name}_bucket{labels} {count}")
+                    labels = self._format_labels(key + (("le", "+Inf"),))
+                    lines.append(f"{self.namespace}_{name}_bucket{labels} {histogram.count}")
+                    lines.append(f"{self.namespace}_{name}_sum{self._format_labels(key)} {histogram.sum}")
+                    lines.append(f"{self.namespace}_{name}_count{self._format_labels(key)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def _render_header(self, lines: List[str], name: str, metric: str, kind: str):
+        if name in METRIC_DESCRIPTIONS:
+            lines.append(f"# HELP {self.namespace}_{metric} {METRIC_DESCRIPTIONS[name]}")
+        lines.append(f"# TYPE {self.namespace}_{metric} {kind}")
+
+    @staticmethod
+    def _get_label_key(labels: Dict) -> LabelKey:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    @staticmethod
+    def _format_labels(key: LabelKey) -> str:
+        if not key:
+            return ""
+        escaped = (value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in key)
+        return "{" + ",".join(f"{name}=\"{value}\"" for (name, _), value in zip(key, escaped)) + "}"
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """
+    Registry shared by the whole process
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+        return _metrics
+
+
+@contextmanager
+def profile_run(name: str, enabled: Optional[bool] = None,
+                output_dir: Optional[str] = None) -> Iterator[Optional[cProfile.Profile]]:
+    """
+    Profile a pipeline run with cProfile when enabled, defaulting to PROFILE_PIPELINE. The stats are dumped to
+    {output_dir}/{name}-{timestamp}.prof, which can be opened with pstats or snakeviz, and the top functions by
+    cumulative time are logged.
+    """
+    if not (PROFILE_PIPELINE if enabled is None else enabled):
+        yield None
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        output_dir = output_dir or str(PROFILE_LOG_DIR)
+        os.makedirs(output_dir, exist_ok=True)
+        filepath = os.path.join(output_dir, f"{name}-{datetime.now():%Y%m%d-%H%M%S}.prof")
+        profiler.dump_stats(filepath)
+
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(20)
+        logger.info(f"Profile of {name} saved to {filepath}\n{summary.getvalue()}")
@@ -0,0 +1,50 @@
+import sys
+import threading
+import importlib.util
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a module on first attribute access instead of now, so that heavy dependencies such as pandas only slow
+    down the processes that use them. The module is registered in sys.modules, so later regular imports of it get
+    the same module. Modules using it for annotations need `from __future__ import annotations`, otherwise the
+    annotations would load the module when the function is defined.
+    :param name: Absolute module name, e.g. pandas or pyarrow.dataset
+    :return: The module if it is already imported, otherwise a module that loads itself when used
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    module.__class__ = _lazy_module_class(spec)
+    return module
+
+
+def _lazy_module_class(spec) -> type:
+    """
+    Class of a module that executes itself on first attribute access and then turns into a regular module. Threads
+    using it at the same time wait for the load to finish, unlike importlib.util.LazyLoader before Python 3.12.3,
+    which exposes the module half executed.
+    """
+    lock = threading.RLock()
+    loading = []  # Not empty while the module executes, when its own attributes are looked up normally
+
+    class LazyModule(ModuleType):
+        def __getattribute__(self, attr):
+            with lock:
+                if type(self) is LazyModule and not loading:
+                    loading.append(True)
+                    try:
+                        spec.loader.exec_module(self)
+                    finally:
+                        loading.clear()
+                    self.__class__ = ModuleType
+            return ModuleType.__getattribute__(self, attr)
+
+    return LazyModule
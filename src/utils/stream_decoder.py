@@ -0,0 +1,42 @@
+from typing import Dict, List
+
+import ijson
+
+
+class JSONArrayStreamDecoder:
+    """
+    Incrementally decode the items of a JSON array nested in a response body, e.g. the "data" array of an API
+    response, so that the body never has to be held or decoded in memory as a whole.
+    """
+
+    def __init__(self, prefix: str = "data.item"):
+        self._items = ijson.sendable_list()
+        self._coro = ijson.items_coro(self._items, prefix, use_float=True)
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        """
+        Feed the next chunk of the body
+        :param chunk: Raw bytes of the body
+        :return: Items completed by the chunk
+        """
+        try:
+            self._coro.send(chunk)
+        except ijson.JSONError as e:
+            raise ValueError(f"Invalid JSON in response body: {e}") from e
+        return self._drain()
+
+    def close(self) -> List[Dict]:
+        """
+        Signal the end of the body
+        :return: Remaining items
+        """
+        try:
+            self._coro.close()
+        except ijson.JSONError as e:
+            raise ValueError(f"Invalid JSON in response body: {e}") from e
+        return self._drain()
+
+    def _drain(self) -> List[Dict]:
+        items = list(self._items)
+        del self._items[:]
+        return items
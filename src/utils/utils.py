@@ -3,8 +3,12 @@ import os
 import logging
 import time
 from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Union
 from config.paths import create_directories, RAW_DATA_DIR
-from config.settings import DATE_INTERVAL
+from config.settings import DATE_INTERVAL, STORAGE_BACKEND
+from src.models.endpoint_series import EndpointSeries
+from src.storage.columnar_store import ColumnarStore, DateLike
+from src.storage.timeseries_db import get_timeseries_db
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +23,10 @@ def save_json(data, filename: str):
         with open(filepath, "w") as f:
             json.dump(data, f, indent=4)
         logger.info(f"Data saved to {filepath} successfully")
+        return True
     except IOError as e:
         logger.error(f"Error saving data to {filepath}: {e}")
+        return False
 
 def load_json(filename: str):
     filepath = os.path.join(RAW_DATA_DIR, filename)
@@ -33,6 +39,143 @@ def load_json(filename: str):
         logger.error(f"Error loading data from {filepath}: {e}")
         return None
 
+def save_responses(responses: List[Union[EndpointSeries, Dict]], symbol: str, category: str) -> bool:
+    """
+    Merge endpoint responses into the raw store of a symbol and category, deduplicating rows on start_time.
+    The store is selected by STORAGE_BACKEND.
+    :param responses: Series of ResponseModel.data, or responses in the row format
+    :param symbol: Symbol of the responses
+    :param category: Category of the responses
+    :return: True if the responses have been saved
+    """
+    if STORAGE_BACKEND == "parquet":
+        return ColumnarStore(RAW_DATA_DIR).write_responses(symbol, category, responses)
+    if STORAGE_BACKEND == "sqlite":
+        return get_timeseries_db(RAW_DATA_DIR).write_responses(symbol, category, responses)
+
+    responses = [response if isinstance(response, dict) else {"endpoint": response.endpoint, "data": response.to_rows()}
+                 for response in responses]
+    filename = get_raw_filename(symbol, category)
+    existing = load_json(filename) if os.path.exists(os.path.join(RAW_DATA_DIR, filename)) else None
+    return save_json(merge_responses(existing or [], responses), filename)
+
+def load_responses(symbol: str, category: str, columns: Optional[List[str]] = None, start: DateLike = None,
+                   end: DateLike = None) -> Optional[List[Dict]]:
+    """
+    Load the endpoint responses of a symbol and category from the raw store selected by STORAGE_BACKEND
+    :param symbol: Symbol to load
+    :param category: Category to load
+    :param columns: Columns to load besides start_time and date, defaults to all columns
+    :param start: Inclusive start date
+    :param end: Inclusive end date
+    :return: Responses in the format of ResponseModel.data, or None if nothing is stored
+    """
+    if STORAGE_BACKEND in ("parquet", "sqlite"):
+        if STORAGE_BACKEND == "parquet":
+            responses = ColumnarStore(RAW_DATA_DIR).read_responses(symbol, category, columns, start, end)
+        else:
+            responses = get_timeseries_db(RAW_DATA_DIR).read_responses(symbol, category, columns, start, end)
+        if responses is None and os.path.exists(os.path.join(RAW_DATA_DIR, get_raw_filename(symbol, category))):
+            logger.warning(f"{symbol}/{category} is only stored in the legacy JSON format, "
+                           f"run `ctb migrate` to import it into the {STORAGE_BACKEND} store")
+        return responses
+
+    responses = load_json(get_raw_filename(symbol, category))
+    if responses is None or (columns is None and start is None and end is None):
+        return responses
+
+    start_ms = None if start is None else ColumnarStore._to_timestamp_ms(start)
+    end_ms = None if end is None else ColumnarStore._to_timestamp_ms(end)
+    keys = None if columns is None else {"start_time", "date", *columns}
+    return [{
+        "endpoint": response["endpoint"],
+        "data": [
+            row if keys is None else {key: value for key, value in row.items() if key in keys}
+            for row in response["data"]
+            if (start_ms is None or row["start_time"] >= start_ms) and (end_ms is None or row["start_time"] <= end_ms)
+        ]
+    } for response in responses]
+
+def migrate_json_responses() -> Dict[str, bool]:
+    """
+    Import the raw files of the json backend, long-{symbol}-{category}.json, into the store selected by
+    STORAGE_BACKEND. Rows are deduplicated on start_time, so running it again is harmless. The JSON files are kept.
+    :return: Whether each symbol/category has been imported, keyed by symbol/category
+    """
+    if STORAGE_BACKEND == "json":
+        raise ValueError("The json backend reads the JSON files directly, there is nothing to migrate")
+
+    results = {}
+    filenames = sorted(os.listdir(RAW_DATA_DIR)) if os.path.isdir(RAW_DATA_DIR) else []
+    for filename in filenames:
+        if not (filename.startswith("long-") and filename.endswith(".json")):
+            continue
+        # Symbols have no hyphens, categories may have some, e.g. long-btc-glassnode-market.json
+        symbol, category = filename[len("long-"):-len(".json")].split("-", 1)
+        responses = load_json(filename)
+        results[f"{symbol}/{category}"] = responses is not None and save_responses(responses, symbol, category)
+    return results
+
+def raw_data_exists(symbol: str, category: str) -> bool:
+    """
+    Check whether the raw store selected by STORAGE_BACKEND holds data of a symbol and category
+    """
+    if STORAGE_BACKEND == "parquet":
+        return bool(ColumnarStore(RAW_DATA_DIR).list_endpoints(symbol, category))
+    if STORAGE_BACKEND == "sqlite":
+        return bool(get_timeseries_db(RAW_DATA_DIR).list_endpoints(symbol, category))
+    return os.path.exists(os.path.join(RAW_DATA_DIR, get_raw_filename(symbol, category)))
+
+def get_raw_data_files(symbol: str, category: str) -> List[str]:
+    """
+    List the files of the raw store selected by STORAGE_BACKEND that hold data of a symbol and category
+    """
+    if STORAGE_BACKEND == "parquet":
+        root = os.path.join(RAW_DATA_DIR, symbol, category)
+        return sorted(os.path.join(directory, filename)
+                      for directory, _, filenames in os.walk(root) for filename in filenames)
+    if STORAGE_BACKEND == "sqlite":
+        # Every category shares the database, so any write changes the files of every category. The files only
+        # count for the categories that have series in it.
+        database = get_timeseries_db(RAW_DATA_DIR)
+        return database.get_files() if database.list_endpoints(symbol, category) else []
+
+    filepath = os.path.join(RAW_DATA_DIR, get_raw_filename(symbol, category))
+    return [filepath] if os.path.exists(filepath) else []
+
+def get_raw_filename(symbol: str, category: str) -> str:
+    """
+    Get the filename of the raw data file of a symbol and category
+    :param symbol: Symbol, e.g. btc
+    :param category: Endpoint category, e.g. market-data
+    :return: Filename relative to RAW_DATA_DIR
+    """
+    return f"long-{symbol}-{category}.json"
+
+def merge_endpoint_data(existing: List[Dict], new: List[Dict], key: str = "start_time") -> List[Dict]:
+    """
+    Merge the rows of an endpoint, deduplicating on the key. New rows replace existing rows with the same key.
+    :param existing: Rows already stored
+    :param new: Newly fetched rows
+    :param key: Field that identifies a row
+    :return: Merged rows sorted by key
+    """
+    merged = {row[key]: row for row in existing}
+    merged.update({row[key]: row for row in new})
+    return [merged[k] for k in sorted(merged)]
+
+def merge_responses(existing: List[Dict], new: List[Dict]) -> List[Dict]:
+    """
+    Merge newly fetched endpoint responses into the stored responses of the same category
+    :param existing: Stored responses in the format [{"endpoint": ..., "data": [...]}]
+    :param new: Newly fetched responses in the same format
+    :return: Merged responses
+    """
+    merged = {response["endpoint"]: response["data"] for response in existing}
+    for response in new:
+        merged[response["endpoint"]] = merge_endpoint_data(merged.get(response["endpoint"], []), response["data"])
+    return [{"endpoint": endpoint, "data": data} for endpoint, data in merged.items()]
+
 def convert_datetime_to_unix_timestamp(date_time: datetime | str):
     """
     Convert datetime from YYYY-mm-dd HH:MM:SS into UNIX timestamp in milliseconds
@@ -61,5 +204,4 @@ def get_start_time(interval: int = 7) -> int:
     :return: UNIX timestamp of computed_start_time in milliseconds
     """
     start_time = datetime.today() - timedelta(days=interval)
-    print("start_time:", start_time)
     return int(start_time.timestamp() * 1000)
@@ -0,0 +1,174 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+import httpx
+
+from src.api_integrator.cryptoquant_connector import CryptoQuantConnector
+from src.api_integrator.request_scheduler import RequestScheduler
+from src.api_integrator.fetch_checkpoint import FetchCheckpoint
+from src.api_integrator.watermark_store import WatermarkStore
+from src.pipeline.data_validator import DataValidator, ValidationState
+from src.utils.utils import load_responses
+from tests.helpers import DAY_1, mock_handler
+
+DAY_2, DAY_3 = 1742428800000, 1742515200000
+
+
+class CryptoQuantConnectorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.requested_endpoints = []
+        self.failing_endpoints = {"mvrv"}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requested_endpoints.append(request.url.path.split("/")[-1])
+            return mock_handler(request, self.failing_endpoints, labelled=True)
+
+        scheduler = RequestScheduler(max_retries=1, backoff_base=0.001)
+        self.checkpoint = FetchCheckpoint(self.temp_dir.name)
+        # The mocked rows hold text, which the validator would reject, so issues are only reported
+        validator = DataValidator(ValidationState(os.path.join(self.temp_dir.name, "validation.json")), reject_checks=[])
+        self.connector = CryptoQuantConnector(transport=httpx.MockTransport(handler), scheduler=scheduler,
+                                              checkpoint=self.checkpoint, validator=validator)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_fetch_all_returns_response_per_symbol_and_category(self):
+        results = self.connector.fetch_all(["btc", "eth"], ["exchange-flows", "network-data"], max_concurrency=4)
+
+        assert set(results.keys()) == {"btc", "eth"}
+        for symbol in ["btc", "eth"]:
+            for category in ["exchange-flows", "network-data"]:
+                response = results[symbol][category]
+                assert response.is_success
+                endpoints = [series.endpoint for series in response.data]
+                assert endpoints == list(CryptoQuantConnector.ENDPOINTS_PARAMS[category].keys())
+                assert response.data[0].columns[endpoints[0]].tolist() == [f"{symbol}-{category}"]
+
+    def test_fetch_all_keeps_partial_results_on_http_error(self):
+        results = self.connector.fetch_all(["btc"], ["market-indicator", "flow-indicator"])
+
+        response = results["btc"]["market-indicator"]
+        assert not response.is_success
+        assert response.failed_endpoints == ["mvrv"]
+        assert "HTTP Error occurred" in response.endpoint_results[2].message
+        assert [series.endpoint for series in response.data] == ["estimated-leverage-ratio",
+                                                                 "stablecoin-supply-ratio", "sopr"]
+        assert results["btc"]["flow-indicator"].is_success
+
+    def test_retry_only_fetches_failed_endpoints(self):
+        self.connector.fetch_all(["btc"], ["market-indicator"])
+        self.failing_endpoints = set()
+        self.requested_endpoints.clear()
+
+        response = self.connector.fetch_all(["btc"], ["market-indicator"])["btc"]["market-indicator"]
+
+        assert response.is_success
+        assert self.requested_endpoints == ["mvrv"]
+        assert sorted(series.endpoint for series in response.data) == sorted(
+            CryptoQuantConnector.ENDPOINTS_PARAMS["market-indicator"].keys())
+        assert self.checkpoint.load("btc", "market-indicator") == []
+
+    def test_fetch_all_rejects_invalid_category(self):
+        results = self.connector.fetch_all(["btc"], ["unknown"])
+
+        assert not results["btc"]["unknown"].is_success
+
+
+
+class IncrementalFetchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        raw_dir = Path(self.temp_dir.name)
+        self.patchers = [
+            patch("src.utils.utils.RAW_DATA_DIR", raw_dir),
+            patch("src.api_integrator.base_connector.RAW_DATA_DIR", raw_dir),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+        self.requested_start_times = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            start_time = int(request.url.params["start_time"])
+            self.requested_start_times.append(start_time)
+            rows = [{"start_time": t, "date": str(t), "value": t} for t in (DAY_1, DAY_2, DAY_3) if t >= start_time]
+            return httpx.Response(200, json={"data": rows}, request=request)
+
+        self.watermarks = WatermarkStore(os.path.join(self.temp_dir.name, "watermarks.json"))
+        self.connector = CryptoQuantConnector(transport=httpx.MockTransport(handler), watermarks=self.watermarks,
+                                              checkpoint=FetchCheckpoint(self.temp_dir.name))
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+        self.temp_dir.cleanup()
+
+    def test_save_data_merges_rows_and_advances_watermark(self):
+        self.connector.save_data("btc", "market-indicator", [{"endpoint": "mvrv", "data": [
+            {"start_time": DAY_1, "value": 1}, {"start_time": DAY_2, "value": 2}
+        ]}])
+        self.connector.save_data("btc", "market-indicator", [{"endpoint": "mvrv", "data": [
+            {"start_time": DAY_2, "value": 20}, {"start_time": DAY_3, "value": 30}
+        ]}])
+
+        stored = load_responses("btc", "market-indicator")
+        assert stored == [{"endpoint": "mvrv", "data": [
+            {"start_time": DAY_1, "value": 1}, {"start_time": DAY_2, "value": 20}, {"start_time": DAY_3, "value": 30}
+        ]}]
+        assert WatermarkStore(self.watermarks.filepath).get("btc", "market-indicator", "mvrv") == DAY_3
+
+    def test_save_data_merges_rows_with_json_backend(self):
+        with patch("src.utils.utils.STORAGE_BACKEND", "json"):
+            self.test_save_data_merges_rows_and_advances_watermark()
+            assert os.path.exists(os.path.join(self.temp_dir.name, "long-btc-market-indicator.json"))
+
+    def test_incremental_fetch_requests_rows_from_watermark(self):
+        self.connector.save_data("btc", "market-indicator", [{"endpoint": "mvrv", "data": [
+            {"start_time": DAY_1, "value": 1}, {"start_time": DAY_2, "value": 2}
+        ]}])
+
+        response = self.connector.fetch_all(["btc"], ["market-indicator"], incremental=True)["btc"]["market-indicator"]
+
+        assert response.is_success
+        mvrv = next(series for series in response.data if series.endpoint == "mvrv")
+        assert mvrv.start_time.tolist() == [DAY_2, DAY_3]
+        assert DAY_2 in self.requested_start_times
+
+
+    def test_stream_fetch_writes_rows_into_raw_store(self):
+        with patch("src.api_integrator.base_connector.STREAM_BATCH_SIZE", 2):
+            response = self.connector.fetch_all(["btc"], ["market-indicator"], stream=True)["btc"]["market-indicator"]
+
+        assert response.is_success
+        assert [result.rows for result in response.endpoint_results] == [3, 3, 3, 3]
+        stored = {item["endpoint"]: item["data"] for item in load_responses("btc", "market-indicator")}
+        assert [row["start_time"] for row in stored["mvrv"]] == [DAY_1, DAY_2, DAY_3]
+        assert WatermarkStore(self.watermarks.filepath).get("btc", "market-indicator", "mvrv") == DAY_3
+        # Every batch has been validated and has advanced the validation state
+        state = ValidationState(self.connector.validator.state.filepath)
+        assert state.get("btc", "market-indicator", "mvrv")["start_time"] == DAY_3
+
+    def test_stream_fetch_rejects_invalid_batches(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            rows = [{"start_time": DAY_1, "value": 1}, {"start_time": DAY_1, "value": 2}]
+            return httpx.Response(200, json={"data": rows}, request=request)
+
+        connector = CryptoQuantConnector(transport=httpx.MockTransport(handler), watermarks=self.watermarks,
+                                         checkpoint=FetchCheckpoint(self.temp_dir.name))
+        response = connector.fetch_all(["btc"], ["market-indicator"], stream=True)["btc"]["market-indicator"]
+
+        assert not response.is_success
+        assert all(result.message.startswith("Invalid data: 1 duplicated start times")
+                   for result in response.endpoint_results)
+        assert load_responses("btc", "market-indicator") is None
+        assert WatermarkStore(self.watermarks.filepath).get("btc", "market-indicator", "mvrv") is None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import httpx
+
+from src.api_integrator.providers import get_connectors, fetch_providers
+from src.api_integrator.request_scheduler import RequestScheduler
+from src.api_integrator.fetch_checkpoint import FetchCheckpoint
+from src.api_integrator.watermark_store import WatermarkStore
+from src.utils.utils import load_responses
+from tests.helpers import DAY_1, mock_handler
+
+
+class ProvidersTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request.url)
+            return mock_handler(request)
+
+        self.watermarks = WatermarkStore(os.path.join(self.temp_dir.name, "watermarks.json"))
+        self.connectors = get_connectors(
+            transport=httpx.MockTransport(handler), scheduler=RequestScheduler(max_retries=1, backoff_base=0.001),
+            watermarks=self.watermarks, checkpoint=FetchCheckpoint(os.path.join(self.temp_dir.name, "checkpoints"))
+        )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_fetch_providers_fetches_every_provider_in_one_refresh(self):
+        results = fetch_providers(self.connectors, ["btc"], {"cryptoquant": ["market-indicator"],
+                                                           "glassnode": ["indicators"]})
+
+        assert set(results.keys()) == {"cryptoquant", "glassnode", "coinglass"}
+        assert results["cryptoquant"]["btc"]["market-indicator"].is_success
+        assert list(results["glassnode"]["btc"].keys()) == ["indicators"]
+        assert results["coinglass"]["btc"]["futures"].is_success
+
+    def test_urls_follow_provider_catalogs(self):
+        fetch_providers(self.connectors, ["btc"], {"cryptoquant": ["market-indicator"], "glassnode": ["indicators"]})
+
+        sopr = next(url for url in self.requests if url.path == "/glassnode/indicators/sopr")
+        assert sopr.params["a"] == "BTC"
+        assert sopr.params["i"] == "24h"
+
+        funding = next(url for url in self.requests if "fundingRate" in url.path)
+        assert funding.path == "/coinglass/futures/fundingRate/ohlc-history"
+        assert funding.params["symbol"] == "BTCUSDT"
+        assert "path" not in funding.params
+
+    def test_native_rows_are_normalized(self):
+        results = fetch_providers(self.connectors, ["btc"], {"glassnode": ["indicators"]})
+
+        glassnode_rows = results["glassnode"]["btc"]["indicators"].data[0].to_rows()
+        assert glassnode_rows == [{"start_time": DAY_1, "sopr": 1.5}]
+
+        coinglass_rows = results["coinglass"]["btc"]["futures"].data[0].to_rows()
+        assert coinglass_rows[0]["start_time"] == DAY_1
+        assert coinglass_rows[0]["open_interest_c"] == 1.5
+
+    def test_save_data_keeps_providers_apart(self):
+        connectors = {connector.PROVIDER: connector for connector in self.connectors}
+        results = fetch_providers(self.connectors, ["btc"], {"cryptoquant": ["market-indicator"],
+                                                           "glassnode": ["market"]})
+
+        with patch("src.utils.utils.RAW_DATA_DIR", self.temp_dir.name):
+            for provider, symbols in results.items():
+                for category, response in symbols["btc"].items():
+                    assert connectors[provider].save_data("btc", category, response.data)
+
+            assert load_responses("btc", "market-indicator") is not None
+            assert load_responses("btc", "glassnode-market") is not None
+            assert load_responses("btc", "coinglass-futures") is not None
+
+        assert self.watermarks.get("btc", "glassnode-market", "price_usd_close") == DAY_1
+        assert self.watermarks.get("btc", "market-indicator", "mvrv") == DAY_1
+
+    def test_stream_requires_the_parquet_backend(self):
+        with patch("src.api_integrator.base_connector.STORAGE_BACKEND", "json"), self.assertRaises(ValueError):
+            fetch_providers(self.connectors, ["btc"], {"cryptoquant": ["market-indicator"]}, stream=True)
+
+        assert self.requests == []
+
+
+if __name__ == '__main__':
+    unittest.main()
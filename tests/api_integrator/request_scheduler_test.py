@@ -0,0 +1,88 @@
+import asyncio
+import time
+import unittest
+import httpx
+
+from src.api_integrator.request_scheduler import RequestScheduler, TokenBucket
+
+API_URL = "https://api.example.com/cryptoquant"
+
+
+class TokenBucketTestCase(unittest.TestCase):
+
+    def test_reserve_spaces_requests_beyond_capacity(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+
+        waits = [bucket.reserve() for _ in range(4)]
+
+        assert waits[0] == 0 and waits[1] == 0
+        assert 0.05 < waits[2] <= 0.1
+        assert 0.15 < waits[3] <= 0.2
+
+    def test_pause_delays_next_reservation(self):
+        bucket = TokenBucket(rate=100, capacity=10)
+        bucket.pause(0.5)
+
+        assert bucket.reserve() > 0.45
+
+
+class RequestSchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = RequestScheduler(rate_limits={API_URL: 1000}, max_retries=3, backoff_base=0.001)
+
+    def request(self, handler, url=f"{API_URL}/btc/market-data/price-ohlcv"):
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await self.scheduler.request(client, "GET", url)
+        return asyncio.run(run())
+
+    def test_get_host_uses_longest_configured_api_url(self):
+        assert self.scheduler.get_host(f"{API_URL}/btc/market-data") == API_URL
+        assert self.scheduler.get_host("https://other.example.com/a/b") == "https://other.example.com"
+
+    def test_retries_throttled_request_after_retry_after(self):
+        calls = []
+
+        def handler(request):
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0.2"})
+            return httpx.Response(200, json={"data": []})
+
+        response = self.request(handler)
+
+        assert response.status_code == 200
+        assert calls[1] - calls[0] >= 0.19
+        stats = self.scheduler.stats()[API_URL]
+        assert stats["throttled"] == 1 and stats["retries"] == 1 and stats["requests"] == 2
+
+    def test_returns_last_response_when_retries_are_exhausted(self):
+        response = self.request(lambda request: httpx.Response(503))
+
+        assert response.status_code == 503
+        stats = self.scheduler.stats()[API_URL]
+        assert stats["requests"] == 4 and stats["failures"] == 1
+        assert stats["queue_depth"] == 0 and stats["in_flight"] == 0
+
+    def test_does_not_retry_client_errors(self):
+        response = self.request(lambda request: httpx.Response(404))
+
+        assert response.status_code == 404
+        assert self.scheduler.stats()[API_URL]["retries"] == 0
+
+    def test_retries_connection_errors(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) < 3:
+                raise httpx.ConnectError("Connection refused", request=request)
+            return httpx.Response(200)
+
+        assert self.request(handler).status_code == 200
+        assert len(calls) == 3
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import tempfile
+import unittest
+import httpx
+
+from src.api_integrator.http_transport import HTTPTransport
+from src.api_integrator.request_scheduler import RequestScheduler
+from src.api_integrator.response_cache import ResponseCache
+
+DAY_1, DAY_2 = 1742342400000, 1742428800000
+URL = "https://api.datasource.cybotrade.rs/cryptoquant/btc/market-indicator/mvrv?start_time={}&limit=10000&window=day"
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.temp_dir.name)
+        self.requests = []
+        self.etag = '"v1"'
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            if request.headers.get("if-none-match") == self.etag:
+                return httpx.Response(304, headers={"ETag": self.etag}, request=request)
+            return httpx.Response(200, json={"data": [{"start_time": DAY_1, "mvrv": 1.5}]},
+                                  headers={"ETag": self.etag}, request=request)
+
+        self.mock_transport = httpx.MockTransport(handler)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def get(self, url: str, cache: ResponseCache = None) -> httpx.Response:
+        async def get():
+            async with HTTPTransport(scheduler=RequestScheduler(max_retries=0), transport=self.mock_transport,
+                                     cache=cache or self.cache) as transport:
+                return await transport.get(url)
+        return asyncio.run(get())
+
+    def test_key_canonicalizes_start_time_to_the_window(self):
+        key = self.cache.get_key(URL.format(DAY_1 + 1234))
+
+        assert key == self.cache.get_key(URL.format(DAY_1 + 5678))
+        assert key != self.cache.get_key(URL.format(DAY_2 + 1234))
+        reordered = ("https://api.datasource.cybotrade.rs/cryptoquant/btc/market-indicator/mvrv"
+                     f"?window=day&limit=10000&start_time={DAY_1}")
+        assert key == self.cache.get_key(reordered)
+
+    def test_ttl_by_category_then_window(self):
+        cache = ResponseCache(self.temp_dir.name, ttls={"market-indicator": 10, "hour": 20, "day": 30})
+
+        assert cache.get_ttl(URL.format(DAY_1)) == 10
+        assert cache.get_ttl("https://api.datasource.cybotrade.rs/glassnode/indicators/sopr?a=BTC&i=1h") == 20
+        assert cache.get_ttl("https://api.datasource.cybotrade.rs/coinglass/futures/x?interval=1d") == 30
+
+    def test_fresh_entry_is_served_without_request(self):
+        first = self.get(URL.format(DAY_1))
+        second = self.get(URL.format(DAY_1 + 1000))
+
+        assert len(self.requests) == 1
+        assert second.json() == first.json()
+        assert self.cache.stats()["hits"] == 1
+
+    def test_stale_entry_is_revalidated_with_etag(self):
+        cache = ResponseCache(self.temp_dir.name, ttls={"day": 0})
+        first = self.get(URL.format(DAY_1), cache)
+        second = self.get(URL.format(DAY_1), cache)
+
+        assert len(self.requests) == 2
+        assert self.requests[1].headers["if-none-match"] == self.etag
+        assert second.status_code == 200
+        assert second.json() == first.json()
+        assert cache.stats()["revalidated"] == 1
+
+    def test_size_cap_evicts_least_recently_used(self):
+        self.get(URL.format(DAY_1))
+        entry_bytes = self.cache.total_bytes
+        cache = ResponseCache(self.temp_dir.name, max_bytes=int(entry_bytes * 2.5))
+
+        self.get(URL.format(DAY_2), cache)
+        cache.load(URL.format(DAY_1))  # DAY_2 is now the least recently used entry
+        self.get(URL.format(DAY_2 + 86400000), cache)
+
+        assert cache.stats()["evictions"] == 1
+        assert cache.load(URL.format(DAY_1)) is not None
+        assert cache.load(URL.format(DAY_2)) is None
+
+    def test_touch_after_concurrent_eviction(self):
+        self.get(URL.format(DAY_1))
+        key = self.cache.get_key(URL.format(DAY_1))
+
+        # Another thread evicts the entry between reading it and recording the hit
+        self.cache._remove(key)
+        self.cache._touch(key)
+
+        assert self.cache.load(URL.format(DAY_1)) is None
+
+    def test_index_survives_restart(self):
+        self.get(URL.format(DAY_1))
+
+        reopened = ResponseCache(self.temp_dir.name)
+        assert reopened.stats()["entries"] == 1
+        assert reopened.total_bytes == self.cache.total_bytes
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.backtesting.backtester import BacktestConfig, VectorizedBacktester, momentum, sma_crossover
+
+
+def make_close(days, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2025-01-01", periods=days, freq="D", name="date")
+    return pd.Series(100 * np.cumprod(1 + rng.normal(0, 0.02, days)), index=index)
+
+
+class VectorizedBacktesterTestCase(unittest.TestCase):
+
+    def test_run_matches_bar_by_bar_reference(self):
+        close = make_close(200)
+        config = BacktestConfig(fee_rate=0.002)
+        signals = sma_crossover(close.to_numpy(), 5, 20)
+
+        result = VectorizedBacktester(close, config).run(signals)
+
+        # Positions follow the signal of the previous close and pay fees on every change
+        equity, position, peak, drawdown = 1.0, 0.0, 1.0, 0.0
+        for i in range(1, len(close)):
+            target = 0.0 if np.isnan(signals[i - 1]) else signals[i - 1]
+            equity *= 1 + target * (close.iloc[i] / close.iloc[i - 1] - 1) - abs(target - position) * 0.002
+            position, peak = target, max(peak, equity)
+            drawdown = min(drawdown, equity / peak - 1)
+
+        self.assertAlmostEqual(result.total_return, equity - 1)
+        self.assertAlmostEqual(result.max_drawdown, drawdown)
+        assert result.positions[0] == 0 and len(result.equity) == len(close)
+
+    def test_buy_and_hold_without_fees(self):
+        close = pd.Series([100.0, 110.0, np.nan, 99.0, 121.0],
+                          index=pd.date_range("2025-01-01", periods=5, freq="D", name="date"))
+        backtester = VectorizedBacktester(close, BacktestConfig(fee_rate=0.0))
+
+        result = backtester.run(pd.Series(1.0, index=close.index))
+
+        self.assertAlmostEqual(result.total_return, 0.21)
+        self.assertAlmostEqual(result.max_drawdown, -0.1)
+        assert result.trades == 1 and result.exposure == 0.8
+
+    def test_long_only_clips_short_signals(self):
+        close = make_close(50)
+        backtester = VectorizedBacktester(close, BacktestConfig(allow_short=False))
+
+        result = backtester.run(np.full(len(close), -1.0))
+
+        assert result.trades == 0 and result.total_return == 0
+
+    def test_sweep_matches_individual_runs(self):
+        close = make_close(300)
+        backtester = VectorizedBacktester(close)
+
+        sweep = backtester.sweep(momentum, {"lookback": [5, 10, 20], "threshold": [0.0, 0.05]}, workers=2,
+                                 batch_size=4)
+
+        assert len(sweep) == 6
+        assert sweep["sharpe"].is_monotonic_decreasing
+        best = sweep.iloc[0]
+        expected = backtester.run(momentum(backtester.prices, int(best["lookback"]), best["threshold"]))
+        self.assertAlmostEqual(best["total_return"], expected.total_return)
+
+    def test_rejects_misaligned_signals(self):
+        with self.assertRaises(ValueError):
+            VectorizedBacktester(make_close(10)).run(np.ones(9))
+
+    def test_signals_reject_empty_windows(self):
+        with self.assertRaisesRegex(ValueError, "lookback"):
+            momentum(make_close(10).to_numpy(), 0)
+        with self.assertRaisesRegex(ValueError, "fast"):
+            sma_crossover(make_close(10).to_numpy(), 0, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
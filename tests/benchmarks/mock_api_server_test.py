@@ -0,0 +1,68 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import httpx
+
+from benchmarks.mock_api_server import MockAPIConfig, MockAPIServer
+from src.api_integrator.providers import get_connectors, fetch_providers
+from src.api_integrator.request_scheduler import RequestScheduler
+from src.api_integrator.fetch_checkpoint import FetchCheckpoint
+from src.api_integrator.watermark_store import WatermarkStore
+
+CATEGORIES = {"cryptoquant": ["market-indicator"], "glassnode": ["indicators"], "coinglass": ["futures"]}
+
+
+class MockAPIServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def fetch(self, server: MockAPIServer, max_retries: int = 1):
+        connectors = get_connectors(
+            transport=server.transport(), scheduler=RequestScheduler(max_retries=max_retries, backoff_base=0.001),
+            watermarks=WatermarkStore(os.path.join(self.temp_dir.name, "watermarks.json")),
+            checkpoint=FetchCheckpoint(os.path.join(self.temp_dir.name, "checkpoints"))
+        )
+        return fetch_providers(connectors, ["btc"], CATEGORIES, resume=False)
+
+    def test_serves_every_catalog_route(self):
+        server = MockAPIServer(MockAPIConfig(rows=50, symbols=["btc"]))
+        results = self.fetch(server)
+
+        for provider, categories in CATEGORIES.items():
+            for category in categories:
+                response = results[provider]["btc"][category]
+                assert response.is_success, response.message
+                assert all(result.rows == 50 for result in response.endpoint_results)
+        assert server.stats.errors == 0
+        assert server.stats.bytes_sent > 0
+
+    def test_filters_rows_by_start_time_and_limit(self):
+        server = MockAPIServer(MockAPIConfig(rows=50, symbols=["btc"]))
+        _, routes = server.routes["/cryptoquant/btc/market-indicator/mvrv"]
+        start_times, _ = server._get_payload(routes[None])
+
+        async def get(url: str) -> httpx.Response:
+            async with httpx.AsyncClient(transport=server.transport()) as client:
+                return await client.get(url)
+
+        url = f"http://mock/cryptoquant/btc/market-indicator/mvrv?start_time={start_times[10]}&limit=5"
+        data = asyncio.run(get(url)).json()["data"]
+        assert [row["start_time"] for row in data] == start_times[10:15]
+
+    def test_injects_errors_and_throttling(self):
+        server = MockAPIServer(MockAPIConfig(rows=10, symbols=["btc"], error_rate=0.5, throttle_rate=0.5))
+        results = self.fetch(server, max_retries=0)
+
+        assert server.stats.errors + server.stats.throttled == server.stats.requests
+        assert server.stats.throttled > 0
+        assert not any(response.is_success for categories in results.values()
+                       for response in categories["btc"].values())
+
+
+if __name__ == '__main__':
+    unittest.main()
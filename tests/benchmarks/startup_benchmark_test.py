@@ -0,0 +1,36 @@
+import subprocess
+import sys
+import unittest
+
+from benchmarks.startup_benchmark import ENTRY_POINTS, PROJECT_DIR
+
+# Heavy modules that each entry point uses, but must only load when they are used. The import times are measured
+# by the benchmark itself, wall-clock budgets depend too much on the machine to be tested.
+DEFERRED_IMPORTS = {"api": ["pandas", "pyarrow.dataset"], "fetch": ["pandas", "pyarrow.dataset", "fastapi"]}
+
+
+def get_loaded_modules(module: str, names: list) -> list:
+    """
+    Import a module in a fresh interpreter and list which of the given modules it has loaded. A module that is
+    imported lazily is in sys.modules too, but is not a plain module until it is used.
+    """
+    code = (f"import sys, types, {module}\n"
+            f"print(*[name for name in {names!r} if type(sys.modules.get(name)) is types.ModuleType])\n")
+    process = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, capture_output=True, text=True,
+                             check=True)
+    return process.stdout.split()
+
+
+class StartupBenchmarkTestCase(unittest.TestCase):
+
+    def test_entry_points_defer_heavy_imports(self):
+        for entry_point, module in ENTRY_POINTS.items():
+            with self.subTest(entry_point=entry_point):
+                assert get_loaded_modules(module, DEFERRED_IMPORTS[entry_point]) == []
+
+    def test_used_modules_are_loaded(self):
+        assert get_loaded_modules("src.main", ["fastapi", "pandas"]) == ["fastapi"]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import patch
+
+from src.api_integrator.providers import get_connectors
+from src.cli import main, select_categories
+from src.utils.utils import load_responses
+
+
+class CLITestCase(unittest.TestCase):
+
+    def test_select_categories_by_catalog_or_storage_name(self):
+        connectors = get_connectors()
+
+        selected = select_categories(connectors, ["market-data", "glassnode-supply", "futures"])
+        assert selected == {"cryptoquant": ["market-data"], "glassnode": ["supply"], "coinglass": ["futures"]}
+        assert select_categories(connectors, ["all"])["glassnode"] == list(connectors[1].ENDPOINTS_PARAMS.keys())
+
+        with self.assertRaises(ValueError):
+            select_categories(connectors, ["unknown"])
+
+    def test_dry_run_prints_the_plan(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = main(["refresh", "--dry-run", "--no-resume", "--symbols", "btc", "--providers", "glassnode",
+                           "--categories", "supply"])
+
+        assert status == 0
+        assert "glassnode-supply" in output.getvalue()
+        assert "1 categories" in output.getvalue()
+
+    def test_migrate_imports_legacy_json_files(self):
+        with tempfile.TemporaryDirectory() as temp_dir, patch("src.utils.utils.RAW_DATA_DIR", Path(temp_dir)):
+            legacy = [{"endpoint": "mvrv", "data": [{"start_time": 1735689600000, "date": "", "mvrv": 1.5}]}]
+            with open(os.path.join(temp_dir, "long-btc-glassnode-market.json"), "w") as f:
+                json.dump(legacy, f)
+            assert load_responses("btc", "glassnode-market") is None
+
+            with redirect_stdout(io.StringIO()) as output:
+                status = main(["migrate"])
+
+            assert status == 0
+            assert "btc/glassnode-market" in output.getvalue()
+            responses = load_responses("btc", "glassnode-market")
+            assert responses[0]["endpoint"] == "mvrv" and responses[0]["data"][0]["mvrv"] == 1.5
+
+
+if __name__ == '__main__':
+    unittest.main()
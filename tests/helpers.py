@@ -0,0 +1,69 @@
+import contextlib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+DAY_MS = 24 * 60 * 60 * 1000
+JAN_1_2020 = 1577836800000
+JAN_1_2025 = 1735689600000
+DAY_1 = 1742342400000
+
+
+def make_rows(field, days, offset=0, value=float, start_time=JAN_1_2025):
+    """
+    Daily rows of one field, valued by their day number
+    """
+    return [{"start_time": start_time + (offset + i) * DAY_MS, "date": "", field: value(offset + i)}
+            for i in range(days)]
+
+
+def mock_handler(request: httpx.Request, failing_endpoints=(), labelled=False) -> httpx.Response:
+    """
+    One row per endpoint in the format of its provider.
+
+    :param failing_endpoints: Endpoints answered with a server error
+    :param labelled: Value the CryptoQuant rows with their symbol and category instead of a number
+    """
+    path = request.url.path
+    if path.startswith("/glassnode/"):
+        return httpx.Response(200, json={"data": [{"t": DAY_1 // 1000, "v": 1.5}]}, request=request)
+    if path.startswith("/coinglass/"):
+        row = {"t": DAY_1, "o": 1.0, "h": 2.0, "l": 0.5, "c": 1.5}
+        return httpx.Response(200, json={"data": [row]}, request=request)
+    symbol, category, endpoint = path.split("/")[-3:]
+    if endpoint in failing_endpoints:
+        return httpx.Response(500, request=request)
+    row = {"start_time": DAY_1, "date": "2025-03-19 00:00:00", endpoint: f"{symbol}-{category}" if labelled else 1.0}
+    return httpx.Response(200, json={"data": [row]}, request=request)
+
+
+@contextlib.contextmanager
+def patch_data_dirs(root: Path):
+    """
+    Store the raw data in root/raw and the processed data in root/processed. Like data/raw, the raw directory
+    exists up front.
+    """
+    (root / "raw").mkdir(exist_ok=True)
+    with patch("src.utils.utils.RAW_DATA_DIR", root / "raw"), \
+            patch("src.pipeline.json_extractor.RAW_DATA_DIR", root / "raw"), \
+            patch("src.pipeline.json_extractor.PROCESSED_DATA_DIR", root / "processed"), \
+            patch("src.pipeline.derived_features.PROCESSED_DATA_DIR", root / "processed"):
+        yield
+
+
+class DataDirTestCase(unittest.TestCase):
+    """
+    Every test runs against empty data directories in a temporary directory
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.raw_dir = Path(self.temp_dir.name) / "raw"
+        self.processed_dir = Path(self.temp_dir.name) / "processed"
+        patches = contextlib.ExitStack()
+        patches.enter_context(patch_data_dirs(Path(self.temp_dir.name)))
+        self.addCleanup(patches.close)
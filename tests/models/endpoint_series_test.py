@@ -0,0 +1,59 @@
+import json
+import unittest
+
+import numpy as np
+
+from src.models.endpoint_series import EndpointSeries
+
+DAY_1, DAY_2, DAY_3 = 1742342400000, 1742428800000, 1742515200000
+
+ROWS = [
+    {"start_time": DAY_1, "date": "2025-03-19 00:00:00", "reserve": 10, "exchange": "binance"},
+    {"start_time": DAY_2, "date": "2025-03-20 00:00:00", "reserve": 11.5, "exchange": "binance", "netflow": None},
+    {"start_time": DAY_3, "date": "2025-03-21 00:00:00", "netflow": -2.0},
+]
+
+
+class EndpointSeriesTestCase(unittest.TestCase):
+
+    def test_from_rows_builds_typed_columns(self):
+        series = EndpointSeries.from_rows("reserve", ROWS)
+
+        assert len(series) == 3 and series.latest_start_time == DAY_3
+        assert series.start_time.dtype == np.int64
+        assert list(series.columns) == ["reserve", "exchange", "netflow"]
+        np.testing.assert_array_equal(series.columns["reserve"], [10.0, 11.5, np.nan])
+        np.testing.assert_array_equal(series.columns["netflow"], [np.nan, np.nan, -2.0])
+        assert series.columns["exchange"].tolist() == ["binance", "binance", None]
+        assert list(series.to_columns()) == ["start_time", "reserve", "netflow"]
+
+    def test_to_rows_leaves_out_missing_values(self):
+        rows = EndpointSeries.from_rows("reserve", ROWS).to_rows()
+
+        assert rows == [
+            {"start_time": DAY_1, "reserve": 10.0, "exchange": "binance"},
+            {"start_time": DAY_2, "reserve": 11.5, "exchange": "binance"},
+            {"start_time": DAY_3, "netflow": -2.0},
+        ]
+
+    def test_dict_round_trip_through_json(self):
+        series = EndpointSeries.from_rows("reserve", ROWS)
+
+        restored = EndpointSeries.from_dict(json.loads(json.dumps(series.to_dict())))
+
+        assert restored.endpoint == "reserve"
+        assert restored.to_rows() == series.to_rows()
+        assert restored.columns["reserve"].dtype == np.float64
+
+    def test_buffers_are_smaller_than_rows(self):
+        rows = [{"start_time": DAY_1 + i, "date": "2025-03-19 00:00:00", "reserve": float(i), "netflow": float(i)}
+                for i in range(10000)]
+
+        series = EndpointSeries.from_rows("reserve", rows)
+
+        assert series.nbytes == 10000 * 8 * 3
+        assert series.to_table().num_rows == 10000
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import multiprocessing
+import unittest
+
+from src.pipeline.batch_extractor import BatchExtractor
+from src.utils.utils import save_responses
+from tests.helpers import DataDirTestCase, make_rows
+
+
+@unittest.skipUnless(multiprocessing.get_start_method() == "fork", "workers inherit the patched paths via fork")
+class BatchExtractorTestCase(DataDirTestCase):
+
+    def test_extract_all_returns_frames_and_timings(self):
+        for symbol in ("btc", "eth"):
+            save_responses([{"endpoint": "mvrv", "data": make_rows("mvrv", 10)},
+                            {"endpoint": "sopr", "data": make_rows("sopr", 10)}], symbol, "market-indicator")
+
+        extractor = BatchExtractor(workers=2)
+        results = extractor.extract_all(["btc", "eth"], ["market-indicator", "market-data"])
+
+        for symbol in ("btc", "eth"):
+            response = results[symbol]["market-indicator"]
+            assert response.is_success
+            assert list(response.data.columns) == ["mvrv", "sopr"]
+            assert response.data.index.name == "date" and response.data.index.dtype.kind == "M"
+            assert not results[symbol]["market-data"].is_success
+
+        assert len(extractor.timings) == 4
+        assert sum(timing.rows for timing in extractor.timings) == 20
+        assert "btc/market-indicator" in extractor.format_timings()
+
+
+if __name__ == '__main__':
+    unittest.main()
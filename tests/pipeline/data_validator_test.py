@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+import httpx
+import numpy as np
+
+from src.api_integrator.cryptoquant_connector import CryptoQuantConnector
+from src.api_integrator.request_scheduler import RequestScheduler
+from src.api_integrator.fetch_checkpoint import FetchCheckpoint
+from src.api_integrator.watermark_store import WatermarkStore
+from src.models.endpoint_series import EndpointSeries
+from src.pipeline.data_validator import DataValidator, ValidationState, parse_frequency
+
+DAY = 24 * 60 * 60
+DAY_1 = 1742342400000
+
+
+def daily_series(endpoint: str, days, values) -> EndpointSeries:
+    return EndpointSeries.from_rows(endpoint, [{"start_time": DAY_1 + day * DAY * 1000, endpoint: value}
+                                               for day, value in zip(days, values)])
+
+
+class DataValidatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.validator = DataValidator(ValidationState(os.path.join(self.temp_dir.name, "validation.json")),
+                                       min_history=10)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parse_frequency(self):
+        assert parse_frequency("day") == DAY
+        assert parse_frequency("24h") == DAY
+        assert parse_frequency("10m") == 600
+        assert parse_frequency("1month") is None
+        assert parse_frequency(None) is None
+
+    def test_continuous_batch_passes(self):
+        response = self.validator.validate("btc", "market-indicator", [daily_series("mvrv", range(5), range(5))],
+                                           {"mvrv": DAY})
+
+        assert response.is_success
+        assert len(response.data) == 1
+        # The other endpoints of the category are missing from the batch
+        assert [issue.check for issue in response.issues] == ["columns"]
+        assert response.issues[0].severity == "warning"
+
+    def test_gaps_and_order_are_reported(self):
+        series = daily_series("mvrv", [0, 2, 1, 6], [1.0, 1.0, 1.0, 1.0])
+        response = self.validator.validate("btc", "flow-indicator", [series], {"mvrv": DAY})
+
+        assert response.is_success
+        continuity = [issue for issue in response.issues if issue.check == "continuity"]
+        assert [issue.count for issue in continuity] == [1, 3]
+        assert "3 missing rows in 1 gaps" in continuity[1].message
+
+    def test_conflicting_duplicates_are_rejected(self):
+        identical = daily_series("mvrv", [0, 1, 1], [1.0, 2.0, 2.0])
+        conflicting = daily_series("sopr", [0, 0, 1], [1.0, 3.0, 2.0])
+        response = self.validator.validate("btc", "flow-indicator", [identical, conflicting])
+
+        assert not response.is_success
+        assert [series.endpoint for series in response.data] == ["mvrv"]
+        severities = {issue.endpoint: issue.severity for issue in response.issues if issue.check == "duplicates"}
+        assert severities == {"mvrv": "warning", "sopr": "error"}
+
+    def test_schema_and_values(self):
+        text = daily_series("mvrv", range(2), ["1.5", "2.5"])
+        infinite = daily_series("sopr", range(2), [1.0, float("inf")])
+        response = self.validator.validate("btc", "market-indicator", [text, infinite])
+
+        assert response.data == []
+        checks = {(issue.endpoint, issue.check) for issue in response.issues if issue.severity == "error"}
+        assert checks == {("mvrv", "schema"), ("sopr", "values")}
+
+        missing = next(issue for issue in self.validator.validate("btc", "network-indicator", [
+            daily_series(endpoint, range(2), [1.0, 2.0]) for endpoint in ["nvt", "nvt_golden_cross", "nvm",
+                                                                            "puell_multiple", "nupl", "nrpl"]
+        ]).issues if issue.check == "columns")
+        assert missing.message == "missing columns nup, nul"
+
+    def test_incremental_batch_is_checked_against_the_state(self):
+        history = np.cumsum(np.random.default_rng(0).normal(0, 1, 100)) + 100
+        self.validator.update("btc", "flow-indicator", [daily_series("mvrv", range(100), history)])
+        self.validator.state.save()
+        validator = DataValidator(ValidationState(self.validator.state.filepath), min_history=10)
+
+        # The overlapping rows are stored already, only the rows after day 99 are checked
+        batch = daily_series("mvrv", [98, 99, 102, 103], [1e6, history[-1], history[-1] + 1, history[-1] + 500])
+        response = validator.validate("btc", "flow-indicator", [batch], {"mvrv": DAY})
+
+        assert response.is_success
+        issues = {issue.check: issue for issue in response.issues}
+        assert issues["continuity"].count == 2
+        assert issues["outliers"].count == 1
+        assert issues["outliers"].message == "outlying changes in mvrv (1)"
+
+        validator.update("btc", "flow-indicator", [batch])
+        assert validator.state.get("btc", "flow-indicator", "mvrv")["start_time"] == DAY_1 + 103 * DAY * 1000
+
+    def test_connector_rejects_invalid_endpoints(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            endpoint = request.url.path.split("/")[-1]
+            value = 2.0 if endpoint == "mvrv" else 1.0
+            rows = [{"start_time": DAY_1, endpoint: 1.0}, {"start_time": DAY_1, endpoint: value}]
+            return httpx.Response(200, json={"data": rows}, request=request)
+
+        connector = CryptoQuantConnector(
+            transport=httpx.MockTransport(handler), scheduler=RequestScheduler(max_retries=1, backoff_base=0.001),
+            watermarks=WatermarkStore(os.path.join(self.temp_dir.name, "watermarks.json")),
+            checkpoint=FetchCheckpoint(self.temp_dir.name)
+        )
+        response = connector.fetch_all(["btc"], ["market-indicator"])["btc"]["market-indicator"]
+
+        assert response.failed_endpoints == ["mvrv"]
+        assert "mvrv" not in [series.endpoint for series in response.data]
+        result = next(result for result in response.endpoint_results if result.endpoint == "mvrv")
+        assert result.message == "Invalid data: 1 duplicated start times with conflicting values"
+        assert [issue.endpoint for issue in response.issues if issue.severity == "error"] == ["mvrv"]
+
+
+if __name__ == '__main__':
+    unittest.main()
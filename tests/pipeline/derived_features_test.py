@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.derived_features import (DERIVED_FEATURES_CATEGORY, DerivedFeature, DerivedFeatureEngine,
+                                           get_default_features, update_derived_features)
+from src.pipeline.feature_store import FeatureStore
+from src.storage.columnar_store import ColumnarStore
+from src.utils.utils import save_responses
+from tests.helpers import DAY_MS, JAN_1_2025, DataDirTestCase
+
+FEATURES = [
+    DerivedFeature(name="close_mean_5", kind="rolling_mean", column="close", window=5),
+    DerivedFeature(name="close_zscore_5", kind="zscore", column="close", window=5),
+    DerivedFeature(name="close_return_1", kind="pct_change", column="close", window=1),
+    DerivedFeature(name="close_ewm_10", kind="ewm_mean", column="close", window=10),
+    DerivedFeature(name="inflow_volume_ratio", kind="ratio", column="inflow_total", denominator="volume"),
+]
+
+
+def make_frame(days):
+    rng = np.random.default_rng(0)
+    index = pd.date_range("2025-01-01", periods=days, freq="D", name="date")
+    return pd.DataFrame({"close": rng.random(days) * 100, "volume": rng.random(days) + 1,
+                         "inflow_total": rng.random(days)}, index=index)
+
+
+class DerivedFeatureEngineTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.temp_dir.name, "state.json")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_incremental_update_matches_full_compute(self):
+        df = make_frame(60)
+        engine = DerivedFeatureEngine(FEATURES, self.state_path)
+        engine.compute(df.iloc[:50])
+        engine.save_state()
+
+        # A new engine only sees the persisted state and the new rows, the first of which revises the last processed day
+        df.iloc[49, 0] += 10
+        expected = DerivedFeatureEngine(FEATURES, self.state_path).compute(df)
+        updated = DerivedFeatureEngine(FEATURES, self.state_path).update(df.iloc[49:])
+
+        pd.testing.assert_frame_equal(updated, expected.iloc[49:], check_freq=False)
+
+    def test_update_rejects_overlap_beyond_the_state(self):
+        df = make_frame(80)
+        engine = DerivedFeatureEngine(FEATURES, self.state_path)
+        engine.compute(df)
+
+        with self.assertRaisesRegex(ValueError, "close_mean_5"):
+            engine.update(df.iloc[60:])
+
+    def test_rejects_columns_outside_endpoint_columns(self):
+        with self.assertRaises(ValueError):
+            DerivedFeatureEngine([DerivedFeature(name="x", kind="rolling_mean", column="unknown", window=3)])
+
+
+class UpdateDerivedFeaturesTestCase(DataDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.save_days(0, 40)
+
+    @staticmethod
+    def save_days(first, last, shift=0.0):
+        rng = np.random.default_rng(first)
+        days = range(first, last)
+        save_responses([{"endpoint": "price-ohlcv", "data": [
+            {"start_time": JAN_1_2025 + day * DAY_MS, "close": 100 + day + shift, "volume": 1 + rng.random()}
+            for day in days]}], "btc", "market-data")
+        save_responses([{"endpoint": "all", "data": [
+            {"start_time": JAN_1_2025 + day * DAY_MS, "netflow_total": rng.random(), "inflow_total": rng.random()}
+            for day in days]}], "btc", "exchange-flows")
+
+    def test_updates_follow_the_stored_rows(self):
+        first = update_derived_features("btc")
+        assert first.is_success and len(first.data) == 40
+
+        # The new batch revises the last stored day
+        self.save_days(39, 43, shift=5.0)
+        updated = update_derived_features("btc", ["market-data"])
+        assert updated.is_success and len(updated.data) == 10
+
+        features = get_default_features("btc")
+        columns = [column for feature in features for column in feature.input_columns]
+        matrix = FeatureStore(os.path.join(self.temp_dir.name, "cache")).get_matrix(
+            ["btc"], ["exchange-flows", "market-data"], [column.split("/")[-1] for column in columns]).data
+        expected = DerivedFeatureEngine(features, os.path.join(self.temp_dir.name, "full.json")).compute(
+            matrix.reindex(columns=list(dict.fromkeys(columns))))
+
+        stored = ColumnarStore(self.processed_dir).read_frame("btc", DERIVED_FEATURES_CATEGORY)
+        assert len(stored) == 43
+        np.testing.assert_allclose(stored.to_numpy(), expected.to_numpy())
+
+    def test_skips_categories_that_are_not_inputs(self):
+        response = update_derived_features("btc", ["market-indicator"])
+
+        assert response.is_success and response.data is None
+        assert not os.path.exists(self.processed_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
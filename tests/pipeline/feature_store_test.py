@@ -0,0 +1,77 @@
+import os
+from unittest.mock import patch
+
+import numpy as np
+
+from src.pipeline.feature_store import FeatureStore
+from src.utils.utils import save_responses
+from tests.helpers import DataDirTestCase, make_rows
+
+
+class FeatureStoreTestCase(DataDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        save_responses([{"endpoint": "mvrv", "data": make_rows("mvrv", 5)},
+                        {"endpoint": "sopr", "data": make_rows("sopr", 5)}], "btc", "market-indicator")
+        save_responses([{"endpoint": "mvrv", "data": make_rows("mvrv", 3, offset=3)}], "eth", "market-indicator")
+        save_responses([{"endpoint": "price-ohlcv", "data": make_rows("close", 6)}], "btc", "market-data")
+        save_responses([{"endpoint": "price-ohlcv", "data": make_rows("close", 6)}], "eth", "market-data")
+
+        self.store = FeatureStore(cache_dir=os.path.join(self.temp_dir.name, "cache"))
+
+    def test_get_matrix_aligns_symbols_and_categories(self):
+        response = self.store.get_matrix(["btc", "eth"], ["market-indicator", "market-data"],
+                                         columns=["mvrv", "close"], start="2025-01-02", dtype="float32")
+
+        matrix = response.data
+        assert response.is_success
+        assert list(matrix.columns) == ["btc/market-indicator/mvrv", "btc/market-data/close",
+                                        "eth/market-indicator/mvrv", "eth/market-data/close"]
+        assert len(matrix) == 5
+        assert (matrix.dtypes == np.float32).all()
+        assert np.isnan(matrix["eth/market-indicator/mvrv"].iloc[0])
+
+    def test_get_matrix_reuses_cache_until_sources_change(self):
+        with patch.object(self.store.extractor, "load_frame", wraps=self.store.extractor.load_frame) as load_frame:
+            self.store.get_matrix(["btc"], ["market-indicator"])
+            FeatureStore(cache_dir=self.store.cache_dir, extractor=self.store.extractor).get_matrix(
+                ["btc"], ["market-indicator"])
+            assert load_frame.call_count == 1
+
+            save_responses([{"endpoint": "mvrv", "data": make_rows("mvrv", 1, offset=5)}], "btc", "market-indicator")
+            response = self.store.get_matrix(["btc"], ["market-indicator"])
+
+            assert load_frame.call_count == 2
+            assert len(response.data) == 6
+
+    def test_get_matrix_replaces_superseded_cache_entries(self):
+        self.store.get_matrix(["btc"], ["market-indicator"])
+        self.store.get_matrix(["eth"], ["market-indicator"])
+        assert len(os.listdir(self.store.cache_dir)) == 2
+
+        save_responses([{"endpoint": "mvrv", "data": make_rows("mvrv", 1, offset=5)}], "btc", "market-indicator")
+        self.store.get_matrix(["btc"], ["market-indicator"])
+
+        # The matrix of the older btc files is dropped, the eth matrix is still valid
+        assert len(os.listdir(self.store.cache_dir)) == 2
+        assert len(self.store._memory_cache) == 2
+
+    def test_get_matrix_fails_when_data_is_missing(self):
+        response = self.store.get_matrix(["eth"], ["network-data"])
+
+        assert not response.is_success
+        assert "eth/network-data" in response.message
+
+    def test_get_matrix_fails_when_a_category_is_missing_from_the_database(self):
+        with patch("src.utils.utils.STORAGE_BACKEND", "sqlite"), \
+                patch("src.pipeline.json_extractor.STORAGE_BACKEND", "sqlite"):
+            save_responses([{"endpoint": "price-ohlcv", "data": make_rows("close", 6)}], "btc", "market-data")
+            response = self.store.get_matrix(["btc"], ["market-data", "market-indicator"])
+
+        assert not response.is_success
+        assert "btc/market-indicator" in response.message
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+from src.pipeline.json_extractor import JSONExtractor
+from src.utils.utils import save_responses
+from tests.helpers import make_rows, patch_data_dirs
+
+
+class JSONExtractorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.extractor = JSONExtractor()
+
+    def test_merge_endpoints_aligns_on_sorted_union_of_dates(self):
+        responses = [
+            {"endpoint": "sopr", "data": list(reversed(make_rows("sopr", 3, offset=1)))},
+            {"endpoint": "mvrv", "data": make_rows("mvrv", 3)},
+        ]
+
+        df = self.extractor.merge_endpoints(
+            [JSONExtractor._rows_to_columns(response["data"]) for response in responses], "market-indicator")
+
+        assert df.index.dtype.kind == "M"
+        assert df.index.name == "date"
+        assert str(df.index[0]) == "2025-01-01 00:00:00"
+        assert list(df.columns) == ["mvrv", "sopr"]
+        assert df["mvrv"].tolist()[:3] == [0.0, 1.0, 2.0] and np.isnan(df["mvrv"].iloc[3])
+        assert np.isnan(df["sopr"].iloc[0]) and df["sopr"].tolist()[1:] == [1.0, 2.0, 3.0]
+
+    def test_merge_endpoints_keeps_complete_integer_columns_as_int64(self):
+        columns = [
+            JSONExtractor._rows_to_columns(make_rows("transactions_count_total", 3, value=int)),
+            JSONExtractor._rows_to_columns(make_rows("addresses_count_active", 2, value=int)),
+        ]
+
+        df = self.extractor.merge_endpoints(columns, "network-data")
+
+        assert df["transactions_count_total"].dtype == np.int64
+        assert df["addresses_count_active"].dtype == np.float64
+
+    def test_extract_from_every_storage_backend(self):
+        # Text fields such as the exchange of an endpoint are stored but are not features
+        mvrv = [dict(row, exchange="all_exchange") for row in make_rows("mvrv", 5)]
+        responses = [{"endpoint": "mvrv", "data": mvrv}, {"endpoint": "sopr", "data": make_rows("sopr", 5)}]
+
+        for backend in ("parquet", "sqlite", "json"):
+            with tempfile.TemporaryDirectory() as temp_dir, patch_data_dirs(Path(temp_dir)), \
+                    patch("src.utils.utils.STORAGE_BACKEND", backend), \
+                    patch("src.pipeline.json_extractor.STORAGE_BACKEND", backend):
+                save_responses(responses, "btc", "market-indicator")
+                response = self.extractor.extract("btc", "market-indicator")
+
+                assert response.is_success, backend
+                assert list(response.data.columns) == ["mvrv", "sopr"], backend
+                assert response.data["sopr"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import httpx
+
+from src.api_integrator.providers import get_connectors
+from src.api_integrator.request_scheduler import RequestScheduler
+from src.api_integrator.fetch_checkpoint import FetchCheckpoint
+from src.api_integrator.watermark_store import WatermarkStore
+from src.models.endpoint_series import EndpointSeries
+from src.pipeline.refresh_pipeline import RefreshPipeline, format_plan, format_summary
+from tests.helpers import DataDirTestCase, mock_handler
+
+
+class RefreshPipelineTestCase(DataDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request.url)
+            return mock_handler(request)
+
+        self.checkpoint = FetchCheckpoint(os.path.join(self.temp_dir.name, "checkpoints"))
+        self.connectors = get_connectors(
+            ["cryptoquant", "glassnode"], transport=httpx.MockTransport(handler),
+            scheduler=RequestScheduler(max_retries=1, backoff_base=0.001),
+            watermarks=WatermarkStore(os.path.join(self.temp_dir.name, "watermarks.json")), checkpoint=self.checkpoint
+        )
+        self.pipeline = RefreshPipeline(self.connectors, max_concurrency=4, extract_workers=0)
+        self.categories = {"cryptoquant": ["market-indicator"], "glassnode": ["supply"]}
+
+    def test_plan_counts_requests_without_sending_them(self):
+        plan = self.pipeline.plan(["btc", "eth"], self.categories)
+
+        assert [(task.symbol, task.storage_category) for task in plan.tasks] == [
+            ("btc", "market-indicator"), ("eth", "market-indicator"),
+            ("btc", "glassnode-supply"), ("eth", "glassnode-supply"),
+        ]
+        endpoints = {provider: len(connector.ENDPOINTS_PARAMS[self.categories[provider][0]])
+                     for provider, connector in self.pipeline.connectors.items()}
+        assert plan.get_requests_by_provider() == {provider: 2 * count for provider, count in endpoints.items()}
+        assert plan.tasks[0].extract and not plan.tasks[2].extract
+        assert self.pipeline.estimate_seconds(plan) > 0
+        assert f"{plan.requests} requests" in format_plan(plan, self.pipeline.estimate_seconds(plan))
+        assert self.requests == []
+
+    def test_plan_skips_checkpointed_endpoints(self):
+        endpoints = list(self.connectors[0].ENDPOINTS_PARAMS["market-indicator"])
+        self.checkpoint.save("btc", "market-indicator", [EndpointSeries.from_rows(endpoints[0], [])])
+
+        plan = self.pipeline.plan(["btc"], self.categories)
+        assert plan.tasks[0].endpoints == endpoints[1:]
+
+        plan = RefreshPipeline(self.connectors, resume=False).plan(["btc"], self.categories)
+        assert plan.tasks[0].endpoints == endpoints
+
+    def test_plan_leaves_expired_checkpoints_in_place(self):
+        endpoints = list(self.connectors[0].ENDPOINTS_PARAMS["market-indicator"])
+        self.checkpoint.save("btc", "market-indicator", [EndpointSeries.from_rows(endpoints[0], [])])
+        self.checkpoint.max_age = -1
+
+        plan = self.pipeline.plan(["btc"], self.categories)
+
+        assert plan.tasks[0].endpoints == endpoints
+        assert os.path.exists(self.checkpoint._get_filepath("btc", "market-indicator"))
+
+    def test_unknown_category_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.pipeline.plan(["btc"], {"glassnode": ["market-data"]})
+
+    def test_run_fetches_stores_and_extracts(self):
+        plan = self.pipeline.plan(["btc"], self.categories)
+        timings = self.pipeline.run(plan)
+
+        assert len(self.requests) == plan.requests
+        assert all(timing.is_success for timing in timings)
+        by_category = {timing.category: timing for timing in timings}
+        assert by_category["market-indicator"].extracted
+        assert by_category["market-indicator"].rows == len(plan.tasks[0].endpoints)
+        assert by_category["glassnode-supply"].extract_time is None
+        assert os.listdir(self.processed_dir)
+        assert "2 categories, 0 failed" in format_summary(timings, 1.0)
+
+    def test_extraction_workers_are_not_forked(self):
+        pipeline = RefreshPipeline(self.connectors, max_concurrency=4, extract_workers=2)
+        # Spawned workers would not see the patched directories, so the pool runs in threads
+        with patch("src.pipeline.refresh_pipeline.ProcessPoolExecutor",
+                   side_effect=lambda max_workers, mp_context: ThreadPoolExecutor(max_workers)) as pool:
+            timings = pipeline.run(pipeline.plan(["btc"], self.categories))
+
+        assert all(timing.is_success for timing in timings)
+        assert pool.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+
+
+if __name__ == '__main__':
+    unittest.main()
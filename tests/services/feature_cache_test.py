@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import patch
+
+import orjson
+import pyarrow as pa
+from fastapi.testclient import TestClient
+
+from src.main import app, feature_cache
+from src.utils.utils import save_responses
+from tests.helpers import DAY_MS, JAN_1_2025, DataDirTestCase, make_rows
+
+
+class FeatureEndpointTestCase(DataDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        save_responses([{"endpoint": "mvrv", "data": make_rows("mvrv", 5)},
+                        {"endpoint": "sopr", "data": make_rows("sopr", 5)}], "btc", "market-indicator")
+        feature_cache.invalidate()
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        feature_cache.invalidate()
+
+    def test_get_features_filters_columns_and_dates(self):
+        response = self.client.get("/features/btc/market-indicator",
+                                   params={"columns": "sopr", "start": "2025-01-02", "end": "2025-01-03"})
+
+        assert response.status_code == 200
+        body = orjson.loads(response.content)
+        assert body["start_time"] == [JAN_1_2025 + DAY_MS, JAN_1_2025 + 2 * DAY_MS]
+        assert body["columns"] == {"sopr": [1.0, 2.0]}
+
+    def test_get_features_as_arrow_stream(self):
+        response = self.client.get("/features/btc/market-indicator", params={"format": "arrow"})
+
+        table = pa.ipc.open_stream(response.content).read_all()
+        assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+        assert table.column_names == ["date", "mvrv", "sopr"]
+        assert table.num_rows == 5
+
+    def test_get_features_honors_etag_until_data_changes(self):
+        etag = self.client.get("/features/btc/market-indicator").headers["etag"]
+
+        cached = self.client.get("/features/btc/market-indicator", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+
+        save_responses([{"endpoint": "mvrv", "data": make_rows("mvrv", 1, offset=5)}], "btc", "market-indicator")
+        feature_cache.invalidate("btc", "market-indicator")
+        refreshed = self.client.get("/features/btc/market-indicator", headers={"If-None-Match": etag})
+
+        assert refreshed.status_code == 200
+        assert len(orjson.loads(refreshed.content)["start_time"]) == 6
+
+    def test_get_features_rejects_invalid_dates(self):
+        assert self.client.get("/features/btc/market-indicator", params={"start": "notadate"}).status_code == 422
+        assert self.client.get("/features/btc/market-indicator", params={"end": "2025-13-01"}).status_code == 422
+
+    def test_get_features_during_a_rewrite_of_the_partitions(self):
+        etag = self.client.get("/features/btc/market-indicator").headers["etag"]
+        save_responses([{"endpoint": "mvrv", "data": make_rows("mvrv", 1, offset=5)}], "btc", "market-indicator")
+
+        with patch.object(feature_cache, "check_interval", 0):
+            with patch.object(feature_cache.extractor, "load_frame", side_effect=FileNotFoundError("part-0.parquet")):
+                during = self.client.get("/features/btc/market-indicator")
+            after = self.client.get("/features/btc/market-indicator")
+
+        # The previous series is served until the rewritten partitions can be read
+        assert during.status_code == 200 and during.headers["etag"] == etag
+        assert len(orjson.loads(after.content)["start_time"]) == 6
+
+    def test_get_features_of_missing_data(self):
+        assert self.client.get("/features/eth/market-indicator").status_code == 404
+        assert self.client.get("/features/btc/unknown").status_code == 404
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import httpx
+
+from src.api_integrator.cryptoquant_connector import CryptoQuantConnector
+from src.api_integrator.fetch_checkpoint import FetchCheckpoint
+from src.api_integrator.request_scheduler import RequestScheduler
+from src.api_integrator.watermark_store import WatermarkStore
+from src.services.ingestion_scheduler import IngestionScheduler
+
+DAY_1 = 1742342400000
+
+
+class IngestionSchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.patcher = patch("src.utils.utils.RAW_DATA_DIR", Path(self.temp_dir.name))
+        self.patcher.start()
+        self.updates = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(0.05)
+            endpoint = request.url.path.split("/")[-1]
+            return httpx.Response(200, json={"data": [{"start_time": DAY_1, "date": "", endpoint: 1.0}]})
+
+        self.connector = CryptoQuantConnector(
+            transport=httpx.MockTransport(handler),
+            watermarks=WatermarkStore(os.path.join(self.temp_dir.name, "watermarks.json")),
+            scheduler=RequestScheduler(),
+            checkpoint=FetchCheckpoint(self.temp_dir.name)
+        )
+        self.scheduler = IngestionScheduler(self.connector, symbols=["btc"], categories=["market-indicator"],
+                                            on_update=lambda symbol, category, responses: self.updates.append(
+                                                (category, sum(len(response) for response in responses))))
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.temp_dir.cleanup()
+
+    def test_cadence_follows_endpoint_window(self):
+        job = self.scheduler.jobs[("btc", "market-indicator")]
+
+        assert job.interval == 24 * 60 * 60
+        assert (self.scheduler._get_next_run(job.interval) - self.scheduler.delay) % job.interval == 0
+
+    def test_overlapping_triggers_are_coalesced(self):
+        async def run():
+            await self.scheduler.start()
+            await asyncio.sleep(0)
+            assert not self.scheduler.trigger("btc", "market-indicator")
+            while self.scheduler.jobs[("btc", "market-indicator")].runs == 0:
+                await asyncio.sleep(0.01)
+            await self.scheduler.stop()
+
+        asyncio.run(run())
+
+        job = self.scheduler.jobs[("btc", "market-indicator")]
+        assert job.runs == 1 and job.coalesced == 1
+        assert job.last_success and job.rows == 4
+        assert job.last_latency > 0 and job.next_run is not None
+        assert self.updates == [("market-indicator", 4)]
+
+    def test_rows_up_to_the_watermark_are_not_published_again(self):
+        async def run():
+            await self.scheduler._run(("btc", "market-indicator"))
+            # The incremental fetch starts at the watermark, so the same row is returned again
+            await self.scheduler._run(("btc", "market-indicator"))
+
+        asyncio.run(run())
+
+        assert self.updates == [("market-indicator", 4), ("market-indicator", 0)]
+
+
+if __name__ == '__main__':
+    unittest.main()
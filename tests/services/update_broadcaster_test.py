@@ -0,0 +1,59 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import orjson
+
+from src.services import update_broadcaster
+from src.services.update_broadcaster import UpdateBroadcaster
+
+DAY_1 = 1742342400000
+
+RESPONSES = [
+    {"endpoint": "mvrv", "data": [{"start_time": DAY_1, "date": "", "mvrv": 1.5}]},
+    {"endpoint": "sopr", "data": [{"start_time": DAY_1, "date": "", "sopr": 0.9}]},
+]
+
+
+class UpdateBroadcasterTestCase(unittest.TestCase):
+
+    def test_subscribers_with_same_columns_share_one_message(self):
+        async def run():
+            broadcaster = UpdateBroadcaster()
+            everything = [broadcaster.subscribe("btc", "market-indicator") for _ in range(3)]
+            mvrv = broadcaster.subscribe("btc", "market-indicator", ["mvrv"])
+            other = broadcaster.subscribe("eth", "market-indicator")
+
+            with patch.object(update_broadcaster, "serialize_frame",
+                              wraps=update_broadcaster.serialize_frame) as serialize:
+                assert broadcaster.publish("btc", "market-indicator", RESPONSES) == 2
+                assert serialize.call_count == 2
+
+            messages = [await subscription.get() for subscription in everything]
+            assert all(message is messages[0] for message in messages)
+            assert orjson.loads(messages[0])["columns"] == {"mvrv": [1.5], "sopr": [0.9]}
+            assert orjson.loads(await mvrv.get())["columns"] == {"mvrv": [1.5]}
+            assert other.queue.empty()
+
+        asyncio.run(run())
+
+    def test_slow_subscriber_drops_oldest_updates(self):
+        async def run():
+            broadcaster = UpdateBroadcaster()
+            subscription = broadcaster.subscribe("btc", "market-indicator")
+            subscription.queue = asyncio.Queue(maxsize=1)
+
+            broadcaster.publish("btc", "market-indicator", RESPONSES[:1])
+            broadcaster.publish("btc", "market-indicator", RESPONSES[1:])
+
+            assert subscription.dropped == 1
+            assert "sopr" in orjson.loads(await subscription.get())["columns"]
+
+            broadcaster.unsubscribe(subscription)
+            assert broadcaster.count() == 0
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+    unittest.main()
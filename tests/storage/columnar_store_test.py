@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from functools import partial
+import pandas as pd
+
+from src.storage.columnar_store import ColumnarStore
+from tests import helpers
+
+make_rows = partial(helpers.make_rows, "value", value=int, start_time=helpers.JAN_1_2020)
+
+
+class ColumnarStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = ColumnarStore(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_write_partitions_by_year(self):
+        self.store.write("btc", "market-data", "price-ohlcv", make_rows(800))
+
+        path = os.path.join(self.temp_dir.name, "btc", "market-data", "price-ohlcv")
+        assert sorted(os.listdir(path)) == ["year=2020", "year=2021", "year=2022"]
+        assert self.store.read("btc", "market-data", "price-ohlcv").num_rows == 800
+
+    def test_write_upserts_overlapping_rows(self):
+        self.store.write("btc", "market-data", "price-ohlcv", make_rows(10))
+        self.store.write("btc", "market-data", "price-ohlcv",
+                         [{**row, "value": -1} for row in make_rows(5, offset=8)])
+
+        values = self.store.read("btc", "market-data", "price-ohlcv")["value"].to_pylist()
+        assert values == [0, 1, 2, 3, 4, 5, 6, 7, -1, -1, -1, -1, -1]
+
+    def test_read_projects_columns_and_filters_date_range(self):
+        self.store.write("btc", "market-data", "price-ohlcv", make_rows(800))
+
+        table = self.store.read("btc", "market-data", "price-ohlcv", columns=["value"],
+                                start="2021-01-01", end="2021-01-03")
+
+        assert table.column_names == ["start_time", "value"]
+        assert table["value"].to_pylist() == [366, 367, 368]
+
+    def test_read_missing_dataset_returns_none(self):
+        assert self.store.read("btc", "market-data", "price-ohlcv") is None
+        assert self.store.read_responses("btc", "market-data") is None
+
+    def test_write_and_read_frame(self):
+        df = pd.DataFrame({"close": [1.0, 2.0, 3.0]},
+                          index=pd.Index(["2020-01-01 00:00:00", "2020-01-02 00:00:00", "2021-01-01 00:00:00"],
+                                         name="date"))
+
+        self.store.write_frame("btc", "market-data", df)
+        loaded = self.store.read_frame("btc", "market-data", start="2020-01-02")
+
+        assert loaded.index.tolist() == ["2020-01-02 00:00:00", "2021-01-01 00:00:00"]
+        assert loaded["close"].tolist() == [2.0, 3.0]
+
+    def test_write_responses_reports_failures(self):
+        responses = [{"endpoint": "price-ohlcv", "data": make_rows(3)}]
+
+        assert self.store.write_responses("btc", "market-data", responses)
+        assert [row["value"] for row in self.store.read_responses("btc", "market-data")[0]["data"]] == [0, 1, 2]
+
+        # A file in place of the symbol directory fails the write
+        open(os.path.join(self.temp_dir.name, "eth"), "w").close()
+        assert not self.store.write_responses("eth", "market-data", responses)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+from functools import partial
+
+import numpy as np
+
+from src.storage.timeseries_db import TimeSeriesDB, get_timeseries_db
+from tests import helpers
+from tests.helpers import DAY_MS, JAN_1_2020
+
+make_rows = partial(helpers.make_rows, start_time=JAN_1_2020)
+
+
+class TimeSeriesDBTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = TimeSeriesDB(self.temp_dir.name)
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_reads_do_not_create_the_database(self):
+        assert self.db.list_endpoints("btc", "market-indicator") == []
+        assert self.db.read_wide("btc", "market-indicator") is None
+        assert not os.path.exists(self.db.path)
+
+    def test_database_is_shared_per_directory(self):
+        db = get_timeseries_db(self.temp_dir.name)
+
+        assert get_timeseries_db(self.temp_dir.name) is db
+        db.close()
+
+    def test_write_upserts_overlapping_rows(self):
+        self.db.write("btc", "market-indicator", "mvrv", make_rows("mvrv", 10))
+        self.db.write("btc", "market-indicator", "mvrv", [{**row, "mvrv": -1.0} for row in make_rows("mvrv", 5, 8)])
+
+        _, values = self.db.read_series("btc", "market-indicator", "mvrv")
+        assert values.tolist() == [0, 1, 2, 3, 4, 5, 6, 7, -1, -1, -1, -1, -1]
+
+    def test_read_series_filters_date_range(self):
+        self.db.write("btc", "market-indicator", "mvrv", make_rows("mvrv", 800))
+
+        start_times, values = self.db.read_series("btc", "market-indicator", "mvrv",
+                                                  start="2021-01-01", end="2021-01-03")
+
+        assert values.tolist() == [366, 367, 368]
+        assert start_times[0] == JAN_1_2020 + 366 * DAY_MS
+
+    def test_read_wide_pivots_metrics_on_union_of_dates(self):
+        self.db.write("btc", "market-indicator", "mvrv", make_rows("mvrv", 3))
+        self.db.write("btc", "market-indicator", "sopr", make_rows("sopr", 3, offset=1))
+
+        columns = self.db.read_wide("btc", "market-indicator")
+
+        assert list(columns.keys()) == ["start_time", "mvrv", "sopr"]
+        assert columns["start_time"].tolist() == [JAN_1_2020 + i * DAY_MS for i in range(4)]
+        np.testing.assert_array_equal(columns["mvrv"], [0, 1, 2, np.nan])
+        np.testing.assert_array_equal(columns["sopr"], [np.nan, 1, 2, 3])
+
+    def test_as_of_returns_latest_observation_before_date(self):
+        self.db.write("btc", "market-indicator", "mvrv", make_rows("mvrv", 10))
+        self.db.write("btc", "market-indicator", "sopr", make_rows("sopr", 3, offset=5))
+
+        latest = self.db.as_of("btc", "market-indicator", "2020-01-05")
+
+        assert latest == {"mvrv": (JAN_1_2020 + 4 * DAY_MS, 4.0)}
+        assert self.db.as_of("btc", "market-indicator", JAN_1_2020 + 20 * DAY_MS)["sopr"][1] == 7.0
+
+    def test_read_responses_round_trip(self):
+        rows = [{**row, "exchange": "all_exchange"} for row in make_rows("mvrv", 2)]
+        self.db.write_responses("btc", "market-indicator", [{"endpoint": "mvrv", "data": rows}])
+
+        responses = self.db.read_responses("btc", "market-indicator")
+
+        assert responses == [{"endpoint": "mvrv", "data": [
+            {"start_time": JAN_1_2020, "date": "2020-01-01 00:00:00", "mvrv": 0.0},
+            {"start_time": JAN_1_2020 + DAY_MS, "date": "2020-01-02 00:00:00", "mvrv": 1.0},
+        ]}]
+        assert self.db.read_responses("eth", "market-indicator") is None
+
+    def test_symbols_and_categories_are_separate_series(self):
+        self.db.write("btc", "exchange-flows", "reserve", make_rows("reserve", 2))
+        self.db.write("btc", "miner-flows", "reserve", make_rows("reserve", 3))
+        self.db.write("eth", "exchange-flows", "reserve", make_rows("reserve", 4))
+
+        assert len(self.db.read_wide("btc", "exchange-flows")["reserve"]) == 2
+        assert len(self.db.read_wide("btc", "miner-flows")["reserve"]) == 3
+        assert self.db.list_endpoints("eth", "exchange-flows") == ["reserve"]
+
+    def test_endpoints_of_a_category_keep_their_own_series(self):
+        self.db.write("btc", "market-data", "price-ohlcv", make_rows("close", 2))
+        self.db.write("btc", "market-data", "price-usdt", make_rows("close", 3, offset=10))
+
+        stored = self.db.read_responses("btc", "market-data")
+        responses = {response["endpoint"]: response["data"] for response in stored}
+        assert [row["close"] for row in responses["price-ohlcv"]] == [0.0, 1.0]
+        assert [row["close"] for row in responses["price-usdt"]] == [10.0, 11.0, 12.0]
+        assert list(self.db.read_wide("btc", "market-data")) == ["start_time", "price-ohlcv/close",
+                                                                 "price-usdt/close"]
+        assert len(self.db.read_series("btc", "market-data", "close", endpoint="price-usdt")[1]) == 3
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+import httpx
+from fastapi.testclient import TestClient
+
+from src.api_integrator.cryptoquant_connector import CryptoQuantConnector
+from src.api_integrator.fetch_checkpoint import FetchCheckpoint
+from src.api_integrator.request_scheduler import RequestScheduler
+from src.utils.instrumentation import MetricsRegistry, get_metrics, profile_run
+
+
+class InstrumentationTestCase(unittest.TestCase):
+
+    def test_render_prometheus_text_format(self):
+        metrics = MetricsRegistry(namespace="test")
+        metrics.inc("connector_rows", 10, provider="cryptoquant", endpoint="mvrv")
+        metrics.set("scheduler_in_flight", 2, host="https://example.com")
+        metrics.observe("storage_write_seconds", 0.02, category="market-data")
+
+        text = metrics.render()
+
+        assert "# TYPE test_connector_rows_total counter" in text
+        assert 'test_connector_rows_total{endpoint="mvrv",provider="cryptoquant"} 10.0' in text
+        assert 'test_scheduler_in_flight{host="https://example.com"} 2' in text
+        assert 'test_storage_write_seconds_bucket{category="market-data",le="0.01"} 0' in text
+        assert 'test_storage_write_seconds_bucket{category="market-data",le="0.025"} 1' in text
+        assert 'test_storage_write_seconds_count{category="market-data"} 1' in text
+
+    def test_span_records_histogram_and_notifies_listeners(self):
+        metrics = MetricsRegistry()
+        spans = []
+        metrics.add_span_listener(spans.append)
+
+        with metrics.span("extractor_build", category="market-data") as span:
+            pass
+
+        assert spans == [span]
+        assert span.duration is not None
+        assert metrics.get_histogram("extractor_build_seconds", category="market-data").count == 1
+
+    def test_profile_run_is_opt_in(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with profile_run("disabled", enabled=False, output_dir=temp_dir) as profiler:
+                assert profiler is None
+            with profile_run("enabled", enabled=True, output_dir=temp_dir) as profiler:
+                sum(range(1000))
+
+            assert profiler is not None
+            assert [name.startswith("enabled-") and name.endswith(".prof") for name in os.listdir(temp_dir)] == [True]
+
+    def test_connector_records_endpoint_metrics(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            endpoint = request.url.path.split("/")[-1]
+            return httpx.Response(200, json={"data": [{"start_time": 1742342400000, endpoint: 1.0}]},
+                                  request=request)
+
+        labels = {"provider": "cryptoquant", "category": "market-indicator", "endpoint": "mvrv"}
+        metrics = get_metrics()
+        rows_before = metrics.get_counter("connector_rows", **labels)
+        histogram = metrics.get_histogram("connector_request_seconds", **labels)
+        requests_before = histogram.count if histogram else 0
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            connector = CryptoQuantConnector(transport=httpx.MockTransport(handler),
+                                             scheduler=RequestScheduler(max_retries=0),
+                                             checkpoint=FetchCheckpoint(temp_dir))
+            connector.fetch_all(["btc"], ["market-indicator"])
+
+        assert metrics.get_counter("connector_rows", **labels) == rows_before + 1
+        assert metrics.get_counter("connector_response_bytes", **labels) > 0
+        assert metrics.get_histogram("connector_request_seconds", **labels).count == requests_before + 1
+        assert metrics.get_histogram("connector_decode_seconds", **labels) is not None
+
+    def test_metrics_endpoint(self):
+        from src.main import app
+
+        response = TestClient(app).get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+
+if __name__ == '__main__':
+    unittest.main()
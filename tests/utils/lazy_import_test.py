@@ -0,0 +1,39 @@
+import subprocess
+import sys
+import unittest
+
+from src.utils.lazy_import import lazy_import
+
+
+class LazyImportTestCase(unittest.TestCase):
+
+    def test_module_loads_on_first_attribute_access(self):
+        # A lazy module turns into a regular module once it has been loaded
+        code = ("import sys, types\n"
+                "from src.utils.lazy_import import lazy_import\n"
+                "colorsys = lazy_import('colorsys')\n"
+                "assert sys.modules['colorsys'] is colorsys and type(colorsys) is not types.ModuleType\n"
+                "assert colorsys.rgb_to_hsv(1, 0, 0) == (0, 1, 1)\n"
+                "assert type(colorsys) is types.ModuleType\n"
+                "import colorsys as imported\n"
+                "assert imported is colorsys\n")
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_concurrent_first_use_waits_for_the_load(self):
+        code = ("from concurrent.futures import ThreadPoolExecutor\n"
+                "from src.utils.lazy_import import lazy_import\n"
+                "ds = lazy_import('pyarrow.dataset')\n"
+                "with ThreadPoolExecutor(8) as executor:\n"
+                "    assert all(executor.map(lambda _: callable(ds.write_dataset), range(8)))\n")
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_returns_imported_module(self):
+        assert lazy_import("unittest") is unittest
+
+    def test_unknown_module(self):
+        with self.assertRaises(ModuleNotFoundError):
+            lazy_import("src.utils.unknown_module")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from src.utils.stream_decoder import JSONArrayStreamDecoder
+
+
+class JSONArrayStreamDecoderTestCase(unittest.TestCase):
+
+    def test_decodes_items_across_chunk_boundaries(self):
+        body = b'{"info": {"data": 0}, "data": [{"start_time": 1, "value": 1.5}, {"start_time": 2, "value": 2}]}'
+        decoder = JSONArrayStreamDecoder()
+
+        items = []
+        for i in range(0, len(body), 7):
+            items.extend(decoder.feed(body[i:i + 7]))
+        items.extend(decoder.close())
+
+        assert items == [{"start_time": 1, "value": 1.5}, {"start_time": 2, "value": 2}]
+        assert isinstance(items[0]["value"], float)
+
+    def test_raises_value_error_on_invalid_json(self):
+        decoder = JSONArrayStreamDecoder()
+        decoder.feed(b'{"data": [{"start_time": 1}')
+
+        with self.assertRaises(ValueError):
+            decoder.close()
+
+
+if __name__ == '__main__':
+    unittest.main()